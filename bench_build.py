@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Benchmark the thesis build pipeline on synthetic chapter trees.
+
+Every run scaffolds a fresh tree with ThesisGenerator (the given number of
+sections spread over CHAPTER_ORDER, each padded with prose, citations and
+math), copies in metadata.yaml, main.tex, the bibliography and the thesis
+class, and then times the stages of `make pdf` one by one:
+
+  scaffold         gen_thesis.py --spec (the generator itself)
+  metadata         extract_metadata.py
+  verify           gen_thesis.py --verify
+  pandoc-cold      gen_thesis.py build on an empty build/
+  pandoc-noop      gen_thesis.py build with nothing changed
+  pandoc-edit      gen_thesis.py build after editing one section
+  bibliography     bib_index.py (pruned references.bib)
+  latex            build_latex.py, plus one entry per pdflatex/biber pass
+
+Each stage runs in its own process, so its peak RSS is measured separately
+(os.wait4). Stages whose tools are not installed are recorded as skipped.
+Results are written as JSON keyed by the git commit, so two commits can be
+compared with the compare subcommand.
+
+The startup subcommand guards interpreter startup of the build scripts: it
+imports each one under `python -X importtime`, reports the import time and
+fails when a module listed in DEFERRED_IMPORTS is imported at load time or
+the import takes longer than --max-ms. `run` records the same import times.
+
+Usage:
+  python3 bench_build.py run [--sizes 10 100 1000] [--repeat 3]
+  python3 bench_build.py compare benchmarks/OLD.json benchmarks/NEW.json
+  python3 bench_build.py startup [--max-ms 100]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from gen_thesis import CHAPTER_ORDER, Colors
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks")
+
+# Files of the repository a synthetic tree needs for the LaTeX stage
+TREE_FILES = ["metadata.yaml", "main.tex", "references.bib", "aaltothesis.cls"]
+TREE_DIRS = ["logos"]
+
+SECTION_BODY = """## {title}
+
+Section {i} of {chapter}. Connection migration lets a QUIC endpoint move a
+connection to a new network path without a new handshake, which keeps the
+application state intact when a client changes interfaces
+[@10.1145/3098822.3098842]. Path validation bounds the data sent to an
+unverified address to $3 \\times$ the bytes received, and the probe round trip
+adds $\\Delta t = \\mathrm{{RTT}}_{{new}}$ to the recovery time.
+
+| Path | RTT (ms) | Loss |
+|------|----------|------|
+| A    | 20       | 0%   |
+| B    | 45       | 1%   |
+
+Regardless of the path, the congestion controller restarts from the initial
+window unless the new path is known to share the bottleneck, so the first
+round trips after migration are limited by slow start rather than by the
+link capacity.
+"""
+
+DEFAULT_SIZES = [10, 100, 1000]
+
+# Modules each build script must only import inside the commands that need them
+DEFERRED_IMPORTS = {
+    "gen_thesis": ["yaml", "subprocess", "shutil", "tempfile", "concurrent.futures"],
+    "extract_metadata": ["yaml", "tempfile"],
+    "bib_index": ["yaml", "subprocess", "concurrent.futures"],
+    "build_latex": ["yaml", "subprocess"],
+    "build_trace": ["subprocess", "argparse"],
+    "lint": ["yaml", "subprocess", "concurrent.futures"],
+    "watcher": ["ctypes", "subprocess"],
+}
+
+DEFAULT_MAX_IMPORT_MS = 100
+
+
+def git_commit():
+    """(commit, dirty) of the repository, or ("unknown", False) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    cwd=ROOT, capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def tool_version(tool):
+    if shutil.which(tool) is None:
+        return None
+    try:
+        result = subprocess.run([tool, "--version"], capture_output=True, text=True, timeout=10)
+        return (result.stdout or result.stderr).splitlines()[0].strip()
+    except (OSError, IndexError, subprocess.TimeoutExpired):
+        return "unknown"
+
+
+def run_stage(cmd, cwd):
+    """Run one stage; returns (ok, seconds, peak RSS in KB)."""
+    start = time.perf_counter()
+    with open(os.devnull, "wb") as devnull:
+        proc = subprocess.Popen(cmd, cwd=cwd, stdout=devnull, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    seconds = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode == 0, seconds, usage.ru_maxrss
+
+
+def import_profile(module):
+    """(seconds, imported module names) of importing module in a fresh interpreter."""
+    # Measure what a normal checkout sees, i.e. with bytecode caching enabled
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    seconds = None
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imported.append(name.strip())
+        if name.strip() == module:
+            seconds = int(cumulative) / 1e6
+    return seconds, imported
+
+
+def startup_times(repeat):
+    """Import time samples of every build script, after one warm-up import."""
+    results = {}
+    for module in DEFERRED_IMPORTS:
+        import_profile(module)
+        samples = [{"seconds": import_profile(module)[0], "ok": True} for _ in range(repeat)]
+        results[module] = aggregate(samples)
+    return results
+
+
+def startup(repeat, max_ms):
+    """Check import times and deferred imports; returns the number of violations."""
+    violations = 0
+    for module, deferred in DEFERRED_IMPORTS.items():
+        _, imported = import_profile(module)
+        eager = [d for d in deferred if any(n == d or n.startswith(d + ".") for n in imported)]
+        for name in eager:
+            print(f"    {Colors.FAIL}✗{Colors.ENDC} {module} imports {name} at load time")
+        violations += len(eager)
+    times = startup_times(repeat)
+    print_size(times)
+    for module, result in times.items():
+        if result["median"] * 1000 > max_ms:
+            print(f"    {Colors.FAIL}✗{Colors.ENDC} {module} takes {result['median'] * 1000:.1f} ms "
+                  f"to import (limit {max_ms} ms)")
+            violations += 1
+    if not violations:
+        print(f"{Colors.OKGREEN}✓{Colors.ENDC} Startup within {max_ms} ms, no eager imports")
+    return violations
+
+
+def make_tree(root, sections):
+    """Copy the thesis inputs into root and write the spec for `sections` sections."""
+    for name in TREE_FILES:
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy2(os.path.join(ROOT, name), root)
+    for name in TREE_DIRS:
+        if os.path.isdir(os.path.join(ROOT, name)):
+            shutil.copytree(os.path.join(ROOT, name), os.path.join(root, name))
+
+    per_chapter, extra = divmod(sections, len(CHAPTER_ORDER))
+    spec = {}
+    for n, chapter in enumerate(CHAPTER_ORDER):
+        count = per_chapter + (1 if n < extra else 0)
+        spec[chapter] = {
+            "title": chapter.replace("-", " ").title(),
+            "sections": [{"template": "s-{i:04d}", "count": count}] if count else [],
+            "section_template": SECTION_BODY,
+        }
+    spec_file = os.path.join(root, "bench-spec.yaml")
+    with open(spec_file, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+    return spec_file
+
+
+def edit_one_section(root):
+    """Append a paragraph to the first section of the first non-empty chapter."""
+    for chapter in CHAPTER_ORDER:
+        directory = os.path.join(root, "chapters", chapter)
+        sections = sorted(f for f in os.listdir(directory) if f.endswith(".md"))
+        if sections:
+            with open(os.path.join(directory, sections[0]), "a", encoding="utf-8") as f:
+                f.write("\nAn edited paragraph.\n")
+            return
+
+
+def stages(root, spec_file):
+    """The benchmarked stages as (name, argv, required tool or None)."""
+    py = sys.executable
+    gen = os.path.join(ROOT, "gen_thesis.py")
+    build = os.path.join(root, "build")
+    return [
+        ("scaffold", [py, gen, "-d", root, "--spec", spec_file], None),
+        ("metadata", [py, os.path.join(ROOT, "extract_metadata.py"), "--cache", build,
+                      "metadata.yaml", f"{build}/metadata_config.tex", f"{build}/main.xmpdata",
+                      f"{build}/abstract.tex"], None),
+        ("verify", [py, gen, "-d", root, "--verify"], None),
+        ("pandoc-cold", [py, gen, "-d", root, "build"], "pandoc"),
+        ("pandoc-noop", [py, gen, "-d", root, "build"], "pandoc"),
+        ("pandoc-edit", [py, gen, "-d", root, "build"], "pandoc"),
+        ("bibliography", [py, os.path.join(ROOT, "bib_index.py"), "-d", root, "references.bib",
+                          f"{build}/references.bib"], None),
+        ("latex", [py, os.path.join(ROOT, "build_latex.py"), "main.tex", "build", "build/references.bib"],
+         "pdflatex"),
+    ]
+
+
+def bench_size(sections, keep=False):
+    """One full pass over the stages on a fresh tree; returns {stage: sample}."""
+    root = tempfile.mkdtemp(prefix=f"bench-{sections}-")
+    results = {}
+    try:
+        spec_file = make_tree(root, sections)
+        os.makedirs(os.path.join(root, "build"), exist_ok=True)
+        failed = None
+        for name, cmd, tool in stages(root, spec_file):
+            if failed:
+                results[name] = {"skipped": f"{failed} failed"}
+                continue
+            if tool and shutil.which(tool) is None:
+                results[name] = {"skipped": f"{tool} not installed"}
+                continue
+            if name == "pandoc-edit":
+                edit_one_section(root)
+            ok, seconds, rss = run_stage(cmd, root)
+            results[name] = {"seconds": seconds, "max_rss_kb": rss, "ok": ok}
+            if not ok:
+                failed = name
+        passes = os.path.join(root, "build", "latex_passes.json")
+        if "seconds" in results.get("latex", {}) and os.path.exists(passes):
+            with open(passes, "r", encoding="utf-8") as f:
+                ran = [p for p in json.load(f)["passes"] if p["ran"]]
+            for n, entry in enumerate(ran, 1):
+                results[f"latex/{n}-{entry['step']}"] = {"seconds": entry["seconds"], "ok": True}
+    finally:
+        if keep:
+            print(f"  kept {root}", file=sys.stderr)
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def aggregate(samples):
+    """Combine repeated samples of one stage."""
+    timed = [s for s in samples if "seconds" in s]
+    if not timed:
+        return {"skipped": samples[0].get("skipped", "no samples")}
+    seconds = [s["seconds"] for s in timed]
+    result = {
+        "median": statistics.median(seconds),
+        "min": min(seconds),
+        "max": max(seconds),
+        "samples": seconds,
+        "ok": all(s["ok"] for s in timed),
+    }
+    if any("max_rss_kb" in s for s in timed):
+        result["max_rss_kb"] = max(s.get("max_rss_kb", 0) for s in timed)
+    return result
+
+
+def run(sizes, repeat, output, keep):
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "tools": {t: tool_version(t) for t in ("pandoc", "pdflatex", "biber")},
+        "repeat": repeat,
+        "startup": startup_times(max(repeat, 5)),
+        "sizes": {},
+    }
+    for sections in sizes:
+        print(f"{Colors.OKBLUE}→{Colors.ENDC} {sections} sections", file=sys.stderr)
+        samples = {}
+        for _ in range(repeat):
+            for stage, sample in bench_size(sections, keep).items():
+                samples.setdefault(stage, []).append(sample)
+        report["sizes"][str(sections)] = {stage: aggregate(s) for stage, s in samples.items()}
+        print_size(report["sizes"][str(sections)])
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"✓ Generated: {output}", file=sys.stderr)
+
+
+def print_size(stages):
+    for stage, result in stages.items():
+        if "skipped" in result:
+            print(f"    {stage:<22} {'-':>9}  ({result['skipped']})")
+            continue
+        rss = f"{result['max_rss_kb'] / 1024:7.1f} MB" if "max_rss_kb" in result else ""
+        mark = "" if result["ok"] else f"  {Colors.FAIL}✗ failed{Colors.ENDC}"
+        print(f"    {stage:<22} {result['median']:8.3f}s  {rss}{mark}")
+
+
+def compare(old_file, new_file, threshold):
+    """Print stage medians of two reports; returns the number of regressions."""
+    with open(old_file, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_file, "r", encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    groups = [(f"{size} sections", stages, old["sizes"].get(size, {}))
+              for size, stages in new["sizes"].items()]
+    if "startup" in new:
+        groups.insert(0, ("startup (import time)", new["startup"], old.get("startup", {})))
+    regressions = 0
+    for title, stages, old_stages in groups:
+        print(f"\n  {title}")
+        for stage, result in stages.items():
+            before = old_stages.get(stage, {})
+            if "median" not in result or "median" not in before:
+                continue
+            ratio = result["median"] / before["median"] if before["median"] else float("inf")
+            color = Colors.ENDC
+            if ratio > 1 + threshold:
+                color = Colors.FAIL
+                regressions += 1
+            elif ratio < 1 - threshold:
+                color = Colors.OKGREEN
+            print(f"    {stage:<22} {before['median']:8.3f}s -> {result['median']:8.3f}s  "
+                  f"{color}{ratio:5.2f}x{Colors.ENDC}")
+    if regressions:
+        print(f"\n{Colors.FAIL}✗{Colors.ENDC} {regressions} stages slower by more than {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thesis build pipeline benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Benchmark the pipeline on synthetic trees")
+    p.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                   help=f"Section counts (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per size (default: 3)")
+    p.add_argument("-o", "--output", help="Result file (default: benchmarks/<commit>.json)")
+    p.add_argument("--keep", action="store_true", help="Keep the generated trees")
+
+    p = sub.add_parser("compare", help="Compare two result files")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="Relative slowdown counted as a regression (default: 0.10)")
+
+    p = sub.add_parser("startup", help="Check import times and deferred imports of the build scripts")
+    p.add_argument("--repeat", type=int, default=5, help="Imports per script (default: 5)")
+    p.add_argument("--max-ms", type=float, default=DEFAULT_MAX_IMPORT_MS,
+                   help=f"Import time limit per script (default: {DEFAULT_MAX_IMPORT_MS})")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args.sizes, args.repeat, args.output, args.keep)
+        return 0
+    if args.command == "startup":
+        return 1 if startup(args.repeat, args.max_ms) else 0
+    return 1 if compare(args.old, args.new, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for extract_metadata.latex_escape.
+
+The escaper is timed against the original chained str.replace()
+implementation on short titles, multi-kilobyte abstracts and megabyte-sized
+generated tables. The equivalence check on randomized inputs lives in
+test_extract_metadata.py.
+
+Usage:
+  python3 bench_latex_escape.py
+"""
+
+import sys
+import timeit
+
+from extract_metadata import latex_escape
+
+
+def reference_latex_escape(s):
+    """The original ten-step str.replace() escaper, kept as the oracle."""
+    if s is None:
+        return ""
+    return (
+        s.replace("\\", r"\textbackslash{}")
+        .replace("&", r"\&")
+        .replace("%", r"\%")
+        .replace("$", r"\$")
+        .replace("#", r"\#")
+        .replace("_", r"\_")
+        .replace("{", r"\{")
+        .replace("}", r"\}")
+        .replace("~", r"\textasciitilde{}")
+        .replace("^", r"\textasciicircum{}")
+    )
+
+
+def workloads():
+    title = "Connection Migration & Multipath Communication in QUIC (RFC_9000)"
+    with open("metadata.yaml", "r", encoding="utf-8") as f:
+        abstract = f.read() * 2
+    row = "run_{i} & 10.0.3.2:4433 & 12.5% & $\\sim$42 ms & #{i} \\\\\n"
+    table = "".join(row.format(i=i) for i in range(20000))
+    captions = abstract * 250
+    return [
+        ("title", title, 20000),
+        (f"abstract ({len(abstract) // 1024} KB)", abstract, 500),
+        (f"captions ({len(captions) // (1024 * 1024)} MB)", captions, 5),
+        (f"dense table ({len(table) // (1024 * 1024)} MB)", table, 5),
+    ]
+
+
+def bench():
+    print(f"{'workload':<22} {'reference':>12} {'latex_escape':>14} {'speedup':>8}")
+    for name, text, number in workloads():
+        ref = min(timeit.repeat(lambda: reference_latex_escape(text), number=number, repeat=3))
+        new = min(timeit.repeat(lambda: latex_escape(text), number=number, repeat=3))
+        print(f"{name:<22} {ref / number * 1e6:>10.1f}us {new / number * 1e6:>12.1f}us {ref / new:>7.2f}x")
+
+
+def main():
+    bench()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
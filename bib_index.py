@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Bibliography index and pruned references for the thesis build.
+
+references.bib is parsed once into a key -> byte range index, persisted in
+build/bib_index.json and reused while the file's hash is unchanged. The
+chapter Markdown (the sections listed in each config.yaml) and main.tex are
+scanned for citations: pandoc [@key], @key and @{key} forms as well as raw
+\\cite-family commands. Per-file results are cached by content hash, and files
+that need a rescan are scanned in parallel when there are many of them.
+
+The output is a .bib with only the cited entries (plus everything they
+crossref, and all @string/@preamble blocks), copied byte for byte in source
+order, so biber only processes what the thesis uses. Citations of keys that
+are not in the bibliography are reported with file and line before LaTeX
+runs. A \\nocite{*} in main.tex disables pruning.
+
+Usage:
+  python3 bib_index.py references.bib build/references.bib [--strict]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+import build_trace
+from build_io import write_atomic, write_if_changed
+from gen_thesis import BUILD_DIR, CHAPTER_ORDER, ChapterIndex, Colors, sha256_bytes
+
+INDEX_VERSION = 1
+
+# Uncached files needed before the scan is spread over worker processes
+PARALLEL_THRESHOLD = 64
+
+# Pandoc citation keys: start with a letter, digit or _, internal punctuation allowed
+PANDOC_CITE = re.compile(
+    r"(?<![\w@\\])@(?:\{([^{}\s]+)\}|([\w](?:[\w:.#$%&\-+?<>~/]*[\w])?))"
+)
+LATEX_CITE = re.compile(r"\\[A-Za-z]*cite[A-Za-z]*\*?(?:\[[^\]]*\]){0,2}\{([^}]*)\}")
+FENCED_CODE = re.compile(r"^(```|~~~).*?^\1", re.S | re.M)
+INLINE_CODE = re.compile(r"`[^`\n]*`")
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+CROSSREF = re.compile(rb"\b(?:crossref|xref|xdata)\s*=\s*[{\"]([^}\"]*)[}\"]", re.I)
+
+# Entry types that are not references and are always kept
+SPECIAL_TYPES = {"string", "preamble"}
+
+
+def parse_bib(data):
+    """Index a .bib file given as bytes.
+
+    Returns (entries, specials): entries maps key -> [start, end] byte offsets
+    of the whole entry; specials lists the ranges of @string/@preamble blocks.
+    @comment blocks and text outside entries are ignored.
+    """
+    entries = {}
+    specials = []
+    pos = 0
+    n = len(data)
+    while True:
+        start = data.find(b"@", pos)
+        if start < 0:
+            break
+        open_pos = start + 1
+        while open_pos < n and data[open_pos] not in b"{(":
+            open_pos += 1
+        if open_pos >= n:
+            break
+        entry_type = data[start + 1:open_pos].strip().lower().decode("ascii", "replace")
+        # Find the matching close delimiter; braces nest inside either form
+        parens = data[open_pos] == ord("(")
+        depth = 0
+        end = open_pos + 1
+        while end < n:
+            c = data[end]
+            if c == ord("{"):
+                depth += 1
+            elif c == ord("}"):
+                if depth == 0 and not parens:
+                    break
+                depth -= 1
+            elif c == ord(")") and parens and depth == 0:
+                break
+            end += 1
+        end += 1
+        if entry_type in SPECIAL_TYPES:
+            specials.append([start, end])
+        elif entry_type != "comment":
+            key = data[open_pos + 1:end].split(b",", 1)[0].strip().decode("utf-8")
+            if key:
+                entries[key] = [start, end]
+        pos = end
+    return entries, specials
+
+
+def load_index(bib_file, index_file):
+    """Return (data, entries, specials), reusing the persisted index when fresh."""
+    data = Path(bib_file).read_bytes()
+    digest = sha256_bytes(data)
+    try:
+        cached = json.loads(Path(index_file).read_text(encoding="utf-8"))
+        if cached.get("version") == INDEX_VERSION and cached.get("source") == digest:
+            return data, cached["entries"], cached["specials"]
+    except (FileNotFoundError, ValueError):
+        pass
+    entries, specials = parse_bib(data)
+    Path(index_file).parent.mkdir(parents=True, exist_ok=True)
+    write_atomic(Path(index_file), json.dumps(
+        {"version": INDEX_VERSION, "source": digest, "entries": entries, "specials": specials}) + "\n")
+    return data, entries, specials
+
+
+def scan_text(text):
+    """Citations in Markdown/LaTeX text as [(key, line)], skipping code and comments."""
+    def blank(match):
+        return "\n" * match.group(0).count("\n")
+
+    text = FENCED_CODE.sub(blank, text)
+    text = HTML_COMMENT.sub(blank, text)
+    text = INLINE_CODE.sub("", text)
+    found = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        for m in PANDOC_CITE.finditer(line):
+            found.append((m.group(1) or m.group(2), lineno))
+        for m in LATEX_CITE.finditer(line):
+            found += [(key.strip(), lineno) for key in m.group(1).split(",") if key.strip()]
+    return found
+
+
+def scan_file(path):
+    return path, scan_text(Path(path).read_text(encoding="utf-8"))
+
+
+def source_files(root):
+    """(path, content hash) of main.tex and every configured section file."""
+    root = Path(root)
+    index = ChapterIndex(root / "chapters", root / BUILD_DIR / "chapter_index.json").load()
+    if index.refresh():
+        index.save()
+    files = []
+    main_tex = root / "main.tex"
+    if main_tex.exists():
+        files.append((str(main_tex), sha256_bytes(main_tex.read_bytes())))
+    chapters = [c for c in CHAPTER_ORDER if index.get(c)]
+    chapters += [c for c in index.chapters if c not in CHAPTER_ORDER and index.get(c)]
+    for chapter in chapters:
+        for section, digest in index.section_hashes(chapter).items():
+            files.append((str(root / "chapters" / chapter / f"{section}.md"), digest))
+    return files
+
+
+def scan_citations(files, cache_file, jobs=None):
+    """Citations of every file as {path: [(key, line)]}, rescanning only changed files."""
+    try:
+        cache = json.loads(Path(cache_file).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    results = {}
+    todo = []
+    for path, digest in files:
+        if digest in cache:
+            results[path] = [tuple(c) for c in cache[digest]]
+        else:
+            todo.append((path, digest))
+
+    if len(todo) >= PARALLEL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            scanned = dict(pool.map(scan_file, [p for p, _ in todo], chunksize=16))
+    else:
+        scanned = dict(scan_file(p) for p, _ in todo)
+
+    new_cache = {}
+    for path, digest in files:
+        if path in scanned:
+            results[path] = scanned[path]
+        new_cache[digest] = results[path]
+    if todo or len(new_cache) != len(cache):
+        Path(cache_file).parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(Path(cache_file), json.dumps(new_cache) + "\n")
+    return results
+
+
+def prune_bibliography(bib_file, output, root=".", strict=False, jobs=None):
+    """Write the cited subset of bib_file to output; returns False on errors.
+
+    Undefined keys are reported as warnings (errors with strict=True).
+    """
+    build_dir = Path(root) / BUILD_DIR
+    try:
+        with build_trace.span("bibliography/index"):
+            data, entries, specials = load_index(bib_file, build_dir / "bib_index.json")
+    except OSError as e:
+        print(f"Error reading {bib_file}: {e}", file=sys.stderr)
+        return False
+    with build_trace.span("bibliography/scan"):
+        citations = scan_citations(source_files(root), build_dir / "citations.json", jobs)
+
+    cited = {}
+    for path, found in citations.items():
+        for key, line in found:
+            cited.setdefault(key, []).append((path, line))
+
+    keep_all = "*" in cited
+    undefined = {k: v for k, v in cited.items() if k != "*" and k not in entries}
+    for key, places in sorted(undefined.items()):
+        path, line = places[0]
+        more = f" (+{len(places) - 1} more)" if len(places) > 1 else ""
+        print(f"{Colors.WARNING}⚠{Colors.ENDC}  Undefined citation '{key}' at "
+              f"{os.path.relpath(path, root)}:{line}{more}", file=sys.stderr)
+
+    # Entries referenced through crossref/xref/xdata are needed too
+    if keep_all:
+        keep = set(entries)
+    else:
+        keep = set()
+        stack = [k for k in cited if k in entries]
+        while stack:
+            key = stack.pop()
+            if key in keep:
+                continue
+            keep.add(key)
+            start, end = entries[key]
+            for match in CROSSREF.finditer(data[start:end]):
+                for parent in match.group(1).decode("utf-8").split(","):
+                    if parent.strip() in entries:
+                        stack.append(parent.strip())
+
+    ranges = sorted(specials + [entries[k] for k in keep])
+    content = b"% Auto-generated by bib_index.py from " + os.path.basename(bib_file).encode() + b" - do not edit\n\n"
+    content += b"\n\n".join(data[start:end] for start, end in ranges) + b"\n"
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    if write_if_changed(output, content):
+        print(f"✓ Generated: {output} ({len(keep)}/{len(entries)} entries)", file=sys.stderr)
+    else:
+        print(f"✓ Unchanged: {output} ({len(keep)}/{len(entries)} entries)", file=sys.stderr)
+    return not (strict and undefined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune a .bib file to the cited entries")
+    parser.add_argument("bib", help="Full bibliography (e.g. references.bib)")
+    parser.add_argument("output", help="Pruned bibliography (e.g. build/references.bib)")
+    parser.add_argument("-d", "--directory", default=".", help="Thesis root (default: current)")
+    parser.add_argument("--strict", action="store_true", help="Fail on undefined citations")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Scanner processes (default: CPU count)")
+    args = parser.parse_args()
+    with build_trace.span("bibliography"):
+        ok = prune_bibliography(args.bib, args.output, args.directory, args.strict, args.jobs)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
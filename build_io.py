@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Atomic writes for the files the build generates.
+
+Every output is written to a temporary file next to it and renamed into place,
+so pdflatex, make and the watcher never see a half-written file, and an
+interrupted build leaves the previous version intact. write_if_changed() also
+leaves files that already hold the content alone, keeping their mtimes (and
+everything downstream of them) stable across rebuilds.
+
+The temporary files are named .<name>.<pid>.tmp; they are created with open(),
+so outputs get the usual umask-derived mode.
+"""
+
+import os
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_output(path):
+    """Open a temporary file for binary writing and rename it over path on success."""
+    directory, name = os.path.split(os.fspath(path))
+    tmp = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_atomic(path, content):
+    """Write content (str as UTF-8, or bytes) to path via a temporary file and rename."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with atomic_output(path) as f:
+        f.write(content)
+
+
+def write_if_changed(path, content):
+    """Atomically write content to path unless it already holds exactly that.
+
+    Returns True when the file was (re)written.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    write_atomic(path, content)
+    return True
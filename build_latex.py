@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Compile the thesis to PDF with only the pdflatex/biber passes that are needed.
+
+The fixed pdflatex -> biber -> pdflatex -> pdflatex sequence is replaced by a
+scheduler that hashes main.aux, main.bcf, main.toc and main.bbl between passes:
+- biber runs only when main.bcf or the bibliography changed (or main.bbl is missing)
+- pdflatex reruns only until main.aux and main.toc reach a fixed point
+  (or main.bbl changed after biber)
+
+Every decision is written to build/latex_passes.json, including the passes that
+were skipped and why.
+
+Usage:
+  python3 build_latex.py main.tex build [references.bib ...]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+import build_trace
+from build_io import write_atomic
+
+PDFLATEX_ARGS = ["-halt-on-error", "-interaction=nonstopmode"]
+
+# Safety limit for documents whose references never settle
+MAX_LATEX_PASSES = 5
+
+
+def file_hash(path):
+    """Return the SHA-256 of a file, or None when it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def snapshot(build_dir, jobname, exts):
+    """Hash the given auxiliary files of a LaTeX job."""
+    return {ext: file_hash(os.path.join(build_dir, f"{jobname}.{ext}")) for ext in exts}
+
+
+def load_state(state_file):
+    """Load the scheduler state left by the previous build."""
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def biber_inputs(build_dir, jobname, bib_files):
+    """Hash everything biber reads: the .bcf control file and the .bib sources."""
+    h = hashlib.sha256()
+    for path in [os.path.join(build_dir, f"{jobname}.bcf"), *bib_files]:
+        h.update(path.encode("utf-8"))
+        h.update((file_hash(path) or "-").encode("ascii"))
+    return h.hexdigest()
+
+
+def run_step(cmd, log):
+    """Run one pass, timing it and recording it in the pass log."""
+    start = time.perf_counter()
+    result = build_trace.run(cmd, name=log[-1]["step"])
+    log[-1]["seconds"] = round(time.perf_counter() - start, 3)
+    return result.returncode == 0
+
+
+def compile_latex(main_tex, build_dir, bib_files=(), from_biber=False):
+    """Compile main_tex into build_dir, skipping redundant pdflatex/biber passes.
+
+    With from_biber=True the initial pdflatex pass is skipped when a .bcf from a
+    previous run exists, for edits that only touched the bibliography; biber
+    then still runs only if its inputs changed, and pdflatex only if main.bbl
+    changed.
+    """
+    jobname = os.path.splitext(os.path.basename(main_tex))[0]
+    state_file = os.path.join(build_dir, "latex_passes.json")
+    state = load_state(state_file)
+    pdflatex = ["pdflatex", *PDFLATEX_ARGS, f"-output-directory={build_dir}", main_tex]
+    biber = ["biber", os.path.join(build_dir, jobname)]
+    bcf = os.path.join(build_dir, f"{jobname}.bcf")
+    bbl = os.path.join(build_dir, f"{jobname}.bbl")
+
+    log = []
+
+    def step(name, ran, reason):
+        log.append({"step": name, "ran": ran, "reason": reason})
+        mark = "✓" if ran else "-"
+        print(f"  {mark} {name}: {reason}", file=sys.stderr)
+
+    def finish(ok):
+        new_state = {"biber_inputs": state.get("biber_inputs"), "passes": log}
+        write_atomic(state_file, json.dumps(new_state, indent=2) + "\n")
+        return ok
+
+    # Pass 1: pdflatex writes the .aux/.bcf/.toc for the current text
+    before = snapshot(build_dir, jobname, ("aux", "toc"))
+    latex_passes = 0
+    if from_biber and os.path.exists(bcf):
+        step("pdflatex", False, "bibliography-only change, reusing existing .bcf")
+    else:
+        step("pdflatex", True, "initial pass")
+        if not run_step(pdflatex, log):
+            return finish(False)
+        latex_passes += 1
+    after = snapshot(build_dir, jobname, ("aux", "toc"))
+
+    # Biber: only when its inputs differ from the last successful run
+    bbl_before = file_hash(bbl)
+    inputs = biber_inputs(build_dir, jobname, bib_files)
+    if not os.path.exists(bcf):
+        step("biber", False, f"no {jobname}.bcf (biblatex not used)")
+    elif bbl_before is None:
+        step("biber", True, f"no {jobname}.bbl yet")
+    elif inputs != state.get("biber_inputs"):
+        step("biber", True, f"{jobname}.bcf or bibliography changed")
+    else:
+        step("biber", False, f"{jobname}.bcf and bibliography unchanged")
+
+    if log[-1]["ran"]:
+        if not run_step(biber, log):
+            return finish(False)
+        state["biber_inputs"] = inputs
+    bbl_changed = file_hash(bbl) != bbl_before
+
+    # Rerun pdflatex until .aux/.toc stop changing
+    while True:
+        if bbl_changed:
+            reason = f"{jobname}.bbl changed"
+        elif latex_passes == 0:
+            # Only after a bibliography-only change: main.bbl is what the
+            # reused .aux/.toc depend on, and it did not change
+            step("pdflatex", False, f"{jobname}.bbl unchanged")
+            break
+        elif after != before:
+            changed = [ext for ext in after if after[ext] != before[ext]]
+            reason = f"{', '.join(f'{jobname}.{ext}' for ext in changed)} changed"
+        else:
+            step("pdflatex", False, "aux/toc reached a fixed point")
+            break
+
+        if latex_passes >= MAX_LATEX_PASSES:
+            step("pdflatex", False, f"stopped after {MAX_LATEX_PASSES} passes without a fixed point")
+            break
+
+        step("pdflatex", True, reason)
+        before = after
+        if not run_step(pdflatex, log):
+            return finish(False)
+        latex_passes += 1
+        bbl_changed = False
+        after = snapshot(build_dir, jobname, ("aux", "toc"))
+
+    ran = sum(1 for entry in log if entry["ran"])
+    print(f"✓ LaTeX done: {ran} passes run, {len(log) - ran} skipped", file=sys.stderr)
+    return finish(True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(
+            f"Usage: {sys.argv[0]} <main.tex> <build_dir> [references.bib ...]",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    with build_trace.span("latex"):
+        ok = compile_latex(sys.argv[1], sys.argv[2], sys.argv[3:])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Build-phase profiling for the thesis pipeline.
+
+gen_thesis.py, extract_metadata.py, bib_index.py and build_latex.py wrap
+their stages in span() and start pandoc, pdflatex and biber through run().
+While tracing is off both cost next to nothing; once enabled, every span and
+subprocess is recorded with:
+
+- wall time, and CPU time (the calling thread's for stages, user + system
+  of the child for subprocesses)
+- peak RSS (the process high-water mark for stages, the child's own for
+  subprocesses)
+- bytes read and written (/proc/<pid>/io rchar/wchar, i.e. including reads
+  served from the page cache)
+
+The events are written as Chrome trace JSON (chrome://tracing, ui.perfetto.dev)
+and summarized per span name on stderr.
+
+Tracing is enabled by `gen_thesis.py pdf --trace` (make trace), or for any
+of the scripts by setting THESIS_TRACE to the output file:
+
+  THESIS_TRACE=build/trace.json python3 extract_metadata.py ...
+
+Usage:
+  python3 build_trace.py summary build/trace.json
+"""
+
+import atexit
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Default output; the build scripts import this module, so it imports none of them
+TRACE_FILE = os.path.join("build", "trace.json")
+
+_events = []
+_enabled = False
+_origin_ns = time.perf_counter_ns()
+
+
+def enable(path=None):
+    """Start recording; with a path, the trace is also saved at exit."""
+    global _enabled
+    _enabled = True
+    if path:
+        atexit.register(save, path)
+
+
+def enabled():
+    return _enabled
+
+
+def read_io(pid="self"):
+    """(rchar, wchar) of a process, or (0, 0) where /proc/<pid>/io is not readable."""
+    try:
+        with open(f"/proc/{pid}/io", "r", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def _record(name, cat, start_ns, end_ns, args):
+    _events.append({
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": (start_ns - _origin_ns) / 1000,
+        "dur": (end_ns - start_ns) / 1000,
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+        "args": args,
+    })
+
+
+@contextmanager
+def span(name, cat="stage", **fields):
+    """Time a block of work as one trace event."""
+    if not _enabled:
+        yield
+        return
+    read0, written0 = read_io()
+    cpu0 = time.thread_time_ns()
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        read1, written1 = read_io()
+        _record(name, cat, start, end, {
+            "cpu_ms": round((time.thread_time_ns() - cpu0) / 1e6, 3),
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "read_bytes": read1 - read0,
+            "write_bytes": written1 - written0,
+            **fields,
+        })
+
+
+def run(cmd, name=None, input=None, capture_output=False, text=False, **kwargs):
+    """subprocess.run() that records the child as a trace event.
+
+    The child is reaped with os.wait4 (after reading its /proc/<pid>/io while
+    it is a zombie), so CPU time, peak RSS and I/O are the child's own.
+    """
+    import subprocess
+    if not _enabled:
+        return subprocess.run(cmd, input=input, capture_output=capture_output, text=text, **kwargs)
+
+    if capture_output:
+        kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    start = time.perf_counter_ns()
+    proc = subprocess.Popen(cmd, text=text, **kwargs)
+
+    # Same job as communicate(), which would reap the child itself
+    output = {}
+    threads = []
+    for stream in ("stdout", "stderr"):
+        pipe = getattr(proc, stream)
+        if pipe is not None:
+            threads.append(threading.Thread(target=lambda s=stream, p=pipe: output.update({s: p.read()})))
+    if proc.stdin is not None:
+        def feed():
+            try:
+                proc.stdin.write(input)
+            except BrokenPipeError:
+                pass
+            proc.stdin.close()
+        threads.append(threading.Thread(target=feed))
+    for thread in threads:
+        thread.start()
+
+    os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+    read_bytes, write_bytes = read_io(proc.pid)
+    _, status, usage = os.wait4(proc.pid, 0)
+    end = time.perf_counter_ns()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    for thread in threads:
+        thread.join()
+    for pipe in (proc.stdout, proc.stderr):
+        if pipe is not None:
+            pipe.close()
+
+    _record(name or os.path.basename(cmd[0]), "subprocess", start, end, {
+        "cpu_ms": round((usage.ru_utime + usage.ru_stime) * 1000, 3),
+        "max_rss_kb": usage.ru_maxrss,
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+        "returncode": proc.returncode,
+    })
+    return subprocess.CompletedProcess(cmd, proc.returncode, output.get("stdout"), output.get("stderr"))
+
+
+def summarize(events):
+    """Totals per (category, name): count, wall, CPU, peak RSS and I/O."""
+    rows = {}
+    for event in events:
+        args = event.get("args", {})
+        row = rows.setdefault((event["cat"], event["name"]),
+                              {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "max_rss_kb": 0,
+                               "read_bytes": 0, "write_bytes": 0})
+        row["count"] += 1
+        row["wall_ms"] += event["dur"] / 1000
+        row["cpu_ms"] += args.get("cpu_ms", 0)
+        row["max_rss_kb"] = max(row["max_rss_kb"], args.get("max_rss_kb", 0))
+        row["read_bytes"] += args.get("read_bytes", 0)
+        row["write_bytes"] += args.get("write_bytes", 0)
+    return rows
+
+
+def print_summary(events, file=sys.stderr):
+    rows = summarize(events)
+    print(f"\n{'span':<32} {'n':>4} {'wall':>9} {'cpu':>9} {'rss':>9} "
+          f"{'read':>9} {'written':>9}", file=file)
+    for (cat, name), row in sorted(rows.items(), key=lambda r: -r[1]["wall_ms"]):
+        label = name if cat == "stage" else f"  {name} ({cat})"
+        print(f"{label:<32} {row['count']:>4} {row['wall_ms'] / 1000:>8.3f}s "
+              f"{row['cpu_ms'] / 1000:>8.3f}s {row['max_rss_kb'] / 1024:>7.1f}MB "
+              f"{row['read_bytes'] / 1e6:>7.1f}MB {row['write_bytes'] / 1e6:>7.1f}MB", file=file)
+
+
+def save(path=None):
+    """Write the recorded events as Chrome trace JSON and print the summary."""
+    path = path or TRACE_FILE
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": _events, "displayTimeUnit": "ms"}, f)
+        f.write("\n")
+    print_summary(_events)
+    print(f"✓ Generated: {path}", file=sys.stderr)
+    return path
+
+
+if os.environ.get("THESIS_TRACE"):
+    enable(os.environ["THESIS_TRACE"])
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build trace tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="Print the per-span summary of a trace file")
+    p.add_argument("trace", nargs="?", default=TRACE_FILE)
+    args = parser.parse_args()
+    with open(args.trace, "r", encoding="utf-8") as f:
+        print_summary(json.load(f)["traceEvents"], file=sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Stub pandoc, pdflatex and biber for the build tests."""
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+# Every stub appends "<tool> <detail>" to $STUB_TOOLS_LOG
+LOG = """
+    import os, sys
+    def log(detail):
+        with open(os.environ["STUB_TOOLS_LOG"], "a", encoding="utf-8") as f:
+            f.write(f"{os.path.basename(sys.argv[0])} {detail}\\n")
+"""
+
+# pandoc stub: '#' headings become \\section{}s; logs the first input line
+PANDOC = """
+    import re
+    if sys.argv[1:] == ["--version"]:
+        print("pandoc 3.1 (stub)")
+        sys.exit(0)
+    text = sys.stdin.read()
+    log(text.split("\\n", 1)[0])
+    latex = re.sub(r"(?m)^#+ (.*)$", r"\\\\section{\\1}", text)
+    if "-o" in sys.argv:
+        open(sys.argv[sys.argv.index("-o") + 1], "w", encoding="utf-8").write(latex)
+    else:
+        sys.stdout.write(latex)
+"""
+
+# pdflatex stub: main.aux records main.bbl, so it settles one pass after main.bbl changes
+PDFLATEX = """
+    out = [a.split("=", 1)[1] for a in sys.argv if a.startswith("-output-directory=")][0]
+    job = os.path.join(out, os.path.splitext(os.path.basename(sys.argv[-1]))[0])
+    read = lambda ext: open(f"{job}.{ext}").read() if os.path.exists(f"{job}.{ext}") else ""
+    open(f"{job}.aux", "w").write("aux:" + read("bbl"))
+    open(f"{job}.toc", "w").write("toc")
+    open(f"{job}.bcf", "w").write("bcf")
+    open(f"{job}.pdf", "w").write("%PDF")
+    log(os.path.basename(job))
+"""
+
+# biber stub: main.bbl is the content of the pruned references.bib
+BIBER = """
+    bib = os.path.join(os.path.dirname(sys.argv[1]), "references.bib")
+    open(sys.argv[1] + ".bbl", "w").write(open(bib).read() if os.path.exists(bib) else "")
+    log(os.path.basename(sys.argv[1]))
+"""
+
+
+class ToolLog:
+    """Calls made to the stub tools"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def take(self):
+        """[(tool, detail)] logged since the last take()"""
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        self.path.unlink()
+        return [tuple(line.split(" ", 1)) for line in lines]
+
+
+@pytest.fixture
+def stub_tools(tmp_path, monkeypatch):
+    """Put stub pandoc, pdflatex and biber first on PATH; returns their ToolLog"""
+    bin_dir = tmp_path / "stub-bin"
+    bin_dir.mkdir()
+    for name, body in (("pandoc", PANDOC), ("pdflatex", PDFLATEX), ("biber", BIBER)):
+        tool = bin_dir / name
+        tool.write_text(f"#!{sys.executable}\n" + textwrap.dedent(LOG) + textwrap.dedent(body))
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("STUB_TOOLS_LOG", str(tmp_path / "stub-tools.log"))
+    return ToolLog(tmp_path / "stub-tools.log")
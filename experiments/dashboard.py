@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Live RTT and path dashboard for a running client.
+
+The client's stdout (a pipe, a growing client.log, or stdin) is read in chunks
+on an asyncio event loop and parsed with echo_log.iter_records. All state is
+held in fixed-size structures, so memory stays constant however long the run:
+
+- the RTT and recv_ms of the last RING_SIZE echoes in two preallocated arrays;
+  percentiles, echo rate and the longest silence between echoes are computed
+  over the last --window-ms of client time
+- the current remote= address and the last path switches
+- gaps in seq (first missing seq and length) and the echoes that arrive late
+
+Nothing is computed per line beyond parsing and a few stores. The window is
+evaluated once per refresh (default 1 s) and the result is shared by the
+terminal view and the HTTP view, so a browser polling the page costs no extra
+work. At --interval-ms 1 (about 2000 lines per second) this stays below one
+percent of a core.
+
+The terminal view prints one status line per refresh plus a line for every
+path switch and seq gap. The HTTP view (--port) serves a small page and
+/stats.json on 127.0.0.1.
+
+mn_migration.py --dashboard starts the client itself and serves the HTTP view
+while the Mininet CLI is open; the terminal view can follow its client.log
+from a second terminal.
+
+Usage:
+  python3 dashboard.py follow runs/live/client.log --port 8765
+  quic_client ... | python3 dashboard.py follow -
+  python3 dashboard.py summary runs/r1/client.log
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import deque
+
+from echo_log import iter_records, open_log
+
+# Echoes kept for the rolling window (about 16 s at 1 ms intervals)
+RING_SIZE = 1 << 14
+
+DEFAULT_WINDOW_MS = 5000
+DEFAULT_PORT = 8765
+
+# Path switches and seq gaps remembered for display
+EVENT_HISTORY = 32
+
+# Refreshes kept for the HTTP plot (5 minutes at the default period)
+HISTORY = 300
+
+PERCENTILES = (50, 90, 99)
+
+# Switch and gap lines printed per terminal refresh
+EVENTS_PER_REFRESH = 5
+
+# Line prefixes of TX events (first seven bytes)
+TX_PREFIXES = (b"QUIC_TX", b"TCP_TX ")
+
+# Bytes read from the client per chunk, and the longest line kept across chunks
+CHUNK = 1 << 16
+LINE_LIMIT = 1 << 16
+
+# Seconds between polls of a followed file at EOF
+FOLLOW_POLL = 0.1
+
+
+class LiveStats:
+    """Constant-memory rolling state of one client's output."""
+
+    def __init__(self, window_ms=DEFAULT_WINDOW_MS, ring_size=RING_SIZE):
+        self.window_ms = window_ms
+        self.ring_size = ring_size
+        self.rtt = array("I", [0]) * ring_size
+        self.recv = array("Q", [0]) * ring_size
+        self.head = 0
+        self.filled = 0
+
+        self.echoes = 0
+        self.sent = 0
+        self.last_tx_seq = None
+        self.max_seq = None
+        self.missing = 0
+        self.late = 0
+        self.gaps = deque(maxlen=EVENT_HISTORY)
+        self.gap_count = 0
+        self.remote = None
+        self.switched_ms = None
+        self.switches = deque(maxlen=EVENT_HISTORY)
+        self.switch_count = 0
+        self.stats_rtt_ms = None
+        self.now_ms = 0
+        self.first_ms = None
+        self.last_echo = None
+        self.history = deque(maxlen=HISTORY)
+
+    def feed(self, lines):
+        """Update the state with a batch of raw output lines.
+
+        Only the last TX line of a batch is parsed; the others are just counted.
+        """
+        echoes = self.echoes
+        other = []
+        last_tx = None
+        for line in lines:
+            if line[:7] in TX_PREFIXES:
+                self.sent += 1
+                last_tx = line
+            else:
+                other.append(line)
+        for record in iter_records(other if last_tx is None else other + [last_tx]):
+            kind = record[0]
+            if kind == "echo":
+                _, seq, _, recv_ms, rtt, remote, _ = record
+                i = self.head
+                self.rtt[i] = rtt
+                self.recv[i] = recv_ms
+                self.head = (i + 1) % self.ring_size
+                self.filled = min(self.filled + 1, self.ring_size)
+                self.echoes += 1
+                if recv_ms > self.now_ms:
+                    self.now_ms = recv_ms
+                if self.first_ms is None:
+                    self.first_ms = recv_ms
+                if self.max_seq is None or seq == self.max_seq + 1:
+                    self.max_seq = seq
+                elif seq > self.max_seq:
+                    self.gaps.append((recv_ms, self.max_seq + 1, seq - self.max_seq - 1))
+                    self.gap_count += 1
+                    self.missing += seq - self.max_seq - 1
+                    self.max_seq = seq
+                else:
+                    self.late += 1
+                    self.missing -= 1
+                if remote != self.remote:
+                    if self.remote is not None:
+                        self.switches.append((recv_ms, self.remote, remote))
+                        self.switch_count += 1
+                    self.remote = remote
+                    self.switched_ms = recv_ms
+            elif kind == "tx":
+                self.last_tx_seq = record[1]
+                if record[2] > self.now_ms:
+                    self.now_ms = record[2]
+            else:
+                self.stats_rtt_ms = record[2]
+        if self.echoes != echoes:
+            self.last_echo = time.monotonic()
+
+    def snapshot(self, wall=None):
+        """Evaluate the rolling window; called once per refresh.
+
+        wall stamps the snapshot (default: now); replay.py passes record time.
+        """
+        cutoff = self.now_ms - self.window_ms
+        window = []
+        max_silence = 0
+        newer = self.now_ms
+        i = self.head
+        for _ in range(self.filled):
+            i = (i - 1) % self.ring_size
+            recv = self.recv[i]
+            if recv < cutoff:
+                break
+            window.append(self.rtt[i])
+            if newer - recv > max_silence:
+                max_silence = newer - recv
+            newer = recv
+        window.sort()
+        n = len(window)
+        percentiles = {f"p{q}": window[min(n - 1, n * q // 100)] if n else None for q in PERCENTILES}
+        in_flight = (self.last_tx_seq - self.max_seq
+                     if self.last_tx_seq is not None and self.max_seq is not None else None)
+        snap = {
+            "wall": time.time() if wall is None else wall,
+            "now_ms": self.now_ms,
+            "window_ms": self.window_ms,
+            "rate": n * 1000 / max(min(self.window_ms, self.now_ms - self.first_ms), 1) if n else 0.0,
+            **percentiles,
+            "max": window[-1] if n else None,
+            "max_silence_ms": max_silence if n else (self.now_ms - self.recv[self.head - 1]
+                                                     if self.filled else None),
+            "last_echo_s": round(time.monotonic() - self.last_echo, 3) if self.last_echo else None,
+            "remote": self.remote,
+            "on_path_ms": self.now_ms - self.switched_ms if self.switched_ms is not None else None,
+            "switches": [{"recv_ms": t, "from": a, "to": b} for t, a, b in self.switches],
+            "echoes": self.echoes,
+            "sent": self.sent,
+            "in_flight": in_flight,
+            "missing": self.missing,
+            "late": self.late,
+            "gaps": [{"recv_ms": t, "seq": s, "count": c} for t, s, c in self.gaps],
+            "stats_rtt_ms": self.stats_rtt_ms,
+        }
+        self.history.append((round(snap["wall"], 1), snap["rate"], snap["p50"], snap["p99"]))
+        return snap
+
+
+def status_line(snap):
+    """One-line terminal rendering of a snapshot."""
+    if snap["p50"] is None:
+        rtt = "no echoes in window"
+    else:
+        rtt = f"p50 {snap['p50']} p90 {snap['p90']} p99 {snap['p99']} max {snap['max']} ms"
+    age = f"{snap['last_echo_s']:.1f}s ago" if snap["last_echo_s"] is not None else "never"
+    return (f"  {time.strftime('%H:%M:%S', time.localtime(snap['wall']))} "
+            f"{snap['rate']:7.0f} echo/s  {rtt}  remote {snap['remote'] or '-'}  "
+            f"missing {snap['missing']}  in flight {snap['in_flight'] if snap['in_flight'] is not None else '-'}  "
+            f"last echo {age}")
+
+
+PAGE = b"""<!doctype html>
+<html><head><meta charset="utf-8"><title>quic echo live</title>
+<style>
+body { font: 14px monospace; margin: 1em 2em; }
+td { padding: 0 1em 0 0; } th { text-align: left; padding-right: 1em; }
+svg { border: 1px solid #ccc; } .p50 { stroke: #1f77b4; } .p99 { stroke: #d62728; }
+</style></head><body>
+<h3>RTT and path</h3>
+<table id="now"></table>
+<p><svg id="plot" width="800" height="200"></svg><br>
+<span class="p50">&#9472;</span> p50 <span class="p99">&#9472;</span> p99 (ms)</p>
+<h4>Path switches</h4><table id="switches"></table>
+<h4>Seq gaps</h4><table id="gaps"></table>
+<script>
+const rows = (el, items) => document.getElementById(el).innerHTML =
+  items.map(r => "<tr>" + r.map(c => "<td>" + (c ?? "-") + "</td>").join("") + "</tr>").join("");
+function line(points, key, ymax) {
+  const n = points.length;
+  return points.map((p, i) => p[key] === null ? "" :
+    (i * 800 / Math.max(n - 1, 1)).toFixed(1) + "," + (200 - p[key] * 190 / ymax).toFixed(1)).join(" ");
+}
+async function refresh() {
+  try {
+    const s = await (await fetch("stats.json")).json();
+    rows("now", [
+      ["echo/s", s.rate.toFixed(0), "window", s.window_ms + " ms"],
+      ["p50", s.p50, "p90", s.p90], ["p99", s.p99, "max", s.max],
+      ["longest silence", s.max_silence_ms + " ms", "last echo", s.last_echo_s + " s ago"],
+      ["remote", s.remote, "on path", s.on_path_ms + " ms"],
+      ["echoes", s.echoes, "sent", s.sent], ["missing", s.missing, "late", s.late],
+      ["in flight", s.in_flight, "quinn stats rtt", s.stats_rtt_ms]]);
+    rows("switches", s.switches.slice().reverse().map(x => [x.recv_ms, x.from + " &rarr; " + x.to]));
+    rows("gaps", s.gaps.slice().reverse().map(x => [x.recv_ms, "seq " + x.seq, x.count + " missing"]));
+    const ymax = Math.max(1, ...s.history.map(p => p[3] ?? 0)) * 1.1;
+    document.getElementById("plot").innerHTML =
+      '<polyline fill="none" class="p50" points="' + line(s.history, 2, ymax) + '"/>' +
+      '<polyline fill="none" class="p99" points="' + line(s.history, 3, ymax) + '"/>';
+  } catch (e) {}
+  setTimeout(refresh, 1000);
+}
+refresh();
+</script></body></html>
+"""
+
+
+class Dashboard:
+    """Feed one client's output into LiveStats and present it."""
+
+    def __init__(self, stats, port=None, terminal=True, period=1.0):
+        self.stats = stats
+        self.port = port
+        self.terminal = terminal
+        self.period = period
+        self.latest = None
+        self.log = None
+        self.thread = None
+        self.reported_gaps = 0
+        self.reported_switches = 0
+
+    async def pump(self, reader):
+        """Read a pipe in chunks until EOF, copying it to the log if one is set."""
+        tail = b""
+        while True:
+            chunk = await reader.read(CHUNK)
+            if not chunk:
+                break
+            if self.log:
+                self.log.write(chunk)
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            if len(tail) > LINE_LIMIT:
+                tail = b""
+            self.stats.feed(lines)
+        self.stats.feed([tail])
+
+    async def follow(self, path, from_start=False):
+        """Read a file that is still being written, like tail -f."""
+        with open(path, "rb") as f:
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            tail = b""
+            while True:
+                chunk = f.read(CHUNK)
+                if not chunk:
+                    await asyncio.sleep(FOLLOW_POLL)
+                    continue
+                lines = (tail + chunk).split(b"\n")
+                tail = lines.pop()
+                if len(tail) > LINE_LIMIT:
+                    tail = b""
+                self.stats.feed(lines)
+
+    async def refresh(self):
+        """Evaluate the window once per period and print the terminal view."""
+        while True:
+            await asyncio.sleep(self.period)
+            self.update()
+
+    def update(self, wall=None):
+        """Take a snapshot for both views and print the terminal one."""
+        self.latest = self.stats.snapshot(wall)
+        if self.log:
+            self.log.flush()
+        if self.terminal:
+            self.print_events()
+            print(status_line(self.latest), file=sys.stderr)
+
+    def print_events(self):
+        """Print the switches and gaps seen since the last refresh, a few at most."""
+        for events, total, seen, fmt in (
+            (self.stats.switches, self.stats.switch_count, self.reported_switches,
+             lambda e: f"  ⇄ path {e[1]} -> {e[2]} at recv_ms {e[0]}"),
+            (self.stats.gaps, self.stats.gap_count, self.reported_gaps,
+             lambda e: f"  ✗ {e[2]} missing from seq {e[1]} at recv_ms {e[0]}"),
+        ):
+            new = list(events)[-min(total - seen, len(events)):] if total > seen else []
+            for event in new[:EVENTS_PER_REFRESH]:
+                print(fmt(event), file=sys.stderr)
+            if total - seen > EVENTS_PER_REFRESH:
+                print(f"  ... {total - seen - EVENTS_PER_REFRESH} more", file=sys.stderr)
+        self.reported_switches = self.stats.switch_count
+        self.reported_gaps = self.stats.gap_count
+
+    async def handle(self, reader, writer):
+        """Minimal HTTP/1.0: the page and the latest snapshot as JSON."""
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request.split()
+            path = parts[1].decode("ascii", "replace") if len(parts) > 1 else "/"
+            if path == "/":
+                status, ctype, body = "200 OK", "text/html; charset=utf-8", PAGE
+            elif path == "/stats.json":
+                body = json.dumps({**(self.latest or {}), "history": list(self.stats.history)}).encode()
+                status, ctype = "200 OK", "application/json"
+            else:
+                status, ctype, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {ctype}\r\n"
+                         f"Content-Length: {len(body)}\r\nCache-Control: no-store\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, source):
+        """Present the output of source (a coroutine reading it) until it ends."""
+        tasks = [asyncio.create_task(self.refresh())]
+        server = None
+        if self.port is not None:
+            server = await asyncio.start_server(self.handle, "127.0.0.1", self.port)
+            print(f"*** Dashboard at http://127.0.0.1:{self.port}/", file=sys.stderr)
+        try:
+            await source
+        finally:
+            for task in tasks:
+                task.cancel()
+            if server:
+                server.close()
+                await server.wait_closed()
+
+    async def attach(self, pipe):
+        """Read a subprocess stdout (or stdin) pipe on the running loop."""
+        reader = asyncio.StreamReader(limit=LINE_LIMIT)
+        loop = asyncio.get_running_loop()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+        await self.pump(reader)
+
+    def start(self, pipe, log_path=None):
+        """Serve a client pipe from a background thread (for the Mininet CLI).
+
+        The thread ends by itself once the client exits and its pipe is drained.
+        """
+        if log_path:
+            self.log = open(log_path, "wb", buffering=CHUNK)
+
+        def main():
+            try:
+                asyncio.run(self.run(self.attach(pipe)))
+            finally:
+                if self.log:
+                    self.log.close()
+
+        self.thread = threading.Thread(target=main, name="dashboard", daemon=True)
+        self.thread.start()
+        return self
+
+    def join(self, timeout=5):
+        if self.thread:
+            self.thread.join(timeout)
+
+
+def summary(path, window_ms):
+    """Replay a whole log through LiveStats and print the final state."""
+    stats = LiveStats(window_ms)
+    with open_log(path) as f:
+        batch = []
+        for line in f:
+            batch.append(line)
+            if len(batch) >= 4096:
+                stats.feed(batch)
+                batch.clear()
+        stats.feed(batch)
+    snap = stats.snapshot()
+    for switch in snap["switches"]:
+        print(f"  ⇄ path {switch['from']} -> {switch['to']} at recv_ms {switch['recv_ms']}")
+    for gap in snap["gaps"]:
+        print(f"  ✗ {gap['count']} missing from seq {gap['seq']} at recv_ms {gap['recv_ms']}")
+    print(f"{stats.echoes} echoes, {stats.sent} sent, {stats.switch_count} path switches, "
+          f"{stats.gap_count} gaps, {stats.missing} missing, {stats.late} late")
+    print(status_line(snap))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live RTT and path view of a client's output")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("follow", help="Follow a growing client log ('-' reads stdin)")
+    p.add_argument("log")
+    p.add_argument("--port", type=int, help="Also serve the HTTP view on 127.0.0.1:PORT")
+    p.add_argument("--no-terminal", action="store_true", help="Only serve the HTTP view")
+    p.add_argument("--from-start", action="store_true", help="Read the log from the beginning")
+    p.add_argument("--period", type=float, default=1.0, help="Seconds between refreshes")
+
+    p = sub.add_parser("summary", help="Final dashboard state of a finished log")
+    p.add_argument("log")
+
+    for p in sub.choices.values():
+        p.add_argument("--window-ms", type=int, default=DEFAULT_WINDOW_MS,
+                       help=f"Rolling window in client time (default: {DEFAULT_WINDOW_MS})")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        summary(args.log, args.window_ms)
+        return 0
+
+    dashboard = Dashboard(LiveStats(args.window_ms), port=args.port,
+                          terminal=not args.no_terminal, period=args.period)
+    source = dashboard.attach(sys.stdin.buffer) if args.log == "-" else dashboard.follow(args.log, args.from_start)
+    try:
+        asyncio.run(dashboard.run(source))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Streaming parser and columnar store for quic_client / tcp_client logs.
+
+The clients print one line per event on stdout:
+
+  QUIC_TX seq=.. send_ms=..
+  QUIC_ECHO seq=.. send_ms=.. recv_ms=.. app_rtt_ms=.. remote=.. quinn_rtt_ms=..
+  QUIC_STATS stable_id=.. remote=.. rtt_ms=.. stats=..
+  TCP_TX seq=.. send_ms=..
+  TCP_ECHO seq=.. send_ms=.. recv_ms=.. app_rtt_ms=..
+
+Logs are read line by line (plain or .gz) and written as one raw array file per
+column into a store directory, plus meta.json with the row counts, the table of
+remote addresses and a sparse recv_ms index for time-range queries. Columns are
+memory-mapped on read, so opening a multi-GB run costs nothing up front.
+
+Usage:
+  python3 echo_log.py ingest client.log -o runs/r1.echo
+  python3 echo_log.py info runs/r1.echo
+  python3 echo_log.py slice runs/r1.echo --from-ms T0 --to-ms T1
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+import mmap
+import os
+import sys
+from array import array
+
+STORE_VERSION = 1
+
+# Rows between entries of the sparse recv_ms index
+INDEX_STRIDE = 4096
+
+# Rows buffered in memory per column before they are appended to disk
+FLUSH_ROWS = 65536
+
+# table -> ordered (column, array typecode)
+SCHEMA = {
+    "echo": [
+        ("seq", "Q"),
+        ("send_ms", "Q"),
+        ("recv_ms", "Q"),
+        ("app_rtt_ms", "I"),
+        ("quinn_rtt_ms", "i"),  # -1 for TCP
+        ("remote", "h"),        # index into meta["remotes"], -1 for TCP
+    ],
+    "tx": [
+        ("seq", "Q"),
+        ("send_ms", "Q"),
+    ],
+    "stats": [
+        ("at_ms", "Q"),         # last client timestamp seen before the line
+        ("rtt_ms", "I"),
+        ("remote", "h"),
+    ],
+}
+
+
+def open_log(path):
+    """Open a log for binary line iteration ('-' is stdin, .gz is decompressed)."""
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb", buffering=1 << 20)
+
+
+def field(token):
+    """Value part of a key=value token."""
+    return token[token.index(b"=") + 1:]
+
+
+def iter_records(lines):
+    """Parse client log lines lazily.
+
+    Yields ("echo", seq, send_ms, recv_ms, app_rtt_ms, remote, quinn_rtt_ms),
+    ("tx", seq, send_ms) and ("stats", remote, rtt_ms) tuples; remote is the
+    address as str (None for TCP) and quinn_rtt_ms is -1 for TCP. Lines of any
+    other kind, and truncated lines, are skipped.
+    """
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        kind = parts[0]
+        try:
+            if kind == b"QUIC_ECHO":
+                yield ("echo", int(field(parts[1])), int(field(parts[2])), int(field(parts[3])),
+                       int(field(parts[4])), field(parts[5]).decode(), int(field(parts[6])))
+            elif kind == b"TCP_ECHO":
+                yield ("echo", int(field(parts[1])), int(field(parts[2])), int(field(parts[3])),
+                       int(field(parts[4])), None, -1)
+            elif kind in (b"QUIC_TX", b"TCP_TX"):
+                yield ("tx", int(field(parts[1])), int(field(parts[2])))
+            elif kind == b"QUIC_STATS":
+                yield ("stats", field(parts[2]).decode(), int(field(parts[3])))
+        except (IndexError, ValueError):
+            continue
+
+
+class EchoStoreWriter:
+    """Append parsed records to a columnar store directory."""
+
+    def __init__(self, path, source=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.source = source
+        self.remotes = {}
+        self.rows = {table: 0 for table in SCHEMA}
+        self.buffers = {table: [array(code) for _, code in cols] for table, cols in SCHEMA.items()}
+        self.files = {
+            table: [open(os.path.join(path, f"{table}.{name}"), "wb") for name, _ in cols]
+            for table, cols in SCHEMA.items()
+        }
+        self.index = []
+        self.last_ms = 0
+
+    def remote_id(self, remote):
+        if remote is None:
+            return -1
+        rid = self.remotes.get(remote)
+        if rid is None:
+            rid = self.remotes[remote] = len(self.remotes)
+        return rid
+
+    def append(self, record):
+        """Add one record from iter_records()."""
+        kind = record[0]
+        if kind == "echo":
+            _, seq, send_ms, recv_ms, rtt, remote, quinn = record
+            if self.rows["echo"] % INDEX_STRIDE == 0:
+                self.index.append(recv_ms)
+            values = (seq, send_ms, recv_ms, rtt, quinn, self.remote_id(remote))
+            self.last_ms = recv_ms
+        elif kind == "tx":
+            values = record[1:]
+            self.last_ms = max(self.last_ms, record[2])
+        else:
+            values = (self.last_ms, record[2], self.remote_id(record[1]))
+
+        buffers = self.buffers[kind]
+        for buf, value in zip(buffers, values):
+            buf.append(value)
+        self.rows[kind] += 1
+        if len(buffers[0]) >= FLUSH_ROWS:
+            self.flush(kind)
+
+    def flush(self, table):
+        for buf, f in zip(self.buffers[table], self.files[table]):
+            buf.tofile(f)
+            del buf[:]
+
+    def close(self):
+        """Flush all columns and write meta.json."""
+        for table, files in self.files.items():
+            self.flush(table)
+            for f in files:
+                f.close()
+        meta = {
+            "version": STORE_VERSION,
+            "source": self.source,
+            "byteorder": sys.byteorder,
+            "schema": SCHEMA,
+            "rows": self.rows,
+            "remotes": sorted(self.remotes, key=self.remotes.get),
+            "index": {"stride": INDEX_STRIDE, "recv_ms": self.index},
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+            f.write("\n")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def ingest(log_path, store_path):
+    """Stream a client log into a store; returns the row counts."""
+    with open_log(log_path) as lines, EchoStoreWriter(store_path, source=log_path) as writer:
+        for record in iter_records(lines):
+            writer.append(record)
+    return writer.rows
+
+
+class EchoStore:
+    """Read-only, memory-mapped view of a store written by EchoStoreWriter."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"{path}: unsupported store version {self.meta.get('version')}")
+        if self.meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: written on a {self.meta['byteorder']}-endian host")
+        self.remotes = self.meta["remotes"]
+        self.maps = {}
+
+    def rows(self, table):
+        return self.meta["rows"][table]
+
+    def raw(self, table, name):
+        """mmap of one column file (None when the column is empty)."""
+        key = (table, name)
+        if key not in self.maps:
+            with open(os.path.join(self.path, f"{table}.{name}"), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                self.maps[key] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        return self.maps[key]
+
+    def column(self, table, name):
+        """Zero-copy memoryview of a column."""
+        code = dict(self.meta["schema"][table])[name]
+        data = self.raw(table, name)
+        if data is None:
+            return memoryview(array(code))
+        return memoryview(data).cast(code)
+
+    def numpy(self, table, name):
+        """The column as a read-only numpy array (requires numpy)."""
+        import numpy as np
+
+        code = dict(self.meta["schema"][table])[name]
+        data = self.raw(table, name)
+        if data is None:
+            return np.empty(0, dtype=np.dtype(code))
+        return np.frombuffer(data, dtype=np.dtype(code))
+
+    def time_range(self, from_ms, to_ms):
+        """Row range [start, end) of echoes with from_ms <= recv_ms < to_ms.
+
+        Uses the sparse index to narrow the search to two blocks; assumes
+        recv_ms is non-decreasing, as it is in a client log.
+        """
+        recv = self.column("echo", "recv_ms")
+        index = self.meta["index"]["recv_ms"]
+        stride = self.meta["index"]["stride"]
+        n = len(recv)
+
+        def locate(t):
+            block = max(bisect.bisect_left(index, t) - 1, 0)
+            lo, hi = block * stride, min((block + 2) * stride, n)
+            return bisect.bisect_left(recv, t, lo, hi)
+
+        return locate(from_ms), locate(to_ms)
+
+    def close(self):
+        """Release the mappings (those still referenced by views close with them)."""
+        for data in self.maps.values():
+            if data is not None:
+                try:
+                    data.close()
+                except BufferError:
+                    pass
+        self.maps.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client log parser and columnar store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Parse a client log into a store")
+    p.add_argument("log", help="Client stdout log ('-' for stdin, .gz accepted)")
+    p.add_argument("-o", "--output", required=True, help="Store directory to write")
+
+    p = sub.add_parser("info", help="Show row counts and time span of a store")
+    p.add_argument("store")
+
+    p = sub.add_parser("slice", help="Print echoes received in a time range")
+    p.add_argument("store")
+    p.add_argument("--from-ms", type=int, default=0)
+    p.add_argument("--to-ms", type=int, default=2**63)
+
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        rows = ingest(args.log, args.output)
+        print(f"✓ {args.output}: " + ", ".join(f"{n} {t}" for t, n in rows.items()), file=sys.stderr)
+        return 0
+
+    store = EchoStore(args.store)
+    if args.command == "info":
+        recv = store.column("echo", "recv_ms")
+        for table in SCHEMA:
+            print(f"{table:6} {store.rows(table)} rows")
+        if len(recv):
+            print(f"span   {recv[0]} .. {recv[-1]} ms ({(recv[-1] - recv[0]) / 1000:.1f} s)")
+        print(f"remotes {', '.join(store.remotes) or '-'}")
+    else:
+        start, end = store.time_range(args.from_ms, args.to_ms)
+        cols = [store.column("echo", name) for name, _ in SCHEMA["echo"]]
+        print(" ".join(name for name, _ in SCHEMA["echo"]))
+        for i in range(start, end):
+            print(" ".join(str(c[i]) for c in cols))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
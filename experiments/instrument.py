@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+High-resolution timeline instrumentation for migration experiments.
+
+A Timeline records, on one clock:
+- every topology action (route, link, qdisc change) with the nanosecond time
+  it was issued and completed
+- interface counters of every node, sampled every `interval` (default 10 ms)
+- qdisc statistics (backlog, drops, overlimits), sampled at a lower rate
+
+All timestamps come from time.monotonic_ns(), shifted once by a (wall, monotonic)
+anchor taken at start, so they are on the same Unix-epoch axis as the clients'
+now_ms() stamps without being affected by clock adjustments during the run.
+
+Samples go to an in-memory ring buffer that a writer thread drains to
+instrument.jsonl; if the writer falls behind the oldest samples are dropped and
+counted. merge() then combines the instrument stream with the client logs into
+one time-ordered timeline.jsonl.
+
+Interface counters are read from /proc/<pid>/net/dev of each node process:
+Mininet hosts share the root /sys mount, so /sys/class/net/*/statistics would
+only show the root namespace. Qdisc statistics come from one long-running
+`tc -batch` per node, so sampling forks no processes while the experiment runs.
+
+Usage:
+  python3 instrument.py merge results/<run> [client.log ...]
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+# Samples held in memory before the oldest are dropped
+RING_CAPACITY = 1 << 16
+
+# Seconds between drains of the ring buffer to disk
+WRITER_INTERVAL = 0.2
+
+DEV_FIELDS = ("rx_bytes", "rx_packets", "rx_errs", "rx_drop",
+              "tx_bytes", "tx_packets", "tx_errs", "tx_drop")
+# Column positions of DEV_FIELDS in /proc/net/dev
+DEV_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+QDISC_FIELDS = ("bytes", "packets", "drops", "overlimits", "requeues", "backlog", "qlen")
+
+
+def read_net_dev(pid):
+    """Counters per interface of a process's network namespace (lo excluded)."""
+    counters = {}
+    with open(f"/proc/{pid}/net/dev", "r", encoding="ascii") as f:
+        for line in f.readlines()[2:]:
+            name, _, data = line.partition(":")
+            name = name.strip()
+            if name == "lo":
+                continue
+            values = data.split()
+            counters[name] = tuple(int(values[c]) for c in DEV_COLUMNS)
+    return counters
+
+
+class QdiscReader:
+    """Qdisc statistics of network namespaces, without a fork per sample.
+
+    Each namespace gets one long-running `tc -s -j -batch -` (started through
+    nsenter on first use); a sample writes `qdisc show` to it and reads back
+    the one-line JSON answer.
+    """
+
+    def __init__(self):
+        self.procs = {}
+
+    def read(self, pid):
+        proc = self.procs.get(pid)
+        if proc is None:
+            proc = self.procs[pid] = subprocess.Popen(
+                ["nsenter", "-t", str(pid), "-n", "tc", "-s", "-j", "-force", "-batch", "-"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+        try:
+            proc.stdin.write("qdisc show\n")
+            proc.stdin.flush()
+            line = proc.stdout.readline()
+        except OSError:
+            line = ""
+        if not line:
+            # The namespace (or tc) is gone; start over on the next sample
+            self.procs.pop(pid).kill()
+            return {}
+        qdiscs = {}
+        for q in json.loads(line):
+            if q.get("dev") == "lo" or q.get("kind") == "noqueue":
+                continue
+            key = (q.get("dev"), q.get("handle"), q.get("kind"))
+            qdiscs[key] = tuple(int(q.get(f, 0)) for f in QDISC_FIELDS)
+        return qdiscs
+
+    def close(self):
+        for proc in self.procs.values():
+            proc.stdin.close()
+            proc.wait()
+        self.procs.clear()
+
+
+class Timeline:
+    """Clock, action log and background sampler for one experiment run."""
+
+    def __init__(self, out_dir, interval=0.01, qdisc_interval=0.1, capacity=RING_CAPACITY):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.qdisc_interval = qdisc_interval
+        self.ring = deque(maxlen=capacity)
+        self.dropped = 0
+        self.nodes = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.wall_anchor = time.time_ns()
+        self.mono_anchor = time.monotonic_ns()
+        self.path = os.path.join(out_dir, "instrument.jsonl")
+        self.file = None
+
+    def now(self):
+        """Nanoseconds since the Unix epoch, on the monotonic clock."""
+        return self.wall_anchor + time.monotonic_ns() - self.mono_anchor
+
+    def record(self, kind, t_ns=None, **fields):
+        """Add a record to the ring, stamped now unless t_ns is given."""
+        with self.lock:
+            if len(self.ring) == self.ring.maxlen:
+                self.dropped += 1
+            self.ring.append({"t_ns": self.now() if t_ns is None else t_ns, "kind": kind, **fields})
+
+    def watch(self, nodes):
+        """Sample the given {name: pid} nodes."""
+        self.nodes.update(nodes)
+
+    def run(self, node, cmd, **fields):
+        """Run cmd on a Mininet node and record when it was issued and completed."""
+        start = self.now()
+        output = node.cmd(cmd)
+        end = self.now()
+        self.record("action", t_ns=start, node=node.name, cmd=cmd, done_ns=end,
+                    output=output.strip(), **fields)
+        return output
+
+    def start(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.record("clock", wall_anchor_ns=self.wall_anchor, mono_anchor_ns=self.mono_anchor,
+                    interval_ms=self.interval * 1000, qdisc_interval_ms=self.qdisc_interval * 1000)
+        self.threads = [threading.Thread(target=self.sample_loop, daemon=True),
+                        threading.Thread(target=self.writer_loop, daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def sample_loop(self):
+        last_dev, last_qdisc = {}, {}
+        qdiscs = QdiscReader()
+        qdisc_every = max(1, round(self.qdisc_interval / self.interval)) if self.qdisc_interval else 0
+        start = time.monotonic()
+        tick = 0
+        while not self.stopping.is_set():
+            for name, pid in list(self.nodes.items()):
+                try:
+                    counters = read_net_dev(pid)
+                except OSError:
+                    continue
+                # Only changed counters are kept; the last value holds until the next record
+                for intf, values in counters.items():
+                    if last_dev.get((name, intf)) != values:
+                        last_dev[(name, intf)] = values
+                        self.record("dev", node=name, intf=intf, **dict(zip(DEV_FIELDS, values)))
+                if qdisc_every and tick % qdisc_every == 0:
+                    for (dev, handle, kind), values in qdiscs.read(pid).items():
+                        if last_qdisc.get((name, dev, handle)) != values:
+                            last_qdisc[(name, dev, handle)] = values
+                            self.record("qdisc", node=name, intf=dev, qdisc=kind, handle=handle,
+                                        **dict(zip(QDISC_FIELDS, values)))
+            tick += 1
+            # Fixed schedule, so slow reads do not accumulate drift
+            self.stopping.wait(max(0.0, start + tick * self.interval - time.monotonic()))
+        qdiscs.close()
+
+    def drain(self):
+        with self.lock:
+            items = list(self.ring)
+            self.ring.clear()
+        for item in items:
+            self.file.write(json.dumps(item) + "\n")
+        self.file.flush()
+
+    def writer_loop(self):
+        while not self.stopping.wait(WRITER_INTERVAL):
+            self.drain()
+
+    def stop(self):
+        """Stop sampling and flush everything recorded so far."""
+        self.stopping.set()
+        for thread in self.threads:
+            thread.join()
+        self.record("end", dropped=self.dropped)
+        self.drain()
+        self.file.close()
+        if self.dropped:
+            print(f"⚠ {self.dropped} samples dropped from the ring buffer", file=sys.stderr)
+
+    def merge(self, client_logs):
+        return merge(self.out_dir, client_logs)
+
+
+def client_events(path):
+    """Client log records as timeline entries, in log (i.e. chronological) order."""
+    from echo_log import iter_records, open_log
+
+    source = os.path.splitext(os.path.basename(path))[0]
+    last_ms = 0
+    with open_log(path) as lines:
+        for record in iter_records(lines):
+            kind = record[0]
+            if kind == "echo":
+                _, seq, send_ms, recv_ms, rtt, remote, quinn = record
+                last_ms = recv_ms
+                yield {"t_ns": recv_ms * 1_000_000, "kind": "echo", "source": source, "seq": seq,
+                       "send_ms": send_ms, "app_rtt_ms": rtt, "remote": remote}
+            elif kind == "tx":
+                last_ms = max(last_ms, record[2])
+                yield {"t_ns": record[2] * 1_000_000, "kind": "tx", "source": source, "seq": record[1]}
+            else:
+                yield {"t_ns": last_ms * 1_000_000, "kind": "stats", "source": source,
+                       "remote": record[1], "rtt_ms": record[2]}
+
+
+def instrument_records(path, actions):
+    """Records of instrument.jsonl, either only the actions or everything else.
+
+    Samples are stamped when they enter the ring, so they are in file order;
+    an action is stamped when it was issued but written once it completed, so
+    actions form a second ordered stream. Missing files yield nothing.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if (record["kind"] == "action") == actions:
+                    yield record
+    except FileNotFoundError:
+        return
+
+
+def merge(out_dir, client_logs):
+    """Write timeline.jsonl: instrument records and client events ordered by t_ns.
+
+    Every input is already time-ordered, so they are merged as streams.
+    Runs recorded without a Timeline (no instrument.jsonl) get the client events only.
+    """
+    path = os.path.join(out_dir, "instrument.jsonl")
+    streams = [instrument_records(path, False), instrument_records(path, True)]
+    streams += [client_events(p) for p in client_logs]
+    output = os.path.join(out_dir, "timeline.jsonl")
+    with open(output, "w", encoding="utf-8") as f:
+        for item in heapq.merge(*streams, key=lambda r: r["t_ns"]):
+            f.write(json.dumps(item) + "\n")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Timeline instrumentation tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("merge", help="Merge instrument.jsonl and client logs into timeline.jsonl")
+    p.add_argument("run", help="Run directory containing instrument.jsonl")
+    p.add_argument("logs", nargs="*", help="Client logs (default: <run>/client*.log)")
+
+    args = parser.parse_args()
+    logs = args.logs or sorted(glob.glob(os.path.join(args.run, "client*.log")))
+    output = merge(args.run, logs)
+    print(f"✓ Generated: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
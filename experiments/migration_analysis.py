@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Vectorized migration analytics over echo traces.
+
+Works on stores written by echo_log.py. All runs of a batch are concatenated
+into flat NumPy columns tagged with a run id, so every metric is computed with
+array operations over the whole batch instead of per-line Python loops:
+
+- disruptions: changes of the remote= path, and receive gaps longer than
+  --gap-ms, with the time to recover (last echo before the disruption until
+  the first echo whose RTT is back under --rtt-factor x the path median)
+- loss bursts: runs of sequence numbers that were sent but never echoed
+- RTT percentiles per run and path
+- reordering: echoes that arrive after an echo with a higher seq
+
+Results are printed and can be exported as LaTeX tables wrapped in a Markdown
+file that can be listed directly in chapters/evaluation/config.yaml.
+
+Usage:
+  python3 migration_analysis.py runs/*.echo
+  python3 migration_analysis.py runs/*.echo --latex ../chapters/evaluation/results-tables.md
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from echo_log import EchoStore
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from extract_metadata import latex_escape  # noqa: E402
+
+PERCENTILES = (50, 90, 99)
+
+
+def run_label(path):
+    """Name of a store in tables: its file name, or its run directory for the
+    fixed client.echo / client-<host>.echo names of a scenarios.py run."""
+    path = os.path.normpath(path)
+    name = os.path.basename(path)
+    stem = os.path.splitext(name)[0]
+    if stem == "client" or stem.startswith("client-"):
+        run = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        return run if stem == "client" else f"{run}/{stem[len('client-'):]}"
+    return name
+
+
+def load_batch(paths, labels=None):
+    """Concatenate the echo/tx columns of several stores, tagged by run id.
+
+    labels names the runs (default: run_label of each path).
+    """
+    cols = {k: [] for k in ("run", "seq", "send_ms", "recv_ms", "rtt", "path")}
+    sent = np.zeros(len(paths), dtype=np.int64)
+    path_names = []
+    offset = 0
+    for run, path in enumerate(paths):
+        store = EchoStore(path)
+        n = store.rows("echo")
+        cols["run"].append(np.full(n, run, dtype=np.int64))
+        cols["seq"].append(store.numpy("echo", "seq").astype(np.int64))
+        cols["send_ms"].append(store.numpy("echo", "send_ms").astype(np.int64))
+        cols["recv_ms"].append(store.numpy("echo", "recv_ms").astype(np.int64))
+        cols["rtt"].append(store.numpy("echo", "app_rtt_ms").astype(np.float64))
+        # Remote ids are per store; make them global so paths can be grouped
+        remote = store.numpy("echo", "remote").astype(np.int64)
+        names = store.remotes or ["-"]
+        cols["path"].append(np.where(remote < 0, 0, remote) + offset)
+        path_names += names
+        offset += len(names)
+        tx_seq = store.numpy("tx", "seq")
+        sent[run] = int(tx_seq.max()) + 1 if len(tx_seq) else 0
+    batch = {k: np.concatenate(v) if v else np.empty(0, dtype=np.int64) for k, v in cols.items()}
+    batch["sent"] = sent
+    batch["path_names"] = np.array(path_names, dtype=object)
+    batch["runs"] = list(labels) if labels is not None else [run_label(p) for p in paths]
+    return batch
+
+
+def group_percentiles(keys, values, qs=PERCENTILES):
+    """Percentiles of values per distinct key; returns (unique_keys, counts, matrix)."""
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    uniq, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    result = np.empty((len(uniq), len(qs)))
+    for g, (start, count) in enumerate(zip(starts, counts)):
+        result[g] = np.percentile(values[start:start + count], qs)
+    return uniq, counts, result
+
+
+def analyze(batch, gap_ms=200, rtt_factor=1.5):
+    """Compute per-run and per-path metrics for a loaded batch."""
+    run, seq, recv, rtt, path = (batch[k] for k in ("run", "seq", "recv_ms", "rtt", "path"))
+    nruns = len(batch["runs"])
+    n = len(run)
+
+    # RTT percentiles per (run, path)
+    npaths = len(batch["path_names"])
+    key = run * npaths + path
+    keys, counts, pct = group_percentiles(key, rtt)
+    paths = [
+        {"run": batch["runs"][k // npaths], "path": batch["path_names"][k % npaths],
+         "echoes": int(c), **{f"p{q}": float(v) for q, v in zip(PERCENTILES, row)}}
+        for k, c, row in zip(keys, counts, pct)
+    ]
+
+    # Disruptions: path changes or long receive gaps between consecutive echoes
+    same_run = run[1:] == run[:-1]
+    path_change = same_run & (path[1:] != path[:-1])
+    stall = same_run & (np.diff(recv) > gap_ms)
+    events = np.flatnonzero(path_change | stall)          # row before the disruption
+
+    # Recovery: first row at/after the disruption whose RTT is back to normal
+    median = np.zeros(nruns * npaths)
+    median[keys] = pct[:, PERCENTILES.index(50)]
+    ok = rtt <= median[key] * rtt_factor
+    next_ok = np.where(ok, np.arange(n), n)
+    next_ok = np.minimum.accumulate(next_ok[::-1])[::-1]
+    recovered = next_ok[np.minimum(events + 1, n - 1)] if n else events
+    valid = (recovered < n) & (run[np.minimum(recovered, n - 1)] == run[events])
+    ttr = np.where(valid, recv[np.minimum(recovered, n - 1)] - recv[events], -1)
+    gap = recv[events + 1] - recv[events]
+
+    # Loss bursts: gaps in the sorted set of echoed sequence numbers
+    order = np.lexsort((seq, run))
+    r_sorted, s_sorted = run[order], seq[order]
+    first = np.ones(n, dtype=bool)
+    first[1:] = (r_sorted[1:] != r_sorted[:-1]) | (s_sorted[1:] != s_sorted[:-1])
+    r_sorted, s_sorted = r_sorted[first], s_sorted[first]
+    received = np.bincount(r_sorted, minlength=nruns)
+    holes = np.zeros(len(s_sorted), dtype=np.int64)
+    if len(s_sorted):
+        holes[0] = s_sorted[0]
+        holes[1:] = np.where(r_sorted[1:] == r_sorted[:-1], s_sorted[1:] - s_sorted[:-1] - 1, s_sorted[1:])
+    burst = holes > 0
+    bursts = np.bincount(r_sorted[burst], minlength=nruns)
+    max_burst = np.zeros(nruns, dtype=np.int64)
+    np.maximum.at(max_burst, r_sorted[burst], holes[burst])
+
+    # Reordering: seq below the running max of earlier echoes of the same run
+    shifted = seq + run * (int(seq.max()) + 1 if n else 0)
+    prev_max = np.maximum.accumulate(shifted)
+    reordered = np.zeros(n, dtype=bool)
+    reordered[1:] = same_run & (shifted[1:] < prev_max[:-1])
+
+    event_run = run[events]
+    runs = []
+    for r, name in enumerate(batch["runs"]):
+        mask = event_run == r
+        ttrs = ttr[mask]
+        rtts = rtt[run == r]
+        runs.append({
+            "run": name,
+            "sent": int(batch["sent"][r]),
+            "received": int(received[r]),
+            "lost": int(max(batch["sent"][r] - received[r], 0)),
+            "loss_bursts": int(bursts[r]),
+            "max_burst": int(max_burst[r]),
+            "reordered": int(np.count_nonzero(reordered & (run == r))),
+            "path_changes": int(np.count_nonzero(path_change[events[mask]])),
+            "disruptions": int(np.count_nonzero(mask)),
+            "max_gap_ms": int(gap[mask].max()) if np.any(mask) else 0,
+            "ttr_ms": int(ttrs.max()) if np.any(mask) else 0,
+            **{f"p{q}": float(v) for q, v in
+               zip(PERCENTILES, np.percentile(rtts, PERCENTILES) if len(rtts) else [0] * len(PERCENTILES))},
+        })
+    return {"runs": runs, "paths": paths}
+
+
+def latex_table(rows, columns, caption, label):
+    """Render rows as a LaTeX table in the style of the evaluation chapter.
+
+    columns is a list of (key, header, format) tuples.
+    """
+    lines = [
+        r"\begin{table}[h]",
+        r"\centering",
+        f"\\caption{{{latex_escape(caption)}}}",
+        f"\\label{{{label}}}",
+        r"\begin{tabular}{l" + "r" * (len(columns) - 1) + "}",
+        r"\hline",
+        " & ".join(f"\\textbf{{{latex_escape(h)}}}" for _, h, _ in columns) + r" \\",
+        r"\hline",
+    ]
+    for row in rows:
+        cells = [latex_escape(fmt.format(row[k])) for k, _, fmt in columns]
+        lines.append(" & ".join(cells) + r" \\")
+    lines += [r"\hline", r"\end{tabular}", r"\end{table}"]
+    return "\n".join(lines) + "\n"
+
+
+RUN_COLUMNS = [
+    ("run", "Run", "{}"),
+    ("lost", "Lost", "{}"),
+    ("loss_bursts", "Bursts", "{}"),
+    ("max_burst", "Max burst", "{}"),
+    ("reordered", "Reordered", "{}"),
+    ("max_gap_ms", "Max gap (ms)", "{}"),
+    ("ttr_ms", "Recovery (ms)", "{}"),
+]
+
+PATH_COLUMNS = [
+    ("run", "Run", "{}"),
+    ("path", "Path", "{}"),
+    ("echoes", "Echoes", "{}"),
+    ("p50", "p50 (ms)", "{:.1f}"),
+    ("p90", "p90 (ms)", "{:.1f}"),
+    ("p99", "p99 (ms)", "{:.1f}"),
+]
+
+
+def export_latex(result, output, label_prefix="tab:migration"):
+    """Write both tables to a Markdown file (raw LaTeX passes through pandoc)."""
+    content = (
+        "<!-- Auto-generated by experiments/migration_analysis.py - do not edit -->\n\n"
+        + latex_table(result["runs"], RUN_COLUMNS, "Loss and recovery per run.", f"{label_prefix}-runs")
+        + "\n"
+        + latex_table(result["paths"], PATH_COLUMNS, "Application RTT per path.", f"{label_prefix}-paths")
+    )
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migration analytics over echo stores")
+    parser.add_argument("stores", nargs="+", help="Store directories written by echo_log.py")
+    parser.add_argument("--gap-ms", type=int, default=200,
+                        help="Receive gap counted as a disruption (default: 200)")
+    parser.add_argument("--rtt-factor", type=float, default=1.5,
+                        help="Recovered once RTT <= factor x path median (default: 1.5)")
+    parser.add_argument("--latex", metavar="FILE.md",
+                        help="Also write LaTeX tables to a Markdown file (e.g. in chapters/evaluation/)")
+    args = parser.parse_args()
+
+    result = analyze(load_batch(args.stores), gap_ms=args.gap_ms, rtt_factor=args.rtt_factor)
+
+    for columns, rows in ((RUN_COLUMNS, result["runs"]), (PATH_COLUMNS, result["paths"])):
+        print("  ".join(f"{h:>12}" for _, h, _ in columns))
+        for row in rows:
+            print("  ".join(f"{fmt.format(row[k]):>12}" for k, _, fmt in columns))
+        print()
+
+    if args.latex:
+        export_latex(result, args.latex)
+        print(f"✓ Generated: {args.latex}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
 #!/usr/bin/env python3
+import argparse
+import os
+import subprocess
+import time
+
 from mininet.net import Mininet
 from mininet.node import Node
 from mininet.link import TCLink
@@ -20,7 +25,7 @@ def disable_rpf(node):
     node.cmd("sysctl -w net.ipv4.conf.all.rp_filter=0")
     node.cmd("sysctl -w net.ipv4.conf.default.rp_filter=0")
 
-def setup():
+def build_network():
     net = Mininet(controller=None, link=TCLink, build=False)
 
     info("*** Adding nodes\n")
@@ -80,6 +85,42 @@ def setup():
     h2.cmd("ip route add 10.0.1.0/24 via 10.0.3.1 dev h2-eth0")
     h2.cmd("ip route add 10.0.2.0/24 via 10.0.4.1 dev h2-eth1")
 
+    return net
+
+def start_dashboard(net, args):
+    """Run server and client for the dashboard; returns the processes to stop."""
+    from dashboard import Dashboard, LiveStats
+    from scenarios import HERE, SERVER_STARTUP, endpoint_commands
+
+    h1, h2 = net.get("h1", "h2")
+    os.makedirs(args.output, exist_ok=True)
+    server_cmd, client_cmd = endpoint_commands({"transport": args.transport,
+                                                "interval_ms": args.interval_ms})
+    server_log = open(os.path.join(args.output, "server.log"), "wb")
+    server = h2.popen(server_cmd, cwd=HERE, stdout=server_log, stderr=subprocess.STDOUT)
+    time.sleep(SERVER_STARTUP)
+    client = h1.popen(client_cmd, cwd=HERE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    log_path = os.path.join(args.output, "client.log")
+    dashboard = Dashboard(LiveStats(args.window_ms), port=args.port, terminal=False)
+    dashboard.start(client.stdout, log_path)
+    info(f"*** {args.transport} client on h1 -> {log_path}\n")
+    info(f"*** Terminal view: python3 dashboard.py follow {log_path}\n")
+    return dashboard, [client, server], server_log
+
+def stop_dashboard(dashboard, procs, server_log):
+    for proc in procs:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    dashboard.join()
+    server_log.close()
+
+def setup(args):
+    net = build_network()
+    h1, h2 = net.get("h1", "h2")
+
     info("*** Sanity checks\n")
     info("h1 routes:\n")
     info(h1.cmd("ip route"))
@@ -97,9 +138,24 @@ def setup():
     info("h1 tc qdisc replace dev h1-eth1 root netem delay 80ms loss 1%\n")
     info("h1 tc qdisc del dev h1-eth1 root\n\n")
 
-    CLI(net)
-    net.stop()
+    live = start_dashboard(net, args) if args.dashboard else None
+    try:
+        CLI(net)
+    finally:
+        if live:
+            stop_dashboard(*live)
+        net.stop()
 
 if __name__ == "__main__":
+    from dashboard import DEFAULT_PORT, DEFAULT_WINDOW_MS
+    parser = argparse.ArgumentParser(description="Two-path migration topology with the Mininet CLI")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Start server and client and serve a live RTT/path view")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Dashboard port on 127.0.0.1 (default: {DEFAULT_PORT})")
+    parser.add_argument("--transport", choices=("quic", "tcp"), default="quic")
+    parser.add_argument("--interval-ms", type=int, default=100)
+    parser.add_argument("--window-ms", type=int, default=DEFAULT_WINDOW_MS)
+    parser.add_argument("-o", "--output", default="runs/live", help="Client and server logs")
     setLogLevel("info")
-    setup()
\ No newline at end of file
+    setup(parser.parse_args())
\ No newline at end of file
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Asyncio orchestration of many concurrent client/server pairs.
+
+Mininet's node.cmd() blocks until the command finishes, so the interactive
+setup can drive one pair at a time. Here every client is started with
+node.popen() and its stdout is attached to the event loop, so hundreds of
+clients are read concurrently by one thread:
+
+- every line goes to the client's raw log file (lossless; the pipe is always
+  drained, so a client printing at a high --interval-ms rate never blocks)
+- lines are also offered to a bounded queue for live consumers; when the queue
+  is full the line is dropped for the consumer and counted, instead of
+  back-pressuring the client
+
+Topology actions (the timeline: of a scenarios.py file, --timeline) run
+through node.cmd() in a small thread pool, so they do not stall the readers.
+Client logs are named <host>-<n>.log and can be ingested with echo_log.py
+(--ingest does this at the end of the run).
+
+Usage (as root):
+  python3 orchestrate.py --clients-per-host 100 --duration 30 --interval-ms 10
+  python3 orchestrate.py --topology spec.yaml --clients-per-host 20 -o runs/load
+  python3 orchestrate.py --clients-per-host 50 --timeline route-switch.yaml
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from echo_log import ingest, iter_records
+from scenarios import HERE, SERVER_ADDR, SERVER_STARTUP, endpoint_commands
+
+# Lines buffered for live consumers before new lines are dropped
+QUEUE_SIZE = 65536
+
+# Maximum length of one client output line
+LINE_LIMIT = 1 << 16
+
+# Seconds a terminated process gets to exit before it is killed
+STOP_TIMEOUT = 5
+
+
+class Client:
+    """One client process and the bookkeeping of its output."""
+
+    def __init__(self, host, index, proc, log_path):
+        self.host = host
+        self.index = index
+        self.proc = proc
+        self.name = f"{host}-{index}"
+        self.log_path = log_path
+        self.lines = 0
+        self.dropped = 0
+
+
+class Orchestrator:
+    """Launch clients on Mininet nodes and consume their output on one event loop."""
+
+    def __init__(self, net, out_dir, queue_size=QUEUE_SIZE, action_workers=4):
+        self.net = net
+        self.out_dir = out_dir
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.actions = ThreadPoolExecutor(max_workers=action_workers)
+        self.clients = []
+        self.servers = []
+        self.readers = []
+        os.makedirs(out_dir, exist_ok=True)
+
+    def start_server(self, host, spec):
+        server_cmd, _ = endpoint_commands(spec)
+        log = open(os.path.join(self.out_dir, f"server-{host}.log"), "wb")
+        self.servers.append((self.net.get(host).popen(server_cmd, cwd=HERE, stdout=log,
+                                                      stderr=subprocess.STDOUT), log))
+
+    async def spawn_clients(self, host, count, spec, server_addr=SERVER_ADDR):
+        """Start count clients on host and attach their stdout to the loop."""
+        _, client_cmd = endpoint_commands(spec, server_addr)
+        loop = asyncio.get_running_loop()
+        node = self.net.get(host)
+        first = sum(1 for c in self.clients if c.host == host)
+        for index in range(first, first + count):
+            log_path = os.path.join(self.out_dir, f"{host}-{index}.log")
+            proc = node.popen(client_cmd, cwd=HERE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL)
+            client = Client(host, index, proc, log_path)
+            reader = asyncio.StreamReader(limit=LINE_LIMIT)
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), proc.stdout)
+            self.clients.append(client)
+            self.readers.append(asyncio.create_task(self.pump(client, reader)))
+
+    async def pump(self, client, reader):
+        """Copy one client's output to its log and, best effort, to the queue."""
+        with open(client.log_path, "wb", buffering=1 << 16) as log:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Over-long line; the reader has already discarded it
+                    continue
+                if not line:
+                    break
+                log.write(line)
+                client.lines += 1
+                try:
+                    self.queue.put_nowait((client, line))
+                except asyncio.QueueFull:
+                    client.dropped += 1
+
+    async def action(self, host, cmd):
+        """Run a topology command on a node in the action pool, so the readers keep running."""
+        node = self.net.get(host)
+        return await asyncio.get_running_loop().run_in_executor(self.actions, node.cmd, cmd)
+
+    async def reap(self, proc, timeout=None):
+        """Wait for a terminated process off the loop, killing it after timeout seconds."""
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(loop.run_in_executor(None, proc.wait), timeout or STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await loop.run_in_executor(None, proc.wait)
+
+    async def stop(self):
+        """Terminate clients and servers and wait until all output is written."""
+        for client in self.clients:
+            client.proc.terminate()
+        # The readers keep draining the pipes while the clients exit
+        await asyncio.gather(*(self.reap(client.proc) for client in self.clients))
+        await asyncio.gather(*self.readers)
+        for proc, _ in self.servers:
+            proc.terminate()
+        await asyncio.gather(*(self.reap(proc) for proc, _ in self.servers))
+        for _, log in self.servers:
+            log.close()
+        self.actions.shutdown()
+
+    def summary(self):
+        return {
+            "clients": len(self.clients),
+            "lines": sum(c.lines for c in self.clients),
+            "dropped_for_consumers": sum(c.dropped for c in self.clients),
+            "exit_codes": sorted({c.proc.returncode for c in self.clients}, key=str),
+        }
+
+
+async def live_stats(orchestrator, period=1.0):
+    """Consumer printing echo rate and RTT percentiles over the last period."""
+    queue = orchestrator.queue
+    window = []
+    deadline = time.monotonic() + period
+    while True:
+        try:
+            lines = [await asyncio.wait_for(queue.get(), timeout=max(deadline - time.monotonic(), 0.001))]
+            while not queue.empty() and len(lines) < 4096:
+                lines.append(queue.get_nowait())
+            for record in iter_records(line for _, line in lines):
+                if record[0] == "echo":
+                    window.append(record[4])
+        except asyncio.TimeoutError:
+            pass
+        now = time.monotonic()
+        if now >= deadline:
+            dropped = sum(c.dropped for c in orchestrator.clients)
+            if window:
+                window.sort()
+                p50 = window[len(window) // 2]
+                p99 = window[min(len(window) - 1, len(window) * 99 // 100)]
+                print(f"  {len(window) / period:8.0f} echo/s  p50 {p50} ms  p99 {p99} ms  "
+                      f"dropped {dropped}", file=sys.stderr)
+            else:
+                print(f"  {0:8.0f} echo/s  dropped {dropped}", file=sys.stderr)
+            window.clear()
+            deadline = now + period
+
+
+async def run_timeline(orchestrator, events, layout, start):
+    """Issue scenario timeline actions at their offsets (seconds after start)."""
+    from scenarios import action_command
+    for event in sorted(events, key=lambda e: e["at"]):
+        delay = start + float(event["at"]) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        node, cmd = action_command(event, layout)
+        output = (await orchestrator.action(node, cmd)).strip()
+        print(f"  [{event['at']}s] {node} {cmd}" + (f": {output}" if output else ""), file=sys.stderr)
+
+
+async def run(net, layout, args):
+    spec = {"transport": args.transport, "interval_ms": args.interval_ms}
+    hosts = args.hosts or (layout["clients"] if layout else ["h1"])
+    server = layout["server"] if layout else "h2"
+    addr = layout["server_addr"] if layout else SERVER_ADDR
+
+    orchestrator = Orchestrator(net, args.output, queue_size=args.queue_size)
+    orchestrator.start_server(server, spec)
+    await asyncio.sleep(SERVER_STARTUP)
+
+    start = time.perf_counter()
+    for host in hosts:
+        await orchestrator.spawn_clients(host, args.clients_per_host, spec, addr)
+    print(f"*** {len(orchestrator.clients)} clients started in {time.perf_counter() - start:.2f}s",
+          file=sys.stderr)
+
+    consumer = asyncio.create_task(live_stats(orchestrator))
+    tasks = [consumer]
+    if args.timeline:
+        from scenarios import load_spec
+        events = load_spec(args.timeline).get("timeline") or []
+        tasks.append(asyncio.create_task(run_timeline(orchestrator, events, layout, time.monotonic())))
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+    await orchestrator.stop()
+
+    summary = orchestrator.summary()
+    with open(os.path.join(args.output, "orchestrate.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"✓ {summary['clients']} clients, {summary['lines']} lines, "
+          f"{summary['dropped_for_consumers']} dropped for live consumers", file=sys.stderr)
+    if args.ingest:
+        for client in orchestrator.clients:
+            ingest(client.log_path, os.path.splitext(client.log_path)[0] + ".echo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many concurrent client/server pairs")
+    parser.add_argument("--topology", help="topology.py spec (default: mn_migration network)")
+    parser.add_argument("--hosts", nargs="+", help="Client hosts (default: all clients)")
+    parser.add_argument("--clients-per-host", type=int, default=10)
+    parser.add_argument("--transport", choices=("quic", "tcp"), default="quic")
+    parser.add_argument("--interval-ms", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--timeline", help="Scenario file whose timeline: actions are applied during the run")
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE,
+                        help=f"Lines buffered for live consumers (default: {QUEUE_SIZE})")
+    parser.add_argument("--ingest", action="store_true", help="Ingest client logs into echo stores")
+    parser.add_argument("-o", "--output", default="runs/orchestrate", help="Output directory")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("Error: Mininet needs root", file=sys.stderr)
+        return 1
+
+    from mininet.log import setLogLevel
+    setLogLevel("warning")
+    if args.topology:
+        from topology import build_topology, load_spec, stop_topology
+        net, layout = build_topology(load_spec(args.topology))
+    else:
+        from mn_migration import build_network
+        net, layout = build_network(), None
+    try:
+        asyncio.run(run(net, layout, args))
+    finally:
+        if layout:
+            stop_topology(net, layout)
+        else:
+            net.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Replay recorded migration runs without Mininet.
+
+A run directory written by scenarios.py (or mn_migration.py --dashboard) is
+replayed into a new directory through the same code paths as the live run:
+
+- client logs, instrument.jsonl and events.log are re-emitted record by record
+  in the order of their timestamps, at --speed times real time, and written
+  to the new run the way the live harness writes them
+- the client output is fed to dashboard.LiveStats, so --live shows what the
+  live view showed (refreshed every --period seconds of recorded time)
+- the run is then finished with scenarios.finalize_run (echo stores and
+  timeline.jsonl), and a replayed sweep is collected with results.collect and
+  optionally rendered with results.render
+
+Replays are deterministic: the outputs depend only on the recorded files,
+not on the speed. --speed 0 (the default) runs unthrottled; when nothing
+observes the interleaving (no --live) the streams are copied directly. No
+root, network namespaces or tc are needed, so analysis changes can be
+iterated on from recorded sweeps, and long soak runs reprocessed faster
+than real time.
+
+Usage:
+  python3 replay.py run results/<run> -o /tmp/replay/<run> --speed 10 --live
+  python3 replay.py sweep results/ -o /tmp/replay --render
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from echo_log import field, open_log
+from scenarios import finalize_run
+
+# Files copied unchanged; they carry no per-record timestamps
+STATIC_FILES = ("server.log", "topology.json")
+
+# Timestamped streams next to the client logs
+TIMELINE_FILES = ("instrument.jsonl", "events.log")
+
+ECHO_KINDS = (b"QUIC_ECHO", b"TCP_ECHO")
+TX_KINDS = (b"QUIC_TX", b"TCP_TX")
+
+# Client lines handed to the live view per batch
+FEED_BATCH = 4096
+
+# Seconds the replay may run ahead of schedule before it sleeps
+PACE_SLACK = 0.002
+
+
+def client_lines(path):
+    """(t_ns, line) of a client log: recv_ms for echoes, send_ms for TX lines.
+
+    Other lines (stats, errors) take the time of the line before, so the
+    stream stays in log order.
+    """
+    last_ms = 0
+    with open_log(path) as f:
+        for line in f:
+            parts = line.split(None, 4)
+            try:
+                if parts[0] in ECHO_KINDS:
+                    last_ms = max(last_ms, int(field(parts[3])))
+                elif parts[0] in TX_KINDS:
+                    last_ms = max(last_ms, int(field(parts[2])))
+            except (IndexError, ValueError):
+                pass
+            yield last_ms * 1_000_000, line
+
+
+def timeline_lines(path):
+    """(t_ns, line) of a JSON-lines file whose records carry t_ns."""
+    last_ns = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                last_ns = int(json.loads(line)["t_ns"])
+            except (ValueError, KeyError, TypeError):
+                pass
+            yield last_ns, line
+
+
+def client_logs(run_dir):
+    return sorted(glob.glob(os.path.join(run_dir, "client*.log")))
+
+
+def replay_run(src, dst, speed=0.0, live=None, period=1.0):
+    """Replay one recorded run into dst and finish it; returns dst.
+
+    live is a dashboard.Dashboard fed with the first client log.
+    """
+    logs = client_logs(src)
+    if not logs:
+        raise ValueError(f"{src}: no client*.log to replay")
+    os.makedirs(dst, exist_ok=True)
+    try:
+        with open(os.path.join(src, "scenario.json"), "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    except FileNotFoundError:
+        spec = {"name": os.path.basename(os.path.normpath(src))}
+    spec["replay"] = {"source": os.path.abspath(src), "speed": speed}
+    with open(os.path.join(dst, "scenario.json"), "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+    for name in STATIC_FILES:
+        if os.path.exists(os.path.join(src, name)):
+            shutil.copyfile(os.path.join(src, name), os.path.join(dst, name))
+
+    sources = [(p, client_lines) for p in logs]
+    sources += [(os.path.join(src, name), timeline_lines) for name in TIMELINE_FILES
+                if os.path.exists(os.path.join(src, name))]
+    if not speed and live is None:
+        # Nothing observes the interleaving, so every stream can be copied as a whole
+        for path, _ in sources:
+            shutil.copyfile(path, os.path.join(dst, os.path.basename(path)))
+    else:
+        outputs = [open(os.path.join(dst, os.path.basename(p)), "wb", buffering=1 << 16)
+                   for p, _ in sources]
+        try:
+            replay_streams(
+                [reader(p) for p, reader in sources], outputs, speed, live, period)
+        finally:
+            for f in outputs:
+                f.close()
+
+    finalize_run(dst, [os.path.join(dst, os.path.basename(p)) for p in logs])
+    return dst
+
+
+def replay_streams(streams, outputs, speed, live, period):
+    """Merge the (t_ns, line) streams by time, pace them and write each to its output.
+
+    Stream 0 is the client log shown by the live view.
+    """
+    def tagged(i, stream):
+        for t_ns, line in stream:
+            yield t_ns, i, line
+
+    merged = heapq.merge(*[tagged(i, s) for i, s in enumerate(streams)], key=lambda r: r[0])
+    batch = []
+    first_ns = next_tick = None
+    wall_start = time.monotonic()
+    for t_ns, i, line in merged:
+        if first_ns is None:
+            first_ns = t_ns
+            next_tick = t_ns + period * 1e9
+        if speed:
+            delay = wall_start + (t_ns - first_ns) / 1e9 / speed - time.monotonic()
+            if delay > PACE_SLACK:
+                if live is not None:
+                    live.stats.feed(batch)
+                    batch.clear()
+                time.sleep(delay)
+        if live is not None:
+            while t_ns >= next_tick:
+                live.stats.feed(batch)
+                batch.clear()
+                live.update(wall=next_tick / 1e9)
+                next_tick += period * 1e9
+            if i == 0:
+                batch.append(line)
+                if len(batch) >= FEED_BATCH:
+                    live.stats.feed(batch)
+                    batch.clear()
+        outputs[i].write(line)
+    if live is not None:
+        live.stats.feed(batch)
+        if first_ns is not None:
+            live.update(wall=next_tick / 1e9)
+
+
+def replay_sweep(src, dst, speed=0.0, jobs=None):
+    """Replay every run of a sweep on a process pool; returns the failed run ids."""
+    runs = sorted(os.path.dirname(p) for p in glob.glob(os.path.join(src, "*", "scenario.json")))
+    if not runs:
+        raise ValueError(f"{src}: no runs (<run>/scenario.json)")
+    print(f"*** Replaying {len(runs)} runs -> {dst}", file=sys.stderr)
+    failed = []
+    start = time.monotonic()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(replay_run, run, os.path.join(dst, os.path.basename(run)), speed):
+                   os.path.basename(run) for run in runs}
+        for done, (future, run_id) in enumerate(futures.items(), 1):
+            try:
+                future.result()
+                mark = "✓"
+            except (OSError, ValueError) as e:
+                mark = f"✗ {e}"
+                failed.append(run_id)
+            print(f"  [{done}/{len(runs)}] {mark} {run_id}", file=sys.stderr)
+    print(f"*** {len(runs) - len(failed)} runs replayed in {time.monotonic() - start:.1f}s",
+          file=sys.stderr)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded runs without Mininet")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Replay one run directory")
+    p.add_argument("run", help="Recorded run directory")
+    p.add_argument("--live", action="store_true", help="Show the dashboard terminal view")
+    p.add_argument("--period", type=float, default=1.0,
+                   help="Seconds of recorded time between live refreshes (default: 1)")
+
+    p = sub.add_parser("sweep", help="Replay every run of a sweep and collect the results")
+    p.add_argument("sweep", help="Recorded sweep directory (scenarios.py sweep -o)")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="Parallel replays (default: CPU count)")
+    p.add_argument("--gap-ms", type=int, default=200)
+    p.add_argument("--rtt-factor", type=float, default=1.5)
+    p.add_argument("--render", action="store_true",
+                   help="Also render tables and figures into <output>/figures and <output>/results.md")
+
+    for p in sub.choices.values():
+        p.add_argument("-o", "--output", required=True, help="Directory for the replayed run(s)")
+        p.add_argument("--speed", type=float, default=0.0,
+                       help="Multiple of real time, 0 for unthrottled (default: 0)")
+    args = parser.parse_args()
+
+    if os.path.abspath(args.output) == os.path.abspath(getattr(args, "run", None) or args.sweep):
+        print("Error: the output directory must differ from the recording", file=sys.stderr)
+        return 1
+
+    if args.command == "run":
+        live = None
+        if args.live:
+            from dashboard import Dashboard, LiveStats
+            live = Dashboard(LiveStats())
+        start = time.monotonic()
+        try:
+            dst = replay_run(args.run, args.output, args.speed, live, args.period)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            return 130
+        print(f"✓ Replayed: {dst} ({time.monotonic() - start:.1f}s)", file=sys.stderr)
+        return 0
+
+    try:
+        failed = replay_sweep(args.sweep, args.output, args.speed, args.jobs)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if failed:
+        print(f"✗ {len(failed)} runs failed", file=sys.stderr)
+        return 1
+    from results import collect, render
+    results_file = collect(args.output, gap_ms=args.gap_ms, rtt_factor=args.rtt_factor)
+    if args.render:
+        render(results_file, os.path.join(args.output, "figures"),
+               os.path.join(args.output, "results.md"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Compact per-sweep results and pgfplots/table generation for the evaluation chapter.
+
+collect turns the run directories of a scenarios.py sweep into one columnar
+file, sweep.results:
+
+  magic, header length, JSON header, then one raw array per column
+  (t_ms, rtt_ms, path for every echo of every client, run after run)
+
+The header holds, per client run, the sweep parameters, its row range and
+the scalar metrics from migration_analysis.analyze() (loss, bursts, gaps,
+recovery time, RTT percentiles). Columns are memory-mapped on read, as in
+echo_log.py. collect is skipped while no store of the sweep has changed.
+
+render writes, from a results file:
+
+- <data-dir>/<run>.dat: the RTT series of every run for pgfplots, reduced
+  to the minimum and maximum RTT of each of --buckets time buckets, so spikes
+  survive while a 100k-point series becomes at most 2 x buckets points
+- <data-dir>/summary.md: per sweep point medians as a Markdown table
+- a chapter section (Markdown with raw LaTeX) with the same table and one
+  pgfplots figure per sweep point, ready to list in chapters/evaluation/config.yaml
+
+The figures need the pgfplots package (texlive-pictures), which main.tex
+loads when it is installed; without it they compile to a placeholder box.
+
+Outputs are regenerated only when the results file or the options change.
+
+Usage:
+  python3 results.py collect results/
+  python3 results.py render results/sweep.results
+  python3 results.py info results/sweep.results
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+from echo_log import EchoStore
+from migration_analysis import analyze, latex_table, load_batch
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+from build_io import atomic_output, write_if_changed  # noqa: E402
+from extract_metadata import latex_escape  # noqa: E402
+
+RESULTS_VERSION = 1
+MAGIC = b"QRESULTS"
+
+# column -> array typecode; t_ms is relative to the first echo of the run
+COLUMNS = [("t_ms", "I"), ("rtt_ms", "I"), ("path", "h")]
+
+DEFAULT_BUCKETS = 500
+
+SUMMARY_COLUMNS = [
+    ("point", "Sweep point", "{}"),
+    ("runs", "Runs", "{}"),
+    ("lost", "Lost", "{:.0f}"),
+    ("max_gap_ms", "Max gap (ms)", "{:.0f}"),
+    ("ttr_ms", "Recovery (ms)", "{:.0f}"),
+    ("p50", "p50 (ms)", "{:.1f}"),
+    ("p99", "p99 (ms)", "{:.1f}"),
+]
+
+
+def source_stamps(stores):
+    """(size, mtime_ns) of every store's meta.json, which is written last."""
+    stamps = {}
+    for store in stores:
+        st = os.stat(os.path.join(store, "meta.json"))
+        stamps[store] = [st.st_size, st.st_mtime_ns]
+    return stamps
+
+
+def find_runs(sweep_dir):
+    """[(run directory, resolved scenario, [echo stores])] of a sweep, sorted by run id."""
+    runs = []
+    for spec_file in sorted(glob.glob(os.path.join(sweep_dir, "*", "scenario.json"))):
+        run_dir = os.path.dirname(spec_file)
+        stores = sorted(glob.glob(os.path.join(run_dir, "*.echo")))
+        if not stores:
+            continue
+        with open(spec_file, "r", encoding="utf-8") as f:
+            runs.append((run_dir, json.load(f), stores))
+    return runs
+
+
+def point_label(params):
+    return ", ".join(f"{k}={v}" for k, v in sorted(params.items())) or "default"
+
+
+class SweepResults:
+    """Read-only, memory-mapped view of a file written by collect()."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a results file")
+        (length,) = struct.unpack_from("<Q", self.data, len(MAGIC))
+        start = len(MAGIC) + 8
+        self.header_bytes = bytes(self.data[start:start + length])
+        self.header = json.loads(self.header_bytes)
+        if self.header.get("version") != RESULTS_VERSION:
+            raise ValueError(f"{path}: unsupported results version {self.header.get('version')}")
+        if self.header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path}: written on a {self.header['byteorder']}-endian host")
+        self.runs = self.header["runs"]
+        self.paths = self.header["paths"]
+
+    def numpy(self, name):
+        """A whole column as a read-only numpy array."""
+        code, offset, count = self.header["columns"][name]
+        return np.frombuffer(self.data, dtype=np.dtype(code), count=count, offset=offset)
+
+    def series(self, i):
+        """{column: array} of one run."""
+        start, end = self.runs[i]["rows"]
+        return {name: self.numpy(name)[start:end] for name, _ in COLUMNS}
+
+    def digest(self):
+        """Content hash of the header, which changes with any run or metric."""
+        return hashlib.sha256(self.header_bytes).hexdigest()
+
+    def close(self):
+        """Release the mapping (arrays still referencing it keep it alive)."""
+        try:
+            self.data.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+
+def collect(sweep_dir, output=None, gap_ms=200, rtt_factor=1.5, force=False):
+    """Write the results file of a sweep; returns its path."""
+    output = output or os.path.join(sweep_dir, "sweep.results")
+    runs = find_runs(sweep_dir)
+    if not runs:
+        raise ValueError(f"{sweep_dir}: no runs with ingested .echo stores")
+    stores = [store for _, _, run_stores in runs for store in run_stores]
+    stamps = source_stamps(stores)
+    options = {"gap_ms": gap_ms, "rtt_factor": rtt_factor}
+
+    if not force and os.path.exists(output):
+        try:
+            previous = SweepResults(output)
+            fresh = previous.header["sources"] == stamps and previous.header["options"] == options
+            previous.close()
+            if fresh:
+                print(f"✓ Unchanged: {output}", file=sys.stderr)
+                return output
+        except (ValueError, KeyError, struct.error):
+            pass
+
+    metrics = analyze(load_batch(stores), gap_ms=gap_ms, rtt_factor=rtt_factor)["runs"]
+    entries = []
+    columns = {name: [] for name, _ in COLUMNS}
+    paths = {}
+    rows = 0
+    metric_iter = iter(metrics)
+    for run_dir, spec, run_stores in runs:
+        for store_path in run_stores:
+            store = EchoStore(store_path)
+            recv = store.numpy("echo", "recv_ms").astype(np.int64)
+            remote = store.numpy("echo", "remote").astype(np.int64)
+            # Path ids are per store; map them onto one table for the sweep
+            mapping = np.array([paths.setdefault(r, len(paths)) for r in store.remotes] or [0],
+                               dtype=np.int64)
+            columns["t_ms"].append(recv - recv[0] if len(recv) else recv)
+            columns["rtt_ms"].append(store.numpy("echo", "app_rtt_ms"))
+            columns["path"].append(np.where(remote < 0, -1, mapping[np.maximum(remote, 0)]))
+            store.close()
+            entries.append({
+                "run": os.path.basename(run_dir),
+                "client": os.path.splitext(os.path.basename(store_path))[0],
+                "params": spec.get("params") or {},
+                "repeat": spec.get("repeat", 0),
+                "rows": [rows, rows + len(recv)],
+                "metrics": {k: v for k, v in next(metric_iter).items() if k != "run"},
+            })
+            rows += len(recv)
+
+    header = {
+        "version": RESULTS_VERSION,
+        "byteorder": sys.byteorder,
+        "sweep": os.path.basename(os.path.normpath(sweep_dir)),
+        "name": runs[0][1].get("name", "run"),
+        "options": options,
+        "sources": stamps,
+        "paths": sorted(paths, key=paths.get),
+        "runs": entries,
+        "columns": {},
+    }
+    # Column offsets depend on the header length, which depends on the offsets
+    arrays = {name: np.concatenate(columns[name]).astype(np.dtype(code)) for name, code in COLUMNS}
+    encoded = b""
+    while len(json.dumps(header).encode("utf-8")) != len(encoded):
+        encoded = json.dumps(header).encode("utf-8")
+        offset = len(MAGIC) + 8 + len(encoded)
+        for name, code in COLUMNS:
+            offset += -offset % np.dtype(code).itemsize
+            header["columns"][name] = [code, offset, len(arrays[name])]
+            offset += arrays[name].nbytes
+    encoded = json.dumps(header).encode("utf-8")
+
+    with atomic_output(output) as f:
+        f.write(MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+        for name, code in COLUMNS:
+            f.write(b"\0" * (header["columns"][name][1] - f.tell()))
+            arrays[name].tofile(f)
+    print(f"✓ Generated: {output} ({len(entries)} runs, {rows} echoes)", file=sys.stderr)
+    return output
+
+
+def downsample(t, y, buckets=DEFAULT_BUCKETS):
+    """Indices of the min and max y in each of `buckets` equal time buckets.
+
+    Returns sorted row indices, at most 2 x buckets of them; the first and
+    last rows are always kept. t must be non-decreasing.
+    """
+    n = len(t)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    span = max(int(t[-1]) - int(t[0]), 1)
+    bucket = np.minimum((t.astype(np.int64) - int(t[0])) * buckets // span, buckets - 1)
+    order = np.lexsort((y, bucket))
+    b_sorted = bucket[order]
+    starts = np.flatnonzero(np.r_[True, b_sorted[1:] != b_sorted[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends], [0, n - 1]]))
+
+
+def summarize(results):
+    """Per sweep point medians of the run metrics, in first-seen order."""
+    groups = {}
+    for run in results.runs:
+        groups.setdefault(point_label(run["params"]), []).append(run["metrics"])
+    rows = []
+    for point, metrics in groups.items():
+        row = {"point": point, "runs": len(metrics)}
+        for key in ("lost", "max_gap_ms", "ttr_ms", "p50", "p99"):
+            row[key] = float(np.median([m[key] for m in metrics]))
+        rows.append(row)
+    return rows
+
+
+def markdown_table(rows, columns):
+    lines = ["| " + " | ".join(h for _, h, _ in columns) + " |",
+             "|" + "|".join("---" if k == columns[0][0] else "---:" for k, _, _ in columns) + "|"]
+    for row in rows:
+        lines.append("| " + " | ".join(fmt.format(row[k]) for k, _, fmt in columns) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").lower()
+
+
+def pgfplots_figure(dat_file, caption, label):
+    """Figure environment plotting a .dat file; a placeholder box where pgfplots is not loaded."""
+    return "\n".join([
+        r"\begin{figure}[h]",
+        r"\centering",
+        r"\ifdefined\pgfplotsversion",
+        r"\begin{tikzpicture}",
+        r"\begin{axis}[width=\linewidth, height=5cm, xlabel={Time (s)}, ylabel={RTT (ms)},",
+        r"  ymin=0, grid=major, grid style={gray!30}]",
+        f"\\addplot[mark=none, blue] table[x=t_s, y=rtt_ms] {{{dat_file}}};",
+        r"\end{axis}",
+        r"\end{tikzpicture}",
+        r"\else",
+        r"\fbox{\parbox{0.9\linewidth}{\centering pgfplots is not installed (texlive-pictures)}}",
+        r"\fi",
+        f"\\caption{{{caption}}}",
+        f"\\label{{{label}}}",
+        r"\end{figure}",
+    ]) + "\n"
+
+
+def render(results_file, data_dir=None, markdown=None, buckets=DEFAULT_BUCKETS, force=False):
+    """Write pgfplots data, the summary table and the chapter section; returns the outputs."""
+    results = SweepResults(results_file)
+    name = slug(results.header["name"])
+    data_dir = data_dir or os.path.join(ROOT, "figures", name)
+    markdown = markdown or os.path.join(ROOT, "chapters", "evaluation", f"results-{name}.md")
+    stamp_file = os.path.join(data_dir, ".render.json")
+    stamp = {"version": RESULTS_VERSION, "source": results.digest(), "buckets": buckets,
+             "markdown": os.path.abspath(markdown)}
+    try:
+        with open(stamp_file, "r", encoding="utf-8") as f:
+            if not force and json.load(f) == stamp:
+                print(f"✓ Unchanged: {data_dir}, {markdown}", file=sys.stderr)
+                results.close()
+                return []
+    except (FileNotFoundError, ValueError):
+        pass
+
+    os.makedirs(data_dir, exist_ok=True)
+    outputs = []
+    # pdflatex runs from the repository root, so figures reference data from there
+    data_ref = os.path.relpath(data_dir, ROOT).replace(os.sep, "/")
+    first_of_point = {}
+    for i, run in enumerate(results.runs):
+        series = results.series(i)
+        keep = downsample(series["t_ms"], series["rtt_ms"], buckets)
+        t = series["t_ms"][keep] / 1000
+        rtt = series["rtt_ms"][keep]
+        path = series["path"][keep]
+        dat_name = f"{slug(run['run'])}-{slug(run['client'])}.dat"
+        content = "t_s rtt_ms path\n" + "".join(
+            f"{a:.3f} {b} {c}\n" for a, b, c in zip(t.tolist(), rtt.tolist(), path.tolist()))
+        if write_if_changed(os.path.join(data_dir, dat_name), content):
+            outputs.append(os.path.join(data_dir, dat_name))
+        first_of_point.setdefault(point_label(run["params"]), dat_name)
+
+    rows = summarize(results)
+    summary = markdown_table(rows, SUMMARY_COLUMNS)
+    if write_if_changed(os.path.join(data_dir, "summary.md"), summary):
+        outputs.append(os.path.join(data_dir, "summary.md"))
+
+    sections = [
+        f"<!-- Auto-generated by experiments/results.py from {os.path.basename(results_file)}"
+        " - do not edit -->\n",
+        latex_table(rows, SUMMARY_COLUMNS, f"Median loss, recovery and RTT per sweep point ({name}).",
+                    f"tab:{name}-summary"),
+    ]
+    for point, dat_name in first_of_point.items():
+        sections.append(pgfplots_figure(
+            f"{data_ref}/{dat_name}",
+            latex_escape(f"Application RTT over time, {point} (first run, min/max per "
+                         f"{buckets} time buckets)."),
+            f"fig:{name}-{slug(point)}"))
+    if write_if_changed(markdown, "\n".join(sections)):
+        outputs.append(markdown)
+    results.close()
+
+    write_if_changed(stamp_file, json.dumps(stamp))
+    for path in outputs:
+        print(f"✓ Generated: {path}", file=sys.stderr)
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-sweep results files and pgfplots/table output")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("collect", help="Gather the runs of a sweep into one results file")
+    p.add_argument("sweep", help="Sweep output directory (scenarios.py sweep -o)")
+    p.add_argument("-o", "--output", help="Results file (default: <sweep>/sweep.results)")
+    p.add_argument("--gap-ms", type=int, default=200)
+    p.add_argument("--rtt-factor", type=float, default=1.5)
+    p.add_argument("-f", "--force", action="store_true", help="Rebuild even if no store changed")
+
+    p = sub.add_parser("render", help="Write pgfplots data and tables from a results file")
+    p.add_argument("results")
+    p.add_argument("--data-dir", help="Directory for .dat files (default: figures/<name>/)")
+    p.add_argument("--markdown", help="Chapter section to write "
+                                      "(default: chapters/evaluation/results-<name>.md)")
+    p.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS,
+                   help=f"Time buckets per series, 2 points each (default: {DEFAULT_BUCKETS})")
+    p.add_argument("-f", "--force", action="store_true", help="Rewrite even if nothing changed")
+
+    p = sub.add_parser("info", help="List the runs and metrics of a results file")
+    p.add_argument("results")
+
+    args = parser.parse_args()
+    if args.command == "collect":
+        collect(args.sweep, args.output, args.gap_ms, args.rtt_factor, args.force)
+    elif args.command == "render":
+        render(args.results, args.data_dir, args.markdown, args.buckets, args.force)
+    else:
+        results = SweepResults(args.results)
+        print(f"{results.header['name']}: {len(results.runs)} runs, "
+              f"{results.header['columns']['t_ms'][2]} echoes, paths {', '.join(results.paths) or '-'}")
+        for row in summarize(results):
+            print("  " + "  ".join(f"{fmt.format(row[k]):>12}" for k, _, fmt in SUMMARY_COLUMNS))
+        results.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
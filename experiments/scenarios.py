@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Scripted, non-interactive migration scenarios on the mn_migration topology.
+
+A scenario is a YAML (or JSON) file with a declarative timeline:
+
+  name: route-switch
+  transport: quic            # quic | tcp
+  duration: 15               # seconds the client runs
+  interval_ms: 100
+  sample_ms: 10              # interface counter sampling (instrument.py)
+  qdisc_ms: 100              # qdisc statistics sampling, 0 disables
+  topology: {paths: 4, clients: 8}   # optional, see topology.py; default is mn_migration
+  netem:                     # qdiscs applied before the client starts
+    h1-eth1: "delay {delay} loss {loss}"
+  timeline:
+    - at: 5
+      route: {node: h1, dst: 10.0.3.0/24, via: 10.0.2.254, dev: h1-eth1, src: 10.0.2.1}
+    - at: 10
+      link: {node: h1, intf: h1-eth0, state: down}
+    - at: 12
+      netem: {node: h1, intf: h1-eth1, params: "delay 80ms loss 1%"}   # params: null deletes
+    - at: 13
+      cmd: {node: h1, run: "ip route"}
+    - at: 14
+      path: {node: h1, to: 3}     # topology.py only: move h1 to path 3
+  repeat: 20                 # runs per sweep point
+  sweep:                     # cartesian product, substituted into {placeholders}
+    delay: [10ms, 50ms]
+    loss: ["0%", "1%"]
+
+Every run gets its own directory with the resolved scenario, client.log,
+server.log, events.log, the ingested client.echo store (client-<host>.log
+and client-<host>.echo with several clients) and timeline.jsonl, which merges
+the timestamped actions, interface/qdisc samples and client events. Sweeps run on a
+worker pool; each run executes in a private network namespace (unshare --net),
+so parallel Mininet topologies do not collide on interface names or addresses.
+results.py collects a finished sweep into one results file and renders its
+tables and pgfplots figures for the evaluation chapter; replay.py feeds
+recorded runs through the same steps again without Mininet.
+
+Usage (as root):
+  python3 scenarios.py sweep route-switch.yaml -o results/ -j 8
+  python3 scenarios.py run-one results/<run>/scenario.json results/<run>
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BIN_DIR = os.path.join(HERE, "target", "release")
+
+SERVER_ADDR = "10.0.3.2"
+PORTS = {"quic": 4433, "tcp": 5000}
+
+# Seconds to let the server bind before the client connects
+SERVER_STARTUP = 0.5
+
+# {name} placeholders filled from the sweep parameters
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def load_spec(path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        import yaml
+        return yaml.safe_load(f)
+
+
+def substitute(value, params):
+    """Fill {placeholders} in every string of a spec fragment.
+
+    Only the sweep parameters are replaced; other braces (awk programs,
+    JSON, ${VAR}) are left as written.
+    """
+    if isinstance(value, str):
+        if not params:
+            return value
+        return PLACEHOLDER.sub(
+            lambda m: str(params[m.group(1)]) if m.group(1) in params else m.group(0), value)
+    if isinstance(value, list):
+        return [substitute(v, params) for v in value]
+    if isinstance(value, dict):
+        return {k: substitute(v, params) for k, v in value.items()}
+    return value
+
+
+def expand_runs(spec):
+    """Expand sweep x repeat into (run_id, resolved spec) pairs."""
+    sweep = spec.get("sweep") or {}
+    names = sorted(sweep)
+    base = {k: v for k, v in spec.items() if k not in ("sweep", "repeat")}
+    runs = []
+    for values in itertools.product(*(sweep[n] for n in names)):
+        params = dict(zip(names, values))
+        point = "-".join(f"{n}={v}" for n, v in params.items())
+        for rep in range(int(spec.get("repeat", 1))):
+            run_id = "-".join(filter(None, [spec.get("name", "run"), point, f"r{rep:03d}"]))
+            run_id = re.sub(r"[^A-Za-z0-9=._-]", "_", run_id)
+            runs.append((run_id, dict(substitute(base, params), params=params, repeat=rep)))
+    return runs
+
+
+def action_command(event, layout=None):
+    """Translate one timeline entry into (node, shell command)."""
+    if "route" in event:
+        r = event["route"]
+        cmd = f"ip route replace {r['dst']} via {r['via']} dev {r['dev']}"
+        return r["node"], cmd + (f" src {r['src']}" if r.get("src") else "")
+    if "link" in event:
+        l = event["link"]
+        return l["node"], f"ip link set {l['intf']} {l['state']}"
+    if "netem" in event:
+        n = event["netem"]
+        if n.get("params"):
+            return n["node"], f"tc qdisc replace dev {n['intf']} root netem {n['params']}"
+        return n["node"], f"tc qdisc del dev {n['intf']} root"
+    if "path" in event:
+        if layout is None:
+            raise ValueError("path actions need a topology: section")
+        from topology import path_route
+        p = event["path"]
+        return p["node"], path_route(p["node"], layout["initial_path"], int(p["to"]))
+    if "cmd" in event:
+        return event["cmd"]["node"], event["cmd"]["run"]
+    raise ValueError(f"unknown timeline action: {event}")
+
+
+def endpoint_commands(spec, server_addr=SERVER_ADDR):
+    """Server and client argv for the scenario's transport."""
+    transport = spec.get("transport", "quic")
+    port = PORTS[transport]
+    interval = str(spec.get("interval_ms", 100))
+    if transport == "quic":
+        server = [os.path.join(BIN_DIR, "quic_server"), "--bind", f"0.0.0.0:{port}"]
+        client = [os.path.join(BIN_DIR, "quic_client"), "--server-addr", f"{server_addr}:{port}",
+                  "--interval-ms", interval]
+    else:
+        server = [os.path.join(BIN_DIR, "tcp_server"), "--bind", f"0.0.0.0:{port}"]
+        client = [os.path.join(BIN_DIR, "tcp_client"), "--server-addr", f"{server_addr}:{port}",
+                  "--interval-ms", interval]
+    return server, client
+
+
+def run_one(spec, out_dir):
+    """Run a single resolved scenario in the current network namespace."""
+    from mininet.log import setLogLevel
+    from instrument import Timeline
+
+    setLogLevel("warning")
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "scenario.json"), "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+
+    if spec.get("topology"):
+        from topology import build_topology, stop_topology
+        net, layout = build_topology(spec["topology"])
+        clients, server, addr = layout["clients"], layout["server"], layout["server_addr"]
+    else:
+        from mn_migration import build_network
+        net, layout = build_network(), None
+        clients, server, addr = ["h1"], "h2", SERVER_ADDR
+    client_logs = [os.path.join(out_dir, "client.log" if len(clients) == 1 else f"client-{c}.log")
+                   for c in clients]
+
+    timeline = Timeline(out_dir, interval=spec.get("sample_ms", 10) / 1000,
+                        qdisc_interval=spec.get("qdisc_ms", 100) / 1000)
+    timeline.watch({host.name: host.pid for host in net.hosts})
+    timeline.start()
+
+    procs, logs = [], []
+    try:
+        for intf, params in (spec.get("netem") or {}).items():
+            node = net.get(intf.split("-")[0])
+            timeline.run(node, f"tc qdisc replace dev {intf} root netem {params}", phase="setup")
+
+        server_cmd, client_cmd = endpoint_commands(spec, addr)
+        server_log = open(os.path.join(out_dir, "server.log"), "wb")
+        logs.append(server_log)
+        procs.append(net.get(server).popen(server_cmd, cwd=HERE, stdout=server_log,
+                                           stderr=subprocess.STDOUT))
+        time.sleep(SERVER_STARTUP)
+
+        start = time.monotonic()
+        timeline.record("start", clients=clients)
+        for client, path in zip(clients, client_logs):
+            logs.append(open(path, "wb"))
+            procs.append(net.get(client).popen(client_cmd, cwd=HERE, stdout=logs[-1],
+                                               stderr=subprocess.STDOUT))
+
+        with open(os.path.join(out_dir, "events.log"), "w", encoding="utf-8") as events:
+            for event in sorted(spec.get("timeline") or [], key=lambda e: e["at"]):
+                delay = start + float(event["at"]) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                node, cmd = action_command(event, layout)
+                issued = timeline.now()
+                output = timeline.run(net.get(node), cmd, at=event["at"]).strip()
+                events.write(json.dumps({"at": event["at"], "t_ns": issued, "node": node,
+                                         "cmd": cmd, "output": output}) + "\n")
+                events.flush()
+
+            remaining = start + float(spec.get("duration", 10)) - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        for log in logs:
+            log.close()
+        timeline.stop()
+        if layout is None:
+            net.stop()
+        else:
+            stop_topology(net, layout)
+            with open(os.path.join(out_dir, "topology.json"), "w", encoding="utf-8") as f:
+                json.dump(layout, f, indent=2)
+
+    finalize_run(out_dir, client_logs)
+    return True
+
+
+def finalize_run(out_dir, client_logs):
+    """Ingest the client logs into echo stores and write timeline.jsonl.
+
+    Shared by live runs and replay.py, so both hand the analysis the same files.
+    """
+    from echo_log import ingest
+    from instrument import merge
+
+    for path in client_logs:
+        ingest(path, os.path.splitext(path)[0] + ".echo")
+    merge(out_dir, client_logs)
+
+
+def run_isolated(run_id, spec, out_root):
+    """Run one scenario in a fresh network namespace via a child interpreter."""
+    out_dir = os.path.join(out_root, run_id)
+    os.makedirs(out_dir, exist_ok=True)
+    spec_file = os.path.join(out_dir, "scenario.json")
+    with open(spec_file, "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+
+    start = time.monotonic()
+    with open(os.path.join(out_dir, "runner.log"), "wb") as log:
+        result = subprocess.run(
+            ["unshare", "--net", "--", sys.executable, os.path.abspath(__file__),
+             "run-one", spec_file, out_dir],
+            cwd=HERE, stdout=log, stderr=subprocess.STDOUT,
+        )
+    return run_id, result.returncode == 0, time.monotonic() - start
+
+
+def sweep(spec, out_root, jobs):
+    """Run every sweep point x repeat on a pool of isolated workers."""
+    runs = expand_runs(spec)
+    print(f"*** {len(runs)} runs on {jobs} workers -> {out_root}", file=sys.stderr)
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_isolated, run_id, s, out_root) for run_id, s in runs]
+        for done, future in enumerate(futures, 1):
+            run_id, ok, seconds = future.result()
+            mark = "✓" if ok else "✗"
+            print(f"  [{done}/{len(runs)}] {mark} {run_id} ({seconds:.1f}s)", file=sys.stderr)
+            if not ok:
+                failed.append(run_id)
+    if failed:
+        print(f"✗ {len(failed)} runs failed, see <run>/runner.log", file=sys.stderr)
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripted migration scenarios")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sweep", help="Run all sweep points and repeats of a scenario")
+    p.add_argument("spec", help="Scenario YAML/JSON file")
+    p.add_argument("-o", "--output", default="results", help="Output directory (default: results)")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="Parallel runs (default: CPU count)")
+
+    p = sub.add_parser("run-one", help="Run one resolved scenario in this namespace")
+    p.add_argument("spec")
+    p.add_argument("output")
+
+    p = sub.add_parser("plan", help="List the runs a scenario expands to")
+    p.add_argument("spec")
+
+    args = parser.parse_args()
+    spec = load_spec(args.spec)
+
+    if args.command == "plan":
+        for run_id, _ in expand_runs(spec):
+            print(run_id)
+        return 0
+    if os.geteuid() != 0:
+        print("Error: scenarios need root (Mininet, network namespaces)", file=sys.stderr)
+        return 1
+    if args.command == "run-one":
+        return 0 if run_one(spec, args.output) else 1
+    return 0 if sweep(spec, args.output, args.jobs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
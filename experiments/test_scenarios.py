@@ -0,0 +1,23 @@
+"""Sweep expansion of scenarios.py (no Mininet needed)."""
+
+from scenarios import expand_runs, substitute
+
+
+def test_substitute_fills_only_sweep_parameters():
+    cmd = "tc -s qdisc show dev {dev} | awk '{print $1}' && echo ${HOME} '{\"delay\": \"{delay}\"}'"
+    assert substitute(cmd, {"dev": "r1-eth0", "delay": "10ms"}) == (
+        "tc -s qdisc show dev r1-eth0 | awk '{print $1}' && echo ${HOME} '{\"delay\": \"10ms\"}'")
+
+
+def test_expand_runs_keeps_braced_commands():
+    spec = {
+        "name": "route-switch",
+        "sweep": {"delay": ["10ms", "50ms"]},
+        "timeline": [{"at": 1, "cmd": "tc qdisc change dev r1-eth0 root netem delay {delay}"},
+                     {"at": 2, "cmd": "ip -j route | jq '.[] | {dst}'"}],
+    }
+    runs = expand_runs(spec)
+    assert [run_id for run_id, _ in runs] == ["route-switch-delay=10ms-r000", "route-switch-delay=50ms-r000"]
+    timeline = runs[1][1]["timeline"]
+    assert timeline[0]["cmd"].endswith("delay 50ms")
+    assert timeline[1]["cmd"] == "ip -j route | jq '.[] | {dst}'"
@@ -0,0 +1,75 @@
+"""Reachability checks on the ip -batch plan of topology.py (no Mininet needed)."""
+
+import ipaddress
+
+import pytest
+
+from topology import SERVER, normalize_spec, path_route, plan, server_addr
+
+
+class PlannedNetwork:
+    """Addresses, routes and links of a plan, with hop-by-hop IPv4 forwarding."""
+
+    def __init__(self, spec):
+        links, scripts = plan(spec)
+        self.peer = {}
+        for n1, i1, n2, i2 in links:
+            self.peer[(n1, i1)] = (n2, i2)
+            self.peer[(n2, i2)] = (n1, i1)
+        self.addrs = {}
+        self.routes = {}
+        for node, script in scripts.items():
+            for line in script["ip"]:
+                self.apply(node, line)
+
+    def apply(self, node, line):
+        words = line.split()
+        if words[:2] == ["addr", "add"]:
+            iface = ipaddress.ip_interface(words[2])
+            self.addrs.setdefault(node, []).append((iface, words[4]))
+            self.routes.setdefault(node, {})[iface.network] = (None, words[4])
+        elif words[0] == "route" and words[1] in ("add", "replace"):
+            opts = dict(zip(words[3::2], words[4::2]))
+            self.routes.setdefault(node, {})[ipaddress.ip_network(words[2])] = (opts["via"], opts["dev"])
+
+    def owner(self, addr):
+        addr = ipaddress.ip_address(addr)
+        for node, ifaces in self.addrs.items():
+            if any(iface.ip == addr for iface, _ in ifaces):
+                return node
+        return None
+
+    def deliver(self, node, dst, max_hops=8):
+        """Node that accepts a packet sent from node to dst, or None if it is dropped."""
+        dst = ipaddress.ip_address(dst)
+        for _ in range(max_hops):
+            if any(iface.ip == dst for iface, _ in self.addrs.get(node, [])):
+                return node
+            matches = [net for net in self.routes.get(node, {}) if dst in net]
+            if not matches:
+                return None
+            via, dev = self.routes[node][max(matches, key=lambda n: n.prefixlen)]
+            neighbor, _ = self.peer[(node, dev)]
+            if via is not None and self.owner(via) != neighbor:
+                return None
+            node = neighbor
+        return None
+
+
+@pytest.mark.parametrize("paths,clients", [(2, 1), (3, 2), (4, 3)])
+def test_every_path_migration_reaches_the_server_and_back(paths, clients):
+    spec = normalize_spec({"paths": paths, "clients": clients})
+    for i in range(1, clients + 1):
+        client = f"h{i}"
+        for dst in range(1, paths + 1):
+            for via in range(1, paths + 1):
+                net = PlannedNetwork(spec)
+                net.apply(client, path_route(client, dst, via).replace("ip route ", "route ", 1))
+                assert net.deliver(client, server_addr(dst)) == SERVER, (client, dst, via)
+                assert net.deliver(SERVER, f"10.{via}.{i}.1") == client, (client, dst, via)
+
+
+def test_routers_forward_other_server_addresses_to_their_own_server_interface():
+    _, scripts = plan(normalize_spec({"paths": 3, "clients": 1}))
+    assert "route add 10.2.0.2/32 via 10.1.0.2 dev r1-eth1" in scripts["r1"]["ip"]
+    assert not any(line.startswith(f"route add {server_addr(1)}") for line in scripts["r1"]["ip"])
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Parameterized multipath topology: K parallel paths between M clients and a server.
+
+  h1..hM --(access)-- r1..rK --(core)-- srv
+
+Every client has one interface per path and every path has its own router, so
+a client can migrate between K disjoint paths. Addressing:
+
+  client hI on path K   hI-eth{K-1}  10.K.I.1/24   (router rK: 10.K.I.254)
+  server on path K      srv-eth{K-1} 10.K.0.2/24   (router rK: 10.K.0.1)
+
+Each server address 10.P.0.2 is reached through path P at start; clients talk
+to the address of initial_path, and migrating means replacing its /24 route
+with one through another path (see path_route()). The server returns traffic
+to path K through 10.K.0.0/16, and every router rK forwards the other
+server addresses to the server's interface on its own path (10.K.0.2).
+
+Mininet configures each interface, qdisc and route with its own command in the
+node's shell. Here the veth pairs are created with one `ip -batch` in the root
+namespace, and each node gets all its sysctls, addresses, routes and qdiscs in
+a single shell round trip (`ip -batch` + `tc -batch`), sent to all nodes at
+once. Setup and teardown are timed per phase.
+
+Spec (YAML/JSON, or --paths/--clients):
+
+  paths: 8                   # or a list of per-path overrides:
+                             #   - {access: {delay: 30ms}, core: {loss: 1}}
+  clients: 24
+  access: {bw: 100, delay: 10ms, loss: 0}
+  core: {bw: 100, delay: 5ms, loss: 0}
+  initial_path: 1
+
+Usage (as root):
+  python3 topology.py --paths 8 --clients 24 --cli
+  python3 topology.py spec.yaml
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from scenarios import load_spec
+
+DEFAULT_SPEC = {
+    "paths": 2,
+    "clients": 1,
+    "access": {"bw": 100, "delay": "10ms", "loss": 0},
+    "core": {"bw": 100, "delay": "5ms", "loss": 0},
+    "initial_path": 1,
+}
+
+SERVER = "srv"
+
+SYSCTLS = {
+    "net.ipv4.conf.all.rp_filter": 0,
+    "net.ipv4.conf.default.rp_filter": 0,
+}
+ROUTER_SYSCTLS = dict(SYSCTLS, **{"net.ipv4.ip_forward": 1})
+
+
+def bulk_link():
+    """Link class for veth pairs that already exist and are deleted with their namespace.
+
+    Built on first use, so plan() and path_route() work without Mininet installed.
+    """
+    from mininet.link import Intf, Link
+
+    class BulkIntf(Intf):
+        """Interface configured by the node's batch script instead of ifconfig calls."""
+
+        def config(self, **params):
+            return {}
+
+    class BulkLink(Link):
+        def __init__(self, node1, node2, **params):
+            params.setdefault("intf", BulkIntf)
+            super().__init__(node1, node2, **params)
+
+        @classmethod
+        def makeIntfPair(cls, *args, **kwargs):
+            return None
+
+        def stop(self):
+            pass
+
+    return BulkLink
+
+
+def normalize_spec(spec):
+    """Fill defaults and expand `paths` into a list of per-path link parameters."""
+    spec = dict(DEFAULT_SPEC, **(spec or {}))
+    paths = spec["paths"]
+    overrides = paths if isinstance(paths, list) else [{}] * int(paths)
+    spec["paths"] = [
+        {side: dict(spec[side], **(override.get(side) or {})) for side in ("access", "core")}
+        for override in overrides
+    ]
+    spec["clients"] = int(spec["clients"])
+    if not 1 <= len(spec["paths"]) <= 255 or not 1 <= spec["clients"] <= 253:
+        raise ValueError("topology supports 1-255 paths and 1-253 clients")
+    if not 1 <= spec["initial_path"] <= len(spec["paths"]):
+        raise ValueError(f"initial_path must be between 1 and {len(spec['paths'])}")
+    return spec
+
+
+def netem(params):
+    """netem arguments for a link's bw (Mbit/s), delay and loss (%)."""
+    args = [f"delay {params['delay']}"] if params.get("delay") else []
+    if params.get("loss"):
+        args.append(f"loss {params['loss']}%")
+    if params.get("bw"):
+        args.append(f"rate {params['bw']}mbit")
+    return " ".join(args)
+
+
+def server_addr(path):
+    return f"10.{path}.0.2"
+
+
+def path_route(client, dst_path, via_path):
+    """`ip route replace` that sends client traffic for dst_path's server address via via_path."""
+    i = int(client[1:])
+    return (f"ip route replace 10.{dst_path}.0.0/24 via 10.{via_path}.{i}.254 "
+            f"dev {client}-eth{via_path - 1} src 10.{via_path}.{i}.1")
+
+
+def plan(spec):
+    """Links and per-node batch scripts for a normalized spec.
+
+    Returns (links, scripts) where links are (node1, intf1, node2, intf2) and
+    scripts maps node name -> {"sysctl": {...}, "ip": [...], "tc": [...]}.
+    """
+    clients = [f"h{i}" for i in range(1, spec["clients"] + 1)]
+    routers = [f"r{k}" for k in range(1, len(spec["paths"]) + 1)]
+    scripts = {name: {"sysctl": SYSCTLS, "ip": ["link set lo up"], "tc": []}
+               for name in clients + [SERVER]}
+    scripts.update({name: {"sysctl": ROUTER_SYSCTLS, "ip": ["link set lo up"], "tc": []}
+                    for name in routers})
+    links = []
+
+    def connect(n1, i1, a1, n2, i2, a2, params):
+        links.append((n1, i1, n2, i2))
+        for node, intf, addr in ((n1, i1, a1), (n2, i2, a2)):
+            scripts[node]["ip"] += [f"addr add {addr}/24 dev {intf}", f"link set {intf} up"]
+            if netem(params):
+                scripts[node]["tc"].append(f"qdisc replace dev {intf} root netem {netem(params)}")
+
+    for k, path in enumerate(spec["paths"], 1):
+        router = f"r{k}"
+        for i, client in enumerate(clients, 1):
+            connect(client, f"{client}-eth{k - 1}", f"10.{k}.{i}.1",
+                    router, f"{router}-eth{i - 1}", f"10.{k}.{i}.254", path["access"])
+        connect(router, f"{router}-eth{len(clients)}", f"10.{k}.0.1",
+                SERVER, f"{SERVER}-eth{k - 1}", server_addr(k), path["core"])
+        scripts[SERVER]["ip"].append(f"route add 10.{k}.0.0/16 via 10.{k}.0.1 dev {SERVER}-eth{k - 1}")
+        # After a migration, traffic for another path's server address arrives here
+        for other in range(1, len(spec["paths"]) + 1):
+            if other != k:
+                scripts[router]["ip"].append(
+                    f"route add {server_addr(other)}/32 via {server_addr(k)} dev {router}-eth{len(clients)}")
+
+    for i, client in enumerate(clients, 1):
+        for k in range(1, len(spec["paths"]) + 1):
+            scripts[client]["ip"].append(path_route(client, k, k).replace("ip route replace", "route add", 1))
+    return links, scripts
+
+
+def node_command(script, workdir, name):
+    """Single shell command applying a node's sysctls, addresses, routes and qdiscs."""
+    ip_file = os.path.join(workdir, f"{name}.ip")
+    tc_file = os.path.join(workdir, f"{name}.tc")
+    with open(ip_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(script["ip"]) + "\n")
+    parts = ["sysctl -q " + " ".join(f"-w {k}={v}" for k, v in script["sysctl"].items()),
+             f"ip -batch {ip_file}"]
+    if script["tc"]:
+        with open(tc_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(script["tc"]) + "\n")
+        parts.append(f"tc -batch {tc_file}")
+    return " && ".join(parts)
+
+
+def build_topology(spec=None):
+    """Create and configure the network; returns (net, layout)."""
+    spec = normalize_spec(spec)
+    links, scripts = plan(spec)
+    timings = {}
+
+    from mininet.log import info
+    from mininet.net import Mininet
+    from mininet.node import Host
+
+    start = time.perf_counter()
+    net = Mininet(controller=None, link=bulk_link(), build=False)
+    for name in scripts:
+        net.addHost(name, cls=Host, ip=None)
+    timings["nodes"] = time.perf_counter() - start
+
+    # All veth pairs in one `ip -batch`, created directly in the node namespaces
+    start = time.perf_counter()
+    batch = "".join(
+        f"link add name {i1} netns {net.get(n1).pid} type veth peer name {i2} netns {net.get(n2).pid}\n"
+        for n1, i1, n2, i2 in links
+    )
+    subprocess.run(["ip", "-batch", "-"], input=batch, text=True, check=True)
+    for n1, i1, n2, i2 in links:
+        net.addLink(n1, n2, intfName1=i1, intfName2=i2)
+    timings["links"] = time.perf_counter() - start
+
+    # One round trip per node, all nodes in flight at once
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="topology-") as workdir:
+        for name, script in scripts.items():
+            net.get(name).sendCmd(node_command(script, workdir, name) + " || echo TOPOLOGY_FAILED")
+        errors = {}
+        for name in scripts:
+            output = net.get(name).waitOutput()
+            if "TOPOLOGY_FAILED" in output:
+                errors[name] = output.replace("TOPOLOGY_FAILED", "").strip()
+    timings["configure"] = time.perf_counter() - start
+
+    # Hosts need no further setup; Mininet.build() would only reconfigure them
+    net.built = True
+
+    if errors:
+        net.stop()
+        raise RuntimeError("topology setup failed: "
+                           + "; ".join(f"{n}: {e}" for n, e in errors.items()))
+
+    layout = {
+        "clients": [f"h{i}" for i in range(1, spec["clients"] + 1)],
+        "routers": [f"r{k}" for k in range(1, len(spec["paths"]) + 1)],
+        "server": SERVER,
+        "server_addr": server_addr(spec["initial_path"]),
+        "server_addrs": [server_addr(k) for k in range(1, len(spec["paths"]) + 1)],
+        "initial_path": spec["initial_path"],
+        "links": len(links),
+        "timings": {k: round(v, 3) for k, v in timings.items()},
+    }
+    info(f"*** Topology: {len(spec['paths'])} paths, {spec['clients']} clients, {len(links)} links, "
+         + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()) + "\n")
+    return net, layout
+
+
+def stop_topology(net, layout=None):
+    """Stop the network; returns the teardown time (also stored in layout)."""
+    from mininet.log import info
+    start = time.perf_counter()
+    net.stop()
+    seconds = time.perf_counter() - start
+    if layout is not None:
+        layout["timings"]["teardown"] = round(seconds, 3)
+    info(f"*** Teardown: {seconds:.2f}s\n")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a K-path, M-client migration topology")
+    parser.add_argument("spec", nargs="?", help="Topology YAML/JSON file")
+    parser.add_argument("--paths", type=int, help="Number of parallel paths")
+    parser.add_argument("--clients", type=int, help="Number of client hosts")
+    parser.add_argument("--cli", action="store_true", help="Open the Mininet CLI after setup")
+    args = parser.parse_args()
+
+    if os.geteuid() != 0:
+        print("Error: Mininet needs root", file=sys.stderr)
+        return 1
+
+    spec = load_spec(args.spec) if args.spec else {}
+    if args.paths:
+        spec["paths"] = args.paths
+    if args.clients:
+        spec["clients"] = args.clients
+
+    from mininet.cli import CLI
+    from mininet.log import info, setLogLevel
+    setLogLevel("info")
+    net, layout = build_topology(spec)
+    try:
+        if args.cli:
+            info(f"\n*** Server addresses: {', '.join(layout['server_addrs'])}\n")
+            info(f"*** Migrate h1 to path 2: h1 {path_route('h1', layout['initial_path'], 2)}\n\n")
+            CLI(net)
+    finally:
+        stop_topology(net, layout)
+    print(json.dumps(layout["timings"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
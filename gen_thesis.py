@@ -4,15 +4,24 @@
 Thesis Boilerplate Generator
 
 Generates thesis chapter structure with support for custom templates and YAML configuration.
+
+Modules that are slow to import (yaml, subprocess, concurrent.futures, ...)
+are imported by the commands that use them; `bench_build.py startup` checks
+this. `gen_thesis.py pdf` runs the whole build in one process.
 """
 
 import os
 import sys
 import argparse
 import json
+import hashlib
+import re
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
-import yaml
+from typing import Dict, List, Optional, Tuple
+
+import build_trace
+from build_io import write_atomic, write_if_changed
 
 # Color codes for terminal output
 class Colors:
@@ -26,6 +35,33 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+# Build directory and chapter order used when assembling the thesis body
+# (keep CHAPTER_ORDER in sync with the Makefile)
+BUILD_DIR = "build"
+CHAPTER_ORDER = ["intro", "mobility", "quic-overview", "migration", "evaluation", "conclusions"]
+
+# Pandoc options for Markdown -> LaTeX conversion of the thesis body
+PANDOC_ARGS = ["--from=markdown", "--to=latex", "--top-level-division=section"]
+
+# Bump when the manifest layout changes so stale manifests are ignored
+MANIFEST_VERSION = 3
+
+# Content-addressed pandoc fragment cache (under BUILD_DIR) and its size cap
+CACHE_DIR = ".cache"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Default body of a new section file (placeholders: title, section, chapter, i)
+SECTION_TEMPLATE = """## {title}
+
+Write your content here.
+
+<!-- TODO: Add introduction -->
+
+<!-- TODO: Add main content -->
+
+<!-- TODO: Add conclusion -->
+"""
+
 # Default chapters and sections for thesis
 DEFAULT_CHAPTERS = {
     "intro": {
@@ -92,10 +128,209 @@ DEFAULT_CHAPTERS = {
 }
 
 
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of data"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_chapter_config(text: str) -> Tuple[str, List[str]]:
+    """Parse a chapter config.yaml into (title, ordered section names)
+    
+    The title comes from the 'title:' line; every other non-empty line that
+    does not start with '#' names a section file (without .md).
+    """
+    title = ""
+    sections = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('title:'):
+            title = line[len('title:'):].strip()
+            continue
+        if line and not line.startswith('#'):
+            sections.append(line)
+    return title, sections
+
+
+# Label definitions in a LaTeX .aux file, preset in preview builds
+PREVIEW_NEWLABEL = re.compile(r"\\newlabel\{([^}]*)\}")
+
+
+class ChapterIndex:
+    """Cached index of chapter titles, section order and section files
+    
+    Each chapter directory is read with a single os.scandir() pass. File
+    contents are only re-read (and re-hashed) when their size or mtime differs
+    from the previous scan, so refreshing an unchanged tree costs one stat per
+    file. The index can be persisted as JSON to survive between runs.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, chapters_dir: Path, index_file: Optional[Path] = None):
+        self.chapters_dir = chapters_dir
+        self.index_file = index_file
+        # chapter -> {"title": str|None, "sections": [str], "files": {name: {size, mtime_ns, sha256}}}
+        self.chapters: Dict[str, Dict] = {}
+    
+    def load(self) -> 'ChapterIndex':
+        """Load the persisted index, if any"""
+        if self.index_file is None:
+            return self
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return self
+        if data.get("version") == self.VERSION:
+            self.chapters = data.get("chapters", {})
+        return self
+    
+    def save(self):
+        """Persist the index next to the other build artifacts"""
+        if self.index_file is None:
+            return
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.index_file, json.dumps(
+            {"version": self.VERSION, "chapters": self.chapters}, indent=1) + "\n")
+    
+    def refresh(self) -> bool:
+        """Rescan the chapters directory, returning True if anything changed"""
+        chapters = {}
+        try:
+            entries = sorted(os.scandir(self.chapters_dir), key=lambda e: e.name)
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith('.'):
+                chapters[entry.name] = self.scan_chapter(Path(entry.path),
+                                                         self.chapters.get(entry.name, {}))
+        changed = chapters != self.chapters
+        self.chapters = chapters
+        return changed
+    
+    def scan_chapter(self, directory: Path, previous: Dict) -> Dict:
+        """Index one chapter directory, reusing unchanged entries from previous"""
+        old_files = previous.get("files", {})
+        files = {}
+        config_text = None
+        for entry in os.scandir(directory):
+            if not (entry.name.endswith('.md') or entry.name == 'config.yaml'):
+                continue
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            old = old_files.get(entry.name)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                files[entry.name] = old
+                continue
+            data = Path(entry.path).read_bytes()
+            files[entry.name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                 "sha256": sha256_bytes(data)}
+            if entry.name == 'config.yaml':
+                config_text = data.decode('utf-8')
+        
+        if "config.yaml" not in files:
+            title, sections = None, []
+        elif config_text is None:
+            title, sections = previous["title"], previous["sections"]
+        else:
+            title, sections = parse_chapter_config(config_text)
+        return {"title": title, "sections": sections, "files": files}
+    
+    def get(self, chapter: str) -> Optional[Dict]:
+        """Return the index entry of a chapter that has a config.yaml"""
+        entry = self.chapters.get(chapter)
+        if entry is None or entry["title"] is None:
+            return None
+        return entry
+    
+    def section_hashes(self, chapter: str) -> Dict[str, str]:
+        """Content hashes of the chapter's existing sections, in config order"""
+        files = self.chapters[chapter]["files"]
+        return {s: files[f"{s}.md"]["sha256"] for s in self.chapters[chapter]["sections"]
+                if f"{s}.md" in files}
+    
+    def missing_sections(self, chapter: str) -> List[str]:
+        """Sections listed in config.yaml without a matching .md file"""
+        files = self.chapters[chapter]["files"]
+        return [s for s in self.chapters[chapter]["sections"] if f"{s}.md" not in files]
+    
+    def digest(self, chapter: str) -> str:
+        """Hash identifying the assembled Markdown of a chapter"""
+        entry = self.chapters[chapter]
+        key = [entry["title"], list(self.section_hashes(chapter).items())]
+        return sha256_bytes(json.dumps(key).encode('utf-8'))
+
+
+class ConversionCache:
+    """Content-addressed store of pandoc LaTeX fragments
+    
+    Every section is converted on its own and stored as
+    <directory>/<key[:2]>/<key>.tex, where the key hashes the section's content
+    hash together with the conversion key (pandoc version, PANDOC_ARGS and
+    metadata.yaml). Lookups refresh the fragment's mtime, so evict() can drop
+    the least recently used fragments once the cache outgrows max_bytes.
+    """
+    
+    def __init__(self, directory: Path, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+    
+    @staticmethod
+    def key(conversion_key: str, source_hash: str) -> str:
+        """Cache key of one Markdown source under the given conversion settings"""
+        return sha256_bytes(f"{conversion_key}\0{source_hash}".encode('utf-8'))
+    
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.tex"
+    
+    def __contains__(self, key: str) -> bool:
+        return self.path(key).exists()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached fragment and mark it as recently used"""
+        path = self.path(key)
+        try:
+            content = path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return content
+    
+    def evict(self, keep: set) -> Tuple[int, int]:
+        """Remove least recently used fragments (except keep) until under the cap
+        
+        Returns (fragments removed, bytes freed).
+        """
+        entries = []
+        total = 0
+        for path in self.directory.glob("??/*.tex"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            total += st.st_size
+            if path.stem not in keep:
+                entries.append((st.st_mtime_ns, st.st_size, path))
+        removed = freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+            freed += size
+        return removed, freed
+
+
 class ThesisGenerator:
     def __init__(self, root_dir: str = "."):
         self.root_dir = Path(root_dir)
         self.chapters_dir = self.root_dir / "chapters"
+        self.build_dir = self.root_dir / BUILD_DIR
+        self.metadata_file = self.root_dir / "metadata.yaml"
+        self.manifest_file = self.build_dir / "manifest.json"
+        self.cache = ConversionCache(self.build_dir / CACHE_DIR)
+        self.index = ChapterIndex(self.chapters_dir, self.build_dir / "chapter_index.json")
+        self.index_loaded = False
         
     def ensure_chapters_dir(self):
         """Ensure chapters directory exists"""
@@ -106,56 +341,161 @@ class ThesisGenerator:
         """Convert kebab-case to Title Case"""
         return ' '.join(word.capitalize() for word in text.split('-'))
     
-    def create_section_file(self, chapter: str, section: str, force: bool = False) -> bool:
-        """Create a single section markdown file"""
-        section_file = self.chapters_dir / chapter / f"{section}.md"
-        
-        if section_file.exists() and not force:
-            print(f"{Colors.WARNING}⚠{Colors.ENDC}  {section_file} already exists (skip with --force)")
-            return False
+    def section_content(self, chapter: str, section: str, template: Optional[str] = None,
+                        **context) -> str:
+        """Render the initial Markdown of a section file"""
+        template = SECTION_TEMPLATE if template is None else template
+        return template.format(title=self.title_case(section), section=section,
+                               chapter=chapter, **context)
+    
+    def config_content(self, chapter: str, sections: List[str], title: Optional[str] = None) -> str:
+        """Render a chapter config.yaml"""
+        # Get chapter title from DEFAULT_CHAPTERS or generate from chapter name
+        if title is None:
+            title = DEFAULT_CHAPTERS.get(chapter, {}).get("title", self.title_case(chapter))
         
-        title = self.title_case(section)
+        # Title on the first line, then section names one per line (no YAML object format)
+        content = f"title: {title}\n"
+        content += f"# List section files in order (without .md extension)\n\n"
+        content += '\n'.join(sections)
+        return content
+    
+    def expand_sections(self, sections: List, template: Optional[str] = None) -> List[Tuple[str, Optional[str], Dict]]:
+        """Expand a section list into (name, body template, template context) triples
         
-        # Simple template with TODO comments
-        content = f"""## {title}
-
-Write your content here.
-
-<!-- TODO: Add introduction -->
-
-<!-- TODO: Add main content -->
-
-<!-- TODO: Add conclusion -->
-"""
+        Entries are plain section names or generators of the form
+        {"template": "run-{i:04d}", "count": 500, "start": 1}; a generator may
+        carry its own "section_template" for the bodies of its sections.
+        """
+        expanded = []
+        for item in sections:
+            if isinstance(item, dict):
+                start = int(item.get("start", 1))
+                body = item.get("section_template", template)
+                for i in range(start, start + int(item["count"])):
+                    expanded.append((item["template"].format(i=i), body, {"i": i}))
+            else:
+                expanded.append((str(item), template, {"i": len(expanded) + 1}))
+        return expanded
+    
+    def plan_scaffold(self, chapters: Dict[str, Dict], force: bool = False) -> Dict[str, Dict[str, str]]:
+        """Plan the files of a chapter tree in memory
         
-        section_file.parent.mkdir(parents=True, exist_ok=True)
-        section_file.write_text(content, encoding='utf-8')
-        print(f"{Colors.OKGREEN}✓{Colors.ENDC} Created {section_file}")
-        return True
+        `chapters` maps chapter names to {"title", "sections", "section_template"}
+        (the DEFAULT_CHAPTERS layout). Chapters that already exist are left
+        out unless force is set. Returns {chapter: {filename: content}}.
+        """
+        plan = {}
+        for chapter, info in chapters.items():
+            if (self.chapters_dir / chapter).exists() and not force:
+                continue
+            sections = self.expand_sections(info.get("sections", []), info.get("section_template"))
+            files = {"config.yaml": self.config_content(chapter, [name for name, _, _ in sections],
+                                                        title=info.get("title"))}
+            for name, template, context in sections:
+                files[f"{name}.md"] = self.section_content(chapter, name, template, **context)
+            plan[chapter] = files
+        return plan
     
-    def create_config_yaml(self, chapter: str, sections: List[str], force: bool = False) -> bool:
-        """Create chapter config.yaml with chapter title and section order"""
-        config_file = self.chapters_dir / chapter / "config.yaml"
+    def write_scaffold(self, plan: Dict[str, Dict[str, str]]) -> bool:
+        """Write a planned tree through a staging directory
         
-        if config_file.exists() and not force:
-            print(f"{Colors.WARNING}⚠{Colors.ENDC}  {config_file} already exists (skip with --force)")
+        Every chapter is first written completely under chapters/.scaffold-*
+        (on the same filesystem, existing files of the chapter are copied in),
+        then swapped into place with renames. If any step fails, chapters that
+        were already swapped are restored, so a failed run leaves no
+        half-written tree behind.
+        """
+        import shutil
+        import tempfile
+        self.chapters_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.scaffold-', dir=self.chapters_dir))
+        # Chapters whose original directory was moved into staging, and whether the new one is in place
+        swapped = []
+        restored = True
+        try:
+            for chapter, files in plan.items():
+                staged = staging / chapter
+                target = self.chapters_dir / chapter
+                if target.exists():
+                    shutil.copytree(target, staged)
+                else:
+                    staged.mkdir()
+                for name, content in files.items():
+                    (staged / name).write_text(content, encoding='utf-8')
+            
+            for chapter in plan:
+                target = self.chapters_dir / chapter
+                backup = staging / f".old-{chapter}"
+                swapped.append([chapter, False])
+                if target.exists():
+                    os.rename(target, backup)
+                os.rename(staging / chapter, target)
+                swapped[-1][1] = True
+        except BaseException as e:
+            restored = self.rollback_scaffold(staging, swapped)
+            if not isinstance(e, OSError):
+                raise
+            if restored:
+                print(f"{Colors.FAIL}✗{Colors.ENDC} Scaffolding failed, no chapters changed: {e}")
             return False
+        finally:
+            # A backup that could not be restored stays in the staging directory
+            if restored:
+                shutil.rmtree(staging, ignore_errors=True)
+        return True
+    
+    def rollback_scaffold(self, staging: Path, swapped: List[List]) -> bool:
+        """Put the original chapter directories back; returns False if any is left in staging"""
+        import shutil
+        restored = True
+        for chapter, replaced in reversed(swapped):
+            target = self.chapters_dir / chapter
+            backup = staging / f".old-{chapter}"
+            try:
+                if replaced:
+                    shutil.rmtree(target)
+                if backup.exists():
+                    os.rename(backup, target)
+            except OSError as e:
+                restored = False
+                print(f"{Colors.FAIL}✗{Colors.ENDC} Could not restore {target} ({e}); "
+                      f"the original is kept in {backup}")
+        return restored
+    
+    def scaffold(self, chapters: Dict[str, Dict], force: bool = False, verbose: bool = False) -> bool:
+        """Plan, write and summarize a batch of chapters"""
+        plan = self.plan_scaffold(chapters, force=force)
+        skipped = [c for c in chapters if c not in plan]
         
-        config_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Get chapter title from DEFAULT_CHAPTERS or generate from chapter name
-        chapter_title = DEFAULT_CHAPTERS.get(chapter, {}).get("title", self.title_case(chapter))
+        if verbose:
+            for chapter, files in plan.items():
+                print(f"  {Colors.OKBLUE}→{Colors.ENDC} {chapter}: {len(files) - 1} sections")
+                if chapter in DEFAULT_CHAPTERS:
+                    print(f"    Description: {DEFAULT_CHAPTERS[chapter]['description']}")
         
-        # Write config with title on first line (used by Makefile)
-        # Then list sections (one per line, no YAML object format)
-        content = f"title: {chapter_title}\n"
-        content += f"# List section files in order (without .md extension)\n\n"
-        content += '\n'.join(sections)
+        if plan and not self.write_scaffold(plan):
+            return False
         
-        config_file.write_text(content, encoding='utf-8')
-        print(f"{Colors.OKGREEN}✓{Colors.ENDC} Created {config_file}")
+        files = sum(len(f) for f in plan.values())
+        print(f"{Colors.OKGREEN}✓{Colors.ENDC} Generated {len(plan)}/{len(chapters)} chapters "
+              f"({files} files) in {self.chapters_dir}")
+        if skipped:
+            print(f"{Colors.WARNING}⚠{Colors.ENDC}  Already exist (use --force to overwrite): {', '.join(skipped)}")
         return True
     
+    def load_spec(self, spec_file: str) -> Dict[str, Dict]:
+        """Load a chapter spec (DEFAULT_CHAPTERS layout) from YAML"""
+        import yaml  # deferred: only --spec needs it
+        with open(spec_file, 'r', encoding='utf-8') as f:
+            try:
+                spec = yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"{spec_file}: {e}") from e
+        if not isinstance(spec, dict):
+            raise ValueError(f"{spec_file}: expected a mapping of chapter names")
+        return spec
+    
     def create_chapter(self, chapter: str, sections: Optional[List[str]] = None, 
                        force: bool = False, verbose: bool = False) -> bool:
         """Create a complete chapter with config and section files"""
@@ -175,37 +515,14 @@ Write your content here.
             print(f"   Use --force to overwrite")
             return False
         
-        # Create chapter directory
-        chapter_dir.mkdir(parents=True, exist_ok=True)
-        print(f"{Colors.OKGREEN}✓{Colors.ENDC} Created chapter directory: {chapter_dir}")
-        
-        if verbose and chapter in DEFAULT_CHAPTERS:
-            desc = DEFAULT_CHAPTERS[chapter]["description"]
-            print(f"   Description: {desc}\n")
-        
-        # Create config.yaml
-        self.create_config_yaml(chapter, sections, force=force)
-        
-        # Create section files
-        for section in sections:
-            self.create_section_file(chapter, section, force=force)
-        
-        return True
+        spec = {chapter: {**DEFAULT_CHAPTERS.get(chapter, {}), "sections": sections}}
+        return self.scaffold(spec, force=force, verbose=verbose)
     
     def create_all_chapters(self, force: bool = False, verbose: bool = False) -> bool:
         """Create all default chapters"""
         self.ensure_chapters_dir()
         print()
-        
-        success_count = 0
-        for chapter in DEFAULT_CHAPTERS.keys():
-            print(f"{Colors.OKBLUE}→{Colors.ENDC} Chapter: {chapter}")
-            if self.create_chapter(chapter, force=force, verbose=verbose):
-                success_count += 1
-            print()
-        
-        print(f"{Colors.OKGREEN}✅ Generated {success_count}/{len(DEFAULT_CHAPTERS)} chapters{Colors.ENDC}")
-        return True
+        return self.scaffold(DEFAULT_CHAPTERS, force=force, verbose=verbose)
     
     def list_chapters(self):
         """List all available default chapters"""
@@ -218,49 +535,536 @@ Write your content here.
             print(f"    Sections: {', '.join(info['sections'])}")
             print()
     
+    def refresh_index(self) -> ChapterIndex:
+        """Bring the chapter index up to date, loading it on first use"""
+        if not self.index_loaded:
+            self.index.load()
+            self.index_loaded = True
+        if self.index.refresh() or not self.index.index_file.exists():
+            self.index.save()
+        return self.index
+    
     def verify_structure(self) -> Dict[str, List[str]]:
         """Verify existing chapter structure matches config"""
         if not self.chapters_dir.exists():
             print(f"{Colors.FAIL}✗{Colors.ENDC} No chapters directory found")
             return {}
         
+        index = self.refresh_index()
         structure = {}
         
-        for chapter_dir in sorted(self.chapters_dir.iterdir()):
-            if not chapter_dir.is_dir():
-                continue
-            
-            config_file = chapter_dir / "config.yaml"
-            if not config_file.exists():
-                print(f"{Colors.WARNING}⚠{Colors.ENDC}  Missing config: {config_file}")
+        for chapter, entry in index.chapters.items():
+            if entry["title"] is None:
+                print(f"{Colors.WARNING}⚠{Colors.ENDC}  Missing config: {self.chapters_dir / chapter / 'config.yaml'}")
                 continue
             
-            # Read config - first line is title, rest are sections
-            sections = []
-            with open(config_file, 'r') as f:
-                for i, line in enumerate(f):
-                    line = line.strip()
-                    # Skip the title line and comment lines
-                    if i == 0 and line.startswith('title:'):
-                        continue
-                    if line and not line.startswith('#'):
-                        sections.append(line)
-            
-            structure[chapter_dir.name] = sections
-            
-            # Verify section files exist
-            missing = []
-            for section in sections:
-                section_file = chapter_dir / f"{section}.md"
-                if not section_file.exists():
-                    missing.append(section)
+            sections = entry["sections"]
+            structure[chapter] = sections
             
+            missing = index.missing_sections(chapter)
             if missing:
-                print(f"{Colors.WARNING}⚠{Colors.ENDC}  {chapter_dir.name}: Missing sections: {', '.join(missing)}")
+                print(f"{Colors.WARNING}⚠{Colors.ENDC}  {chapter}: Missing sections: {', '.join(missing)}")
             else:
-                print(f"{Colors.OKGREEN}✓{Colors.ENDC}  {chapter_dir.name}: {len(sections)} sections")
+                print(f"{Colors.OKGREEN}✓{Colors.ENDC}  {chapter}: {len(sections)} sections")
         
         return structure
+    
+    def load_manifest(self) -> Dict:
+        """Load the content-hash manifest from the build directory"""
+        try:
+            manifest = json.loads(self.manifest_file.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return {}
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        return manifest
+    
+    def lint(self, chapters: Optional[List[str]] = None, jobs: Optional[int] = None,
+             strict: bool = False) -> bool:
+        """Pre-flight checks of the configured sections before LaTeX runs (see lint.py)"""
+        import lint
+        return lint.lint_chapters(self.refresh_index(), self.root_dir, self.build_dir,
+                                  chapters, jobs=jobs, strict=strict)
+    
+    def pandoc_version(self) -> str:
+        """First line of `pandoc --version`, cached per pandoc binary"""
+        import shutil
+        executable = shutil.which("pandoc")
+        if executable is None:
+            return "missing"
+        st = os.stat(executable)
+        stamp = [executable, st.st_size, st.st_mtime_ns]
+        version_file = self.build_dir / CACHE_DIR / "pandoc-version.json"
+        try:
+            cached = json.loads(version_file.read_text(encoding='utf-8'))
+            if cached.get("binary") == stamp:
+                return cached["version"]
+        except (FileNotFoundError, ValueError):
+            pass
+        result = build_trace.run([executable, "--version"], name="pandoc --version",
+                                 capture_output=True, text=True)
+        version = (result.stdout.splitlines() or ["unknown"])[0]
+        version_file.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(version_file, json.dumps({"binary": stamp, "version": version}) + "\n")
+        return version
+    
+    def conversion_key(self) -> str:
+        """Hash of everything besides chapter content that affects pandoc output"""
+        try:
+            metadata = self.metadata_file.read_bytes()
+        except FileNotFoundError:
+            metadata = b""
+        settings = json.dumps([self.pandoc_version(), PANDOC_ARGS]).encode('utf-8')
+        return sha256_bytes(settings + b"\0" + metadata)
+    
+    def run_pandoc(self, markdown: str, output: Path) -> bool:
+        """Convert Markdown to a LaTeX fragment with pandoc"""
+        cmd = ["pandoc", *PANDOC_ARGS]
+        if self.metadata_file.exists():
+            cmd.append(f"--metadata-file={self.metadata_file}")
+        cmd.append("--biblatex")
+        try:
+            result = build_trace.run(cmd, name="pandoc", input=markdown, encoding='utf-8', capture_output=True)
+        except FileNotFoundError:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} pandoc not found (see 'make install-deps')")
+            return False
+        if result.returncode != 0:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} pandoc failed for {output.name}:\n{result.stderr}")
+            return False
+        write_atomic(output, result.stdout)
+        return True
+    
+    def chapter_fragments(self, chapter: str, key: str) -> List[Tuple[str, str, Optional[str]]]:
+        """(cache key, label, section name) of the fragments making up a chapter
+        
+        The first fragment is the chapter's '# Title' heading (section None),
+        followed by the sections in config order.
+        """
+        title = self.index.chapters[chapter]["title"]
+        heading = sha256_bytes(f"# {title}\n".encode('utf-8'))
+        fragments = [(ConversionCache.key(key, heading), f"{chapter} (title)", None)]
+        for section, section_hash in self.index.section_hashes(chapter).items():
+            fragments.append((ConversionCache.key(key, section_hash), f"{chapter}/{section}", section))
+        return fragments
+    
+    def convert_fragment(self, cache_key: str, chapter: str, section: Optional[str]) -> Tuple[str, bool, float]:
+        """Convert one section (or a chapter heading) into the cache, returning (key, ok, seconds)"""
+        start = time.perf_counter()
+        if section is None:
+            markdown = f"# {self.index.chapters[chapter]['title']}\n"
+        else:
+            markdown = (self.chapters_dir / chapter / f"{section}.md").read_text(encoding='utf-8')
+        output = self.cache.path(cache_key)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        return cache_key, self.run_pandoc(markdown, output), time.perf_counter() - start
+    
+    def convert_fragments(self, missing: Dict[str, Tuple[str, Optional[str]]],
+                          jobs: int) -> Tuple[set, Dict[str, float]]:
+        """Convert {cache key: (chapter, section)} on a thread pool
+        
+        Returns the failed keys and the conversion time of every key.
+        """
+        failed_keys = set()
+        seconds = {}
+        if not missing:
+            return failed_keys, seconds
+        start = time.perf_counter()
+        workers = max(1, min(jobs, len(missing)))
+        from concurrent.futures import ThreadPoolExecutor
+        with build_trace.span("pandoc/convert", fragments=len(missing), workers=workers), \
+                ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.convert_fragment, k, c, s) for k, (c, s) in missing.items()]
+            for future in futures:
+                cache_key, ok, seconds[cache_key] = future.result()
+                if not ok:
+                    failed_keys.add(cache_key)
+        print(f"        Converted {len(missing) - len(failed_keys)} fragments "
+              f"in {time.perf_counter() - start:.2f}s")
+        return failed_keys, seconds
+    
+    def build(self, chapters: Optional[List[str]] = None, force: bool = False,
+              jobs: Optional[int] = None) -> bool:
+        """Incrementally convert the thesis body from cached section fragments
+        
+        Every section is converted to LaTeX on its own and kept in the
+        content-addressed cache under build/.cache, so a section is only ever
+        converted once per content, pandoc version, PANDOC_ARGS and
+        metadata.yaml; reordering sections or switching back to an earlier
+        branch reuses the cached fragments. Each chapter's
+        build/body-<chapter>.tex is the concatenation of its '# Title'
+        fragment and its section fragments, and body.tex \\input's the
+        chapters in order. The manifest records what every chapter was
+        assembled from, so unchanged chapters are not touched at all. Missing
+        fragments are converted in parallel on a pool of `jobs` workers
+        (default: CPU count); force reconverts every fragment.
+        
+        Because pandoc sees one section at a time, it cannot give duplicate
+        heading identifiers distinct suffixes, and reference-link
+        definitions ([id]: url) only apply within their own section. lint()
+        rejects both, and runs before build() in `pdf` and `watch`.
+        """
+        if chapters is None:
+            chapters = CHAPTER_ORDER
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        old = self.load_manifest()
+        key = self.conversion_key()
+        if old.get("key") != key:
+            old = {}
+        old_chapters = old.get("chapters", {})
+        
+        manifest = {"version": MANIFEST_VERSION, "key": key, "chapters": {}}
+        assembled = {}
+        pending = []
+        
+        index = self.refresh_index()
+        for chapter in chapters:
+            entry = index.get(chapter)
+            if entry is None:
+                continue
+            for section in index.missing_sections(chapter):
+                print(f"        {Colors.WARNING}⚠{Colors.ENDC} {chapter}: missing {section}.md")
+            
+            tex_file = self.build_dir / f"body-{chapter}.tex"
+            previous = old_chapters.get(chapter, {})
+            info = {
+                "title": entry["title"],
+                "digest": index.digest(chapter),
+                "sections": index.section_hashes(chapter),
+                "fragments": self.chapter_fragments(chapter, key),
+                "tex_file": tex_file,
+                "status": "unchanged",
+            }
+            assembled[chapter] = info
+            
+            if force or not tex_file.exists() or previous.get("digest") != info["digest"]:
+                pending.append(chapter)
+        
+        # Fragments that are not cached yet, each converted once
+        missing = {}
+        for chapter in pending:
+            for cache_key, _, section in assembled[chapter]["fragments"]:
+                if force or cache_key not in self.cache:
+                    missing.setdefault(cache_key, (chapter, section))
+        
+        failed_keys, seconds = self.convert_fragments(missing, jobs)
+        
+        failed = set()
+        for chapter in pending:
+            info = assembled[chapter]
+            keys = [k for k, _, _ in info["fragments"]]
+            parts = [None if k in failed_keys else self.cache.get(k) for k in keys]
+            if any(part is None for part in parts):
+                failed.add(chapter)
+                continue
+            content = "\n".join(parts)
+            write_if_changed(info["tex_file"], content)
+            converted = [k for k in keys if k in seconds]
+            if converted:
+                # Pandoc time of the chapter's own fragments, summed over the pool workers
+                info["status"] = (f"converted in {sum(seconds[k] for k in converted):.2f}s "
+                                  f"({len(keys) - len(converted)} cached, {len(converted)} converted)")
+            else:
+                info["status"] = f"assembled ({len(keys)} cached)"
+        
+        inputs = []
+        for chapter, info in assembled.items():
+            if chapter in failed:
+                continue
+            print(f"        • {chapter} ... {len(info['sections'])} sections, {info['status']}")
+            manifest["chapters"][chapter] = {
+                "title": info["title"],
+                "digest": info["digest"],
+                "sections": info["sections"],
+                "fragments": [k for k, _, _ in info["fragments"]],
+                "tex": info["tex_file"].name,
+            }
+            inputs.append(f"\\input{{{BUILD_DIR}/{info['tex_file'].name}}}\n")
+        
+        if failed:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} Conversion failed: {', '.join(sorted(failed))}")
+            return False
+        
+        body = "% Auto-generated by gen_thesis.py - do not edit\n" + ''.join(inputs)
+        body_file = self.build_dir / "body.tex"
+        write_if_changed(body_file, body)
+        write_atomic(self.manifest_file, json.dumps(manifest, indent=2) + "\n")
+        
+        keep = {k for info in assembled.values() for k, _, _ in info["fragments"]}
+        removed, freed = self.cache.evict(keep)
+        if removed:
+            print(f"        Evicted {removed} cached fragments ({freed // 1024} KB)")
+        return True
+    
+    def prune_bibliography(self) -> bool:
+        """Write build/references.bib with only the cited entries
+        
+        Without a references.bib an empty one is written, since main.tex
+        always loads build/references.bib.
+        """
+        import bib_index
+        bib = self.root_dir / "references.bib"
+        if not bib.exists():
+            print(f"{Colors.WARNING}⚠{Colors.ENDC}  No {bib.name}; citations will be undefined")
+            self.build_dir.mkdir(parents=True, exist_ok=True)
+            write_if_changed(self.build_dir / "references.bib",
+                             f"% Auto-generated by gen_thesis.py - no {bib.name} found\n")
+            return True
+        return bib_index.prune_bibliography(str(bib), str(self.build_dir / "references.bib"),
+                                            root=str(self.root_dir))
+    
+    def compile_pdf(self, from_biber: bool = False, prune: bool = True) -> bool:
+        """Prune the bibliography, run the LaTeX pass scheduler and move the PDF into place"""
+        import build_latex
+        if prune and not self.prune_bibliography():
+            return False
+        main_tex = self.root_dir / "main.tex"
+        bib = self.build_dir / "references.bib"
+        bib_files = [str(bib)] if bib.exists() else []
+        if not build_latex.compile_latex(str(main_tex), str(self.build_dir), bib_files,
+                                         from_biber=from_biber):
+            return False
+        pdf = self.build_dir / "main.pdf"
+        if pdf.exists():
+            os.replace(pdf, self.build_dir / "thesis.pdf")
+        return True
+    
+    def extract_metadata(self) -> bool:
+        """Regenerate metadata_config.tex, main.xmpdata and abstract.tex"""
+        import extract_metadata
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        return extract_metadata.extract_metadata(
+            str(self.metadata_file),
+            str(self.build_dir / "metadata_config.tex"),
+            str(self.build_dir / "main.xmpdata"),
+            str(self.build_dir / "abstract.tex"),
+            cache_dir=str(self.build_dir),
+        )
+    
+    def preview(self, chapter: str, jobs: Optional[int] = None) -> bool:
+        """Compile one chapter on its own into build/preview/<chapter>/<chapter>.pdf
+        
+        The chapter's sections come from the fragment cache (converting only
+        what is missing) and are wrapped in the preamble of main.tex, with the
+        cached metadata_config.tex and the pruned bibliography. Labels of
+        the other chapters are copied from build/main.aux of the last full
+        build, so their references resolve to the thesis numbering, and the
+        chapter keeps its section number. No other chapter is read or
+        converted, so the cost depends only on the size of the chapter.
+        """
+        import build_latex
+        from lint import lint_text, pandoc_identifier
+        index = self.refresh_index()
+        if index.get(chapter) is None:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} Unknown chapter (no config.yaml): {chapter}")
+            return False
+        main_tex = self.root_dir / "main.tex"
+        preamble, found, _ = main_tex.read_text(encoding='utf-8').partition("\\begin{document}")
+        if not found:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} No \\begin{{document}} in {main_tex}")
+            return False
+        if not (self.build_dir / "metadata_config.tex").exists() and not self.extract_metadata():
+            return False
+        if not self.prune_bibliography():
+            return False
+        
+        out_dir = self.build_dir / "preview" / chapter
+        out_dir.mkdir(parents=True, exist_ok=True)
+        fragments = self.chapter_fragments(chapter, self.conversion_key())
+        missing = {k: (chapter, section) for k, _, section in fragments if k not in self.cache}
+        failed_keys, _ = self.convert_fragments(missing, jobs or os.cpu_count() or 1)
+        parts = [None if k in failed_keys else self.cache.get(k) for k, _, _ in fragments]
+        if any(part is None for part in parts):
+            print(f"{Colors.FAIL}✗{Colors.ENDC} Conversion failed: {chapter}")
+            return False
+        body_file = out_dir / "body.tex"
+        body = "\n".join(parts)
+        write_if_changed(body_file, body)
+        
+        # Labels this chapter defines itself must not be preset from main.aux
+        own = set()
+        for section in index.section_hashes(chapter):
+            result = lint_text((self.chapters_dir / chapter / f"{section}.md").read_text(encoding='utf-8'))
+            own.update(label for label, _ in result["labels"] + result["anchors"])
+        own.add(pandoc_identifier(index.chapters[chapter]["title"]))
+        labels = []
+        main_aux = self.build_dir / "main.aux"
+        if main_aux.exists():
+            for line in main_aux.read_text(encoding='utf-8', errors='replace').splitlines():
+                match = PREVIEW_NEWLABEL.match(line)
+                if match and match.group(1).split("@")[0] not in own:
+                    labels.append(line)
+        else:
+            print(f"{Colors.WARNING}⚠{Colors.ENDC}  No {main_aux} yet: references to other chapters "
+                  f"stay unresolved until a full build")
+        
+        # Keep the chapter's section number from the full document
+        manifest_chapters = list(self.load_manifest().get("chapters", {}))
+        number = manifest_chapters.index(chapter) if chapter in manifest_chapters else 0
+        rel = os.path.relpath(out_dir, self.root_dir)
+        wrapper = (
+            f"% Auto-generated by gen_thesis.py preview - do not edit\n{preamble}"
+            "\\makeatletter\n" + "".join(f"{line}\n" for line in labels) + "\\makeatother\n"
+            "\\begin{document}\n"
+            "\\dothesispagenumbering{}\n"
+            f"\\setcounter{{section}}{{{number}}}\n"
+            f"\\input{{{rel}/body.tex}}\n"
+            "\\clearpage\n"
+            "\\printbibliography[title={References}, heading=bibintoc]\n"
+            "\\end{document}\n"
+        )
+        tex_file = out_dir / f"{chapter}.tex"
+        write_if_changed(tex_file, wrapper)
+        # pdfx reads <jobname>.xmpdata, which only exists for main
+        xmpdata = self.build_dir / "main.xmpdata"
+        if xmpdata.exists():
+            xmp_file = out_dir / f"{chapter}.xmpdata"
+            content = xmpdata.read_text(encoding='utf-8')
+            write_if_changed(xmp_file, content)
+        
+        bib = self.build_dir / "references.bib"
+        bib_files = [str(bib)] if bib.exists() else []
+        if not build_latex.compile_latex(str(tex_file), str(out_dir), bib_files):
+            return False
+        print(f"✓ Generated: {out_dir / f'{chapter}.pdf'}", file=sys.stderr)
+        return True
+    
+    def pdf(self, chapters: Optional[List[str]] = None, jobs: Optional[int] = None,
+            trace: bool = False) -> bool:
+        """Run every stage of `make pdf` in this process
+        
+        Same steps as the Makefile recipe used to run as separate scripts,
+        without paying interpreter startup and imports for each of them.
+        With trace, every stage and subprocess is recorded in
+        build/trace.json (see build_trace.py).
+        """
+        if trace:
+            build_trace.enable()
+        steps = [
+            ("lint", "Checking chapters (TODOs, math, references, images)",
+             lambda: self.lint(chapters, jobs=jobs)),
+            ("metadata", "Extracting metadata + abstract", self.extract_metadata),
+            ("pandoc", "Converting chapters to LaTeX (incremental, parallel)",
+             lambda: self.build(chapters, jobs=jobs)),
+            ("bibliography", "Pruning bibliography to cited entries", self.prune_bibliography),
+        ]
+        try:
+            print(f"{Colors.BOLD}=== PHASE 1: Prepare Thesis Content ==={Colors.ENDC}\n")
+            for n, (name, label, step) in enumerate(steps, 1):
+                print(f"  [{n}/{len(steps)}] {label}...", flush=True)
+                with build_trace.span(name):
+                    if not step():
+                        return False
+            
+            print(f"\n{Colors.BOLD}=== PHASE 2: Compile to PDF ==={Colors.ENDC}\n")
+            print("  pdflatex + biber (only the passes that are needed)...", flush=True)
+            with build_trace.span("latex"):
+                return self.compile_pdf(prune=False)
+        finally:
+            if trace:
+                build_trace.save(str(self.build_dir / "trace.json"))
+    
+    def classify_changes(self, paths: List[Path]) -> Dict[str, set]:
+        """Map changed paths to the build stages they invalidate"""
+        stages = {"metadata": set(), "chapters": set(), "bib": set(), "latex": set()}
+        for path in paths:
+            if path.name.startswith('.') or path.name.endswith(('~', '.swp', '.tmp')):
+                continue
+            if path == self.metadata_file:
+                stages["metadata"].add(path)
+            elif path == self.root_dir / "references.bib":
+                stages["bib"].add(path)
+            elif path == self.root_dir / "main.tex":
+                stages["latex"].add(path)
+            elif path.parent.parent == self.chapters_dir and path.suffix in ('.md', '.yaml'):
+                stages["chapters"].add(path.parent.name)
+        return stages
+    
+    def rebuild(self, stages: Dict[str, set], chapters: List[str], jobs: Optional[int]) -> bool:
+        """Rerun only the stages affected by a batch of changes"""
+        if stages["metadata"] and not self.extract_metadata():
+            return False
+        dirty = [c for c in chapters if c in stages["chapters"]]
+        if dirty:
+            print(f"{Colors.OKBLUE}→{Colors.ENDC} Reconverting: {', '.join(dirty)}")
+            if not self.lint(chapters, jobs=jobs) or not self.build(chapters, jobs=jobs):
+                return False
+        if stages["metadata"] or stages["latex"] or dirty:
+            return self.compile_pdf()
+        if stages["bib"]:
+            return self.compile_pdf(from_biber=True)
+        return True
+    
+    def watch_directories(self) -> List[Path]:
+        """The root, the chapters directory and every chapter directory in it"""
+        directories = [self.root_dir, self.chapters_dir]
+        if self.chapters_dir.is_dir():
+            directories += [d for d in sorted(self.chapters_dir.iterdir()) if d.is_dir()]
+        return directories
+    
+    def changes_layout(self, path: Path) -> bool:
+        """Whether a change may add or remove chapter directories to watch"""
+        return (path == self.chapters_dir or path.parent == self.chapters_dir
+                or path.name == "config.yaml")
+    
+    def watch(self, chapters: Optional[List[str]] = None, debounce: float = 0.3,
+              polling: bool = False, jobs: Optional[int] = None):
+        """Rebuild affected stages whenever chapters, metadata or sources change
+        
+        Uses inotify when available and falls back to mtime polling. Bursts of
+        saves are collapsed into one rebuild once no change has been seen for
+        `debounce` seconds. Chapter directories created (or recreated) while
+        watching are picked up when the chapters directory or a config.yaml
+        changes.
+        """
+        if chapters is None:
+            chapters = CHAPTER_ORDER
+        directories = self.watch_directories()
+        
+        from watcher import InotifyWatcher, PollingWatcher
+        watcher = None
+        if not polling:
+            try:
+                watcher = InotifyWatcher(directories)
+            except (OSError, AttributeError):
+                print(f"{Colors.WARNING}⚠{Colors.ENDC}  inotify unavailable, polling instead")
+        if watcher is None:
+            watcher = PollingWatcher(directories)
+        
+        def poll(timeout: float) -> List[Path]:
+            changed = watcher.poll(timeout)
+            if any(self.changes_layout(path) for path in changed):
+                changed += watcher.sync(self.watch_directories())
+            return changed
+        
+        print(f"{Colors.OKBLUE}Watching {self.root_dir} ({type(watcher).__name__}), Ctrl-C to stop{Colors.ENDC}")
+        try:
+            while True:
+                changed = poll(3600)
+                if not changed:
+                    continue
+                while True:
+                    more = poll(debounce)
+                    if not more:
+                        break
+                    changed += more
+                
+                stages = self.classify_changes(changed)
+                if not any(stages.values()):
+                    continue
+                start = time.perf_counter()
+                ok = self.rebuild(stages, chapters, jobs)
+                elapsed = time.perf_counter() - start
+                if ok:
+                    print(f"{Colors.OKGREEN}✓{Colors.ENDC} Rebuilt in {elapsed:.2f}s")
+                else:
+                    print(f"{Colors.FAIL}✗{Colors.ENDC} Rebuild failed after {elapsed:.2f}s")
+        except KeyboardInterrupt:
+            print()
+        finally:
+            watcher.close()
 
 
 def main():
@@ -272,8 +1076,15 @@ Examples:
   python3 gen_thesis.py --all                 Generate all default chapters
   python3 gen_thesis.py --chapter intro       Generate intro chapter
   python3 gen_thesis.py --chapter custom -s sec1 sec2 sec3    Custom chapter
+  python3 gen_thesis.py --spec runs.yaml      Generate chapters from a YAML spec
   python3 gen_thesis.py --verify              Verify existing structure
   python3 gen_thesis.py --list                List available chapters
+  python3 gen_thesis.py build                 Convert changed chapters to build/
+  python3 gen_thesis.py build -j 4 intro      Convert selected chapters on 4 workers
+  python3 gen_thesis.py watch                 Rebuild affected stages on save
+  python3 gen_thesis.py lint                  Check sections before building
+  python3 gen_thesis.py pdf                   Run the whole build in one process
+  python3 gen_thesis.py preview evaluation    Compile one chapter on its own
         """
     )
     
@@ -283,6 +1094,8 @@ Examples:
                         help='Generate specific chapter')
     parser.add_argument('-s', '--sections', nargs='+',
                         help='Custom sections for chapter (space-separated)')
+    parser.add_argument('--spec', type=str,
+                        help='Generate chapters from a YAML spec (DEFAULT_CHAPTERS layout)')
     parser.add_argument('-l', '--list', action='store_true',
                         help='List all available chapters')
     parser.add_argument('-v', '--verify', action='store_true',
@@ -294,6 +1107,52 @@ Examples:
     parser.add_argument('-d', '--directory', default='.',
                         help='Root directory for thesis (default: current)')
     
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    build_parser = subparsers.add_parser(
+        'build', help='Convert chapters to LaTeX in build/ (incremental, parallel)')
+    build_parser.add_argument('chapters', nargs='*', metavar='CHAPTER',
+                              help='Chapters in document order (default: CHAPTER_ORDER)')
+    build_parser.add_argument('-j', '--jobs', type=int, default=None,
+                              help='Parallel pandoc workers (default: CPU count)')
+    build_parser.add_argument('-f', '--force', action='store_true',
+                              help='Reconvert every chapter')
+    
+    watch_parser = subparsers.add_parser(
+        'watch', help='Rebuild the affected stages whenever sources change')
+    watch_parser.add_argument('chapters', nargs='*', metavar='CHAPTER',
+                              help='Chapters in document order (default: CHAPTER_ORDER)')
+    watch_parser.add_argument('--debounce', type=float, default=0.3,
+                              help='Seconds of quiet before rebuilding (default: 0.3)')
+    watch_parser.add_argument('--poll', action='store_true',
+                              help='Poll file mtimes instead of using inotify')
+    watch_parser.add_argument('-j', '--jobs', type=int, default=None,
+                              help='Parallel pandoc workers (default: CPU count)')
+    
+    lint_parser = subparsers.add_parser(
+        'lint', help='Check sections for TODOs, broken math, references and images')
+    lint_parser.add_argument('chapters', nargs='*', metavar='CHAPTER',
+                             help='Chapters to check (default: CHAPTER_ORDER)')
+    lint_parser.add_argument('-j', '--jobs', type=int, default=None,
+                             help='Worker processes for uncached files (default: CPU count)')
+    lint_parser.add_argument('--strict', action='store_true',
+                             help='Fail on warnings (e.g. leftover TODOs) as well')
+    
+    pdf_parser = subparsers.add_parser(
+        'pdf', help='Lint, extract metadata, convert, prune the bibliography and compile')
+    pdf_parser.add_argument('chapters', nargs='*', metavar='CHAPTER',
+                            help='Chapters in document order (default: CHAPTER_ORDER)')
+    pdf_parser.add_argument('-j', '--jobs', type=int, default=None,
+                            help='Parallel pandoc workers (default: CPU count)')
+    pdf_parser.add_argument('--trace', action='store_true',
+                            help='Profile every stage and subprocess into build/trace.json')
+    
+    preview_parser = subparsers.add_parser(
+        'preview', help='Compile a single chapter into build/preview/<chapter>/')
+    preview_parser.add_argument('chapter', help='Chapter directory name')
+    preview_parser.add_argument('-j', '--jobs', type=int, default=None,
+                                help='Parallel pandoc workers (default: CPU count)')
+    
     args = parser.parse_args()
     
     gen = ThesisGenerator(args.directory)
@@ -307,8 +1166,36 @@ Examples:
         gen.verify_structure()
         return 0
     
+    if args.command == 'build':
+        ok = gen.build(args.chapters or None, force=args.force, jobs=args.jobs)
+        return 0 if ok else 1
+    
+    if args.command == 'lint':
+        ok = gen.lint(args.chapters or None, jobs=args.jobs, strict=args.strict)
+        return 0 if ok else 1
+    
+    if args.command == 'pdf':
+        return 0 if gen.pdf(args.chapters or None, jobs=args.jobs, trace=args.trace) else 1
+    
+    if args.command == 'preview':
+        return 0 if gen.preview(args.chapter, jobs=args.jobs) else 1
+    
+    if args.command == 'watch':
+        gen.watch(args.chapters or None, debounce=args.debounce,
+                  polling=args.poll, jobs=args.jobs)
+        return 0
+    
     gen.ensure_chapters_dir()
     
+    if args.spec:
+        print(f"\n{Colors.OKBLUE}Generating chapters from {args.spec}...{Colors.ENDC}\n")
+        try:
+            spec = gen.load_spec(args.spec)
+        except (OSError, ValueError) as e:
+            print(f"{Colors.FAIL}✗{Colors.ENDC} Cannot read spec: {e}")
+            return 1
+        return 0 if gen.scaffold(spec, force=args.force, verbose=args.verbose) else 1
+    
     if args.all:
         print(f"\n{Colors.OKBLUE}Generating all chapters...{Colors.ENDC}\n")
         gen.create_all_chapters(force=args.force, verbose=args.verbose)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Pre-flight checks of the thesis chapters before pandoc and LaTeX run.
+
+Per-file checks (TODO markers, math and environment balance, labels,
+references and images used) depend only on a section's content and are
+cached in build/lint_cache.json by content hash, so only changed files are
+read; with many of those they are checked on a process pool. Cross-file
+checks (undefined or duplicate labels, missing images and section files)
+always run. Since gen_thesis.py build converts each section on its own,
+heading identifiers repeated across sections (pandoc would have suffixed
+them in one run) and reference links defined in another section are errors
+too.
+
+Usage:
+  python3 gen_thesis.py lint [--strict] [chapter ...]
+"""
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_io import write_atomic
+from gen_thesis import CHAPTER_ORDER, ChapterIndex, Colors
+
+# Bump when lint rules change so cached lint results are discarded
+LINT_VERSION = 2
+
+# Uncached files needed before linting is spread over worker processes
+LINT_PARALLEL_THRESHOLD = 32
+
+# Extensions pdflatex tries for \includegraphics without one
+IMAGE_EXTENSIONS = ["", ".pdf", ".png", ".jpg", ".jpeg"]
+
+LINT_FENCE = re.compile(r"^(```|~~~).*?^\1[^\n]*$", re.S | re.M)
+LINT_INLINE_CODE = re.compile(r"`[^`\n]*`")
+LINT_TODO = re.compile(r"<!--\s*TODO\b:?\s*(.*?)\s*-->", re.S)
+LINT_COMMENT = re.compile(r"<!--.*?-->", re.S)
+LINT_ENV = re.compile(r"\\(begin|end)\{([^}]+)\}")
+LINT_LABEL = re.compile(r"\\label\{([^}]+)\}|\{#([\w:.-]+)[^}]*\}")
+LINT_REF = re.compile(r"\\(?:[a-zA-Z]*ref)\{([^}]+)\}|\]\(#([\w:.-]+)\)")
+LINT_IMAGE = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}|!\[[^\]]*\]\(([^)\s]+)")
+LINT_HEADING = re.compile(r"^#{1,6}\s+(.*?)\s*(\{[^}]*\})?\s*$")
+# Markdown reference links ([text][id], [id][], [id]) and their [id]: definitions
+LINT_LINK_DEFINITION = re.compile(r"^ {0,3}\[([^\]]+)\]:[ \t]")
+LINT_LINK_USE = re.compile(r"(?<![\\!])\[([^\]\[]+)\](?:\[([^\]]*)\])?(?![(:\[])")
+
+
+def pandoc_identifier(heading: str) -> str:
+    """Identifier pandoc derives for a heading without an explicit {#id}"""
+    text = re.sub(r"[^\w\s.-]", "", heading.lower())
+    text = re.sub(r"\s+", "-", text.strip())
+    return re.sub(r"^[^a-z]+", "", text) or "section"
+
+
+def reference_id(text: str) -> str:
+    """Markdown reference-link ids match case-insensitively, with whitespace collapsed"""
+    return " ".join(text.split()).lower()
+
+
+def lint_text(text: str) -> Dict:
+    """Check one Markdown section; depends only on its content (cacheable)
+    
+    Returns {"issues": [[line, severity, message]], "labels": [[id, line]],
+    "anchors": [[id, line]], "refs": [[id, line]], "images": [[path, line]],
+    "link_definitions": [[id, line]], "link_uses": [[id, line]]}, where
+    anchors are the identifiers pandoc derives from headings and link_uses
+    the first use of each reference-link id; references, images and
+    reference links are resolved across the whole tree by the caller.
+    """
+    def blank(match):
+        return "\n" * match.group(0).count("\n")
+    
+    result = {"issues": [], "labels": [], "anchors": [], "refs": [], "images": [],
+              "link_definitions": [], "link_uses": []}
+    link_uses = set()
+    for m in LINT_TODO.finditer(text):
+        line = text.count("\n", 0, m.start()) + 1
+        result["issues"].append([line, "warning", f"leftover TODO: {m.group(1) or '(no text)'}"])
+    
+    text = LINT_FENCE.sub(blank, text)
+    text = LINT_COMMENT.sub(blank, text)
+    text = LINT_INLINE_CODE.sub(lambda m: " " * len(m.group(0)), text)
+    
+    envs = []
+    math_open = None  # (delimiter, line) of an unclosed $ or $$
+    for lineno, line in enumerate(text.split("\n"), 1):
+        if not line.strip():
+            if math_open and math_open[0] == "$":
+                result["issues"].append([math_open[1], "error", "unclosed inline math ($)"])
+                math_open = None
+            continue
+        heading = LINT_HEADING.match(line)
+        if heading and math_open is None and heading.group(2) is None:
+            result["anchors"].append([pandoc_identifier(heading.group(1)), lineno])
+        
+        # Pandoc's rules: an opening $ is followed by a non-space, a closing $
+        # follows a non-space and is not followed by a digit
+        i = 0
+        while i < len(line):
+            c = line[i]
+            if c == "\\":
+                i += 2
+                continue
+            if c == "$":
+                if line.startswith("$$", i):
+                    if math_open is None:
+                        math_open = ("$$", lineno)
+                    elif math_open[0] == "$$":
+                        math_open = None
+                    i += 2
+                    continue
+                nxt = line[i + 1] if i + 1 < len(line) else " "
+                prev = line[i - 1] if i > 0 else " "
+                if math_open is None and not nxt.isspace():
+                    math_open = ("$", lineno)
+                elif math_open and math_open[0] == "$" and not prev.isspace() and not nxt.isdigit():
+                    math_open = None
+            i += 1
+        
+        for m in LINT_ENV.finditer(line):
+            kind, env = m.groups()
+            if kind == "begin":
+                envs.append((env, lineno))
+            elif not envs:
+                result["issues"].append([lineno, "error", f"\\end{{{env}}} without \\begin"])
+            elif envs[-1][0] != env:
+                result["issues"].append([lineno, "error", f"\\end{{{env}}} closes \\begin{{{envs[-1][0]}}} "
+                                         f"from line {envs[-1][1]}"])
+                envs.pop()
+            else:
+                envs.pop()
+        for m in LINT_LABEL.finditer(line):
+            result["labels"].append([m.group(1) or m.group(2), lineno])
+        for m in LINT_REF.finditer(line):
+            for ref in (m.group(1) or m.group(2)).split(","):
+                result["refs"].append([ref.strip(), lineno])
+        for m in LINT_IMAGE.finditer(line):
+            result["images"].append([m.group(1) or m.group(2), lineno])
+        definition = LINT_LINK_DEFINITION.match(line)
+        if definition:
+            result["link_definitions"].append([reference_id(definition.group(1)), lineno])
+            continue
+        for m in LINT_LINK_USE.finditer(line):
+            ref = reference_id(m.group(2) or m.group(1))
+            if ref not in link_uses:
+                link_uses.add(ref)
+                result["link_uses"].append([ref, lineno])
+    
+    if math_open:
+        result["issues"].append([math_open[1], "error", f"unclosed math ({math_open[0]})"])
+    for env, lineno in envs:
+        result["issues"].append([lineno, "error", f"\\begin{{{env}}} is never closed"])
+    return result
+
+
+def lint_file(path: str) -> Tuple[str, Dict]:
+    """Process-pool entry point for lint_text"""
+    return path, lint_text(Path(path).read_text(encoding='utf-8'))
+
+
+def lint_chapters(index: ChapterIndex, root_dir: Path, build_dir: Path,
+                  chapters: Optional[List[str]] = None, jobs: Optional[int] = None,
+                  strict: bool = False) -> bool:
+    """Lint the configured sections of chapters (default: CHAPTER_ORDER)
+    
+    Prints every issue and a summary; returns False on errors, or on
+    warnings as well with strict.
+    """
+    start = time.perf_counter()
+    chapters_dir = index.chapters_dir
+    if chapters is None:
+        chapters = [c for c in CHAPTER_ORDER if index.get(c)]
+
+    cache_file = build_dir / "lint_cache.json"
+    try:
+        cache = json.loads(cache_file.read_text(encoding='utf-8'))
+        if cache.get("version") != LINT_VERSION:
+            cache = {}
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    cached = cache.get("files", {})
+
+    issues = []
+    files = []
+    titles = {}
+    for chapter in chapters:
+        if index.get(chapter) is None:
+            issues.append((str(chapters_dir / chapter / "config.yaml"), 0, "error",
+                           "chapter has no config.yaml"))
+            continue
+        titles[str(chapters_dir / chapter / "config.yaml")] = index.chapters[chapter]["title"]
+        for section in index.missing_sections(chapter):
+            issues.append((str(chapters_dir / chapter / "config.yaml"), 0, "error",
+                           f"section '{section}' is listed but {section}.md does not exist"))
+        for section, digest in index.section_hashes(chapter).items():
+            files.append((str(chapters_dir / chapter / f"{section}.md"), digest))
+
+    todo = [path for path, digest in files if digest not in cached]
+    if len(todo) >= LINT_PARALLEL_THRESHOLD:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            fresh = dict(pool.map(lint_file, todo, chunksize=8))
+    else:
+        fresh = dict(lint_file(path) for path in todo)
+
+    results = {}
+    for path, digest in files:
+        results[path] = fresh[path] if path in fresh else cached[digest]
+    if fresh or len(cached) != len(files):
+        build_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(cache_file, json.dumps({
+            "version": LINT_VERSION,
+            "files": {digest: results[path] for path, digest in files},
+        }) + "\n")
+
+    def location(place):
+        return f"{os.path.relpath(place[0], root_dir)}:{place[1]}"
+
+    labels = {}
+    # The '# Title' of every chapter is converted as a fragment of its own
+    anchors = {}
+    for path, title in titles.items():
+        anchors.setdefault(pandoc_identifier(title), []).append((path, 1))
+    for path, result in results.items():
+        issues += [(path, line, severity, message) for line, severity, message in result["issues"]]
+        for anchor, line in result["anchors"]:
+            anchors.setdefault(anchor, []).append((path, line))
+        for label, line in result["labels"]:
+            if label in labels:
+                first = labels[label]
+                issues.append((path, line, "error", f"duplicate label '{label}' "
+                               f"(first defined at {location(first)})"))
+            else:
+                labels[label] = (path, line)
+    # pandoc only suffixes repeated heading identifiers within one conversion
+    for anchor, places in anchors.items():
+        first = labels.get(anchor) or places[0]
+        for path, line in places:
+            if path != first[0]:
+                issues.append((path, line, "error", f"heading id '{anchor}' is also defined at "
+                               f"{location(first)}; sections are converted separately, so give "
+                               f"this heading an explicit {{#id}}"))
+    definitions = {}
+    for path, result in results.items():
+        for ref, line in result["link_definitions"]:
+            definitions.setdefault(ref, (path, line))
+    for path, result in results.items():
+        own = {ref for ref, _ in result["link_definitions"]}
+        for ref, line in result["link_uses"]:
+            if ref not in own and ref in definitions:
+                issues.append((path, line, "error", f"reference link [{ref}] is defined at "
+                               f"{location(definitions[ref])}; sections are converted separately, "
+                               f"so repeat the definition here"))
+    for path, result in results.items():
+        for ref, line in result["refs"]:
+            if ref not in labels and ref not in anchors:
+                issues.append((path, line, "error", f"reference to undefined label '{ref}'"))
+        for image, line in result["images"]:
+            if not any((root_dir / f"{image}{ext}").is_file() for ext in IMAGE_EXTENSIONS):
+                issues.append((path, line, "error", f"image not found: {image}"))
+
+    errors = sum(1 for issue in issues if issue[2] == "error")
+    warnings = len(issues) - errors
+    for path, line, severity, message in sorted(issues):
+        color = Colors.FAIL if severity == "error" else Colors.WARNING
+        location = os.path.relpath(path, root_dir) + (f":{line}" if line else "")
+        print(f"{location}: {color}{severity}{Colors.ENDC}: {message}")
+
+    elapsed = time.perf_counter() - start
+    summary = (f"{len(files)} files ({len(todo)} checked, {len(files) - len(todo)} cached), "
+               f"{errors} errors, {warnings} warnings in {elapsed:.2f}s")
+    ok = errors == 0 and not (strict and warnings)
+    mark = f"{Colors.OKGREEN}✓{Colors.ENDC}" if ok else f"{Colors.FAIL}✗{Colors.ENDC}"
+    print(f"{mark} Lint: {summary}")
+    return ok
@@ -0,0 +1,34 @@
+"""Tests for build_io.py."""
+
+import os
+
+import pytest
+
+from build_io import atomic_output, write_atomic, write_if_changed
+
+
+def test_write_if_changed_keeps_the_umask_mode_and_mtime(tmp_path):
+    path = tmp_path / "metadata_config.tex"
+    umask = os.umask(0o022)
+    try:
+        assert write_if_changed(path, "\\title{A}\n")
+    finally:
+        os.umask(umask)
+    assert path.stat().st_mode & 0o777 == 0o644
+    mtime = path.stat().st_mtime_ns
+    assert not write_if_changed(path, b"\\title{A}\n")
+    assert path.stat().st_mtime_ns == mtime
+    assert write_if_changed(path, "\\title{B}\n")
+    assert path.read_text(encoding="utf-8") == "\\title{B}\n"
+    assert os.listdir(tmp_path) == ["metadata_config.tex"]
+
+
+def test_failed_write_leaves_the_previous_file(tmp_path):
+    path = tmp_path / "references.bib"
+    write_atomic(path, "@misc{a}\n")
+    with pytest.raises(KeyboardInterrupt):
+        with atomic_output(path) as f:
+            f.write(b"@misc{b")
+            raise KeyboardInterrupt
+    assert path.read_text(encoding="utf-8") == "@misc{a}\n"
+    assert os.listdir(tmp_path) == ["references.bib"]
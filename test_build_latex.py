@@ -0,0 +1,49 @@
+"""Pass decisions of build_latex.py, with the stub pdflatex and biber of conftest.py."""
+
+import json
+import os
+
+import pytest
+
+import build_latex
+
+
+@pytest.fixture
+def build(tmp_path, stub_tools):
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    (build_dir / "references.bib").write_text("@misc{a}\n")
+    (tmp_path / "main.tex").write_text("\\documentclass{article}\n")
+    return build_dir
+
+
+def compile_and_log(build_dir, stub_tools, **kwargs):
+    """Compile main.tex; returns (ok, tools run in order)."""
+    ok = build_latex.compile_latex(str(build_dir.parent / "main.tex"), str(build_dir),
+                                   [str(build_dir / "references.bib")], **kwargs)
+    return ok, [tool for tool, _ in stub_tools.take()]
+
+
+def test_first_build_runs_biber_and_pdflatex_to_a_fixed_point(build, stub_tools):
+    assert compile_and_log(build, stub_tools) == (True, ["pdflatex", "biber", "pdflatex", "pdflatex"])
+    state = json.loads((build / "latex_passes.json").read_text())
+    assert [(p["step"], p["ran"]) for p in state["passes"]][-1] == ("pdflatex", False)
+    assert not [p for p in os.listdir(build) if p.endswith(".tmp")]
+
+
+def test_unchanged_rebuild_skips_biber(build, stub_tools):
+    compile_and_log(build, stub_tools)
+    assert compile_and_log(build, stub_tools) == (True, ["pdflatex"])
+
+
+def test_bibliography_only_change_that_leaves_the_pruned_bib_unchanged_runs_nothing(build, stub_tools):
+    compile_and_log(build, stub_tools)
+    assert compile_and_log(build, stub_tools, from_biber=True) == (True, [])
+    reasons = [p["reason"] for p in json.loads((build / "latex_passes.json").read_text())["passes"]]
+    assert reasons[1:] == ["main.bcf and bibliography unchanged", "main.bbl unchanged"]
+
+
+def test_bibliography_only_change_reruns_biber_and_pdflatex(build, stub_tools):
+    compile_and_log(build, stub_tools)
+    (build / "references.bib").write_text("@misc{a}\n@misc{b}\n")
+    assert compile_and_log(build, stub_tools, from_biber=True) == (True, ["biber", "pdflatex", "pdflatex"])
@@ -0,0 +1,35 @@
+"""Tests for extract_metadata.py."""
+
+import random
+
+import pytest
+
+from bench_latex_escape import reference_latex_escape
+from extract_metadata import latex_escape
+
+SPECIALS = "\\&%$#_{}~^"
+ALPHABET = SPECIALS + "abcXYZ 019.,-:;'\"\n\téäö–©→"
+
+
+def random_text(rng, max_len):
+    length = rng.randint(0, max_len)
+    # Bias towards special characters so runs and adjacent pairs are common
+    return "".join(
+        rng.choice(SPECIALS) if rng.random() < 0.3 else rng.choice(ALPHABET)
+        for _ in range(length)
+    )
+
+
+@pytest.mark.parametrize("s", [None, "", SPECIALS, SPECIALS[::-1], "\\\\{}", "~^~^", "plain title"])
+def test_latex_escape_matches_the_chained_replace(s):
+    assert latex_escape(s) == reference_latex_escape(s)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_latex_escape_matches_the_chained_replace_on_random_text(seed):
+    rng = random.Random(seed)
+    corpus = [random_text(rng, 64) for _ in range(5000)]
+    corpus += [random_text(rng, 4096) for _ in range(50)]
+    failures = [s for s in corpus if latex_escape(s) != reference_latex_escape(s)]
+    assert not failures, f"{len(failures)} inputs differ, first: {failures[0]!r}"
+
@@ -0,0 +1,196 @@
+"""Tests for gen_thesis.py on a throwaway thesis tree, with the stub tools of conftest.py."""
+
+import os
+import shutil
+
+import pytest
+
+from gen_thesis import ConversionCache, ThesisGenerator
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_chapter(root, chapter, sections, title=None):
+    """Create chapters/<chapter> with its config.yaml and {section: markdown}."""
+    directory = root / "chapters" / chapter
+    directory.mkdir(parents=True, exist_ok=True)
+    config = f"title: {title or chapter.title()}\n" + "".join(f"{name}\n" for name in sections)
+    (directory / "config.yaml").write_text(config, encoding="utf-8")
+    for name, text in sections.items():
+        (directory / f"{name}.md").write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def thesis(tmp_path):
+    return ThesisGenerator(str(tmp_path))
+
+
+def test_lint_rejects_heading_ids_repeated_across_sections(thesis, tmp_path, capsys):
+    write_chapter(tmp_path, "intro", {"a": "## Summary\n\nOne.\n\n## Summary\n\nSame file.\n"})
+    write_chapter(tmp_path, "migration", {"b": "## Summary\n\nTwo.\n"})
+    assert not thesis.lint(["intro", "migration"])
+    out = capsys.readouterr().out
+    assert "chapters/migration/b.md:1" in out and "heading id 'summary'" in out
+    assert "intro/a.md:5" not in out
+
+    write_chapter(tmp_path, "migration", {"b": "## Summary {#migration-summary}\n\nTwo.\n"})
+    assert thesis.lint(["intro", "migration"])
+
+
+def test_lint_rejects_heading_ids_that_repeat_a_chapter_title(thesis, tmp_path, capsys):
+    write_chapter(tmp_path, "intro", {"a": "## Introduction\n\nText.\n"}, title="Introduction")
+    assert not thesis.lint(["intro"])
+    assert "heading id 'introduction' is also defined at chapters/intro/config.yaml:1" in capsys.readouterr().out
+
+
+def test_lint_rejects_reference_links_defined_in_another_section(thesis, tmp_path, capsys):
+    write_chapter(tmp_path, "intro", {
+        "a": "See [QUIC][rfc9000].\n\n[rfc9000]: https://www.rfc-editor.org/rfc/rfc9000\n",
+        "b": "Also [RFC 9000][RFC9000], and `[not][rfc9000]` in code.\n",
+    })
+    assert not thesis.lint(["intro"])
+    out = capsys.readouterr().out
+    assert "chapters/intro/b.md:1" in out and "reference link [rfc9000] is defined at chapters/intro/a.md:3" in out
+    assert "a.md:1" not in out
+
+
+def pandoc_inputs(stub_tools):
+    """First input line of every pandoc conversion since the last call"""
+    return sorted(detail for tool, detail in stub_tools.take() if tool == "pandoc")
+
+
+@pytest.fixture
+def two_chapters(tmp_path):
+    write_chapter(tmp_path, "intro", {"a": "## Alpha\n\nA.\n", "b": "## Beta\n\nB.\n"})
+    write_chapter(tmp_path, "migration", {"c": "## Gamma\n\nC.\n"})
+    return ["intro", "migration"]
+
+
+def test_build_converts_every_fragment_once(thesis, tmp_path, stub_tools, two_chapters):
+    assert thesis.build(two_chapters, jobs=2)
+    assert pandoc_inputs(stub_tools) == ["# Intro", "# Migration", "## Alpha", "## Beta", "## Gamma"]
+    body = (tmp_path / "build" / "body-intro.tex").read_text()
+    assert body.index("\\section{Alpha}") < body.index("\\section{Beta}")
+    assert (tmp_path / "build" / "body.tex").read_text().splitlines()[1:] == [
+        "\\input{build/body-intro.tex}", "\\input{build/body-migration.tex}"]
+
+    assert thesis.build(two_chapters, jobs=2)
+    assert pandoc_inputs(stub_tools) == []
+
+
+def test_editing_a_section_reconverts_only_that_section_and_chapter(thesis, tmp_path, stub_tools, two_chapters):
+    thesis.build(two_chapters)
+    stub_tools.take()
+    other = tmp_path / "build" / "body-migration.tex"
+    mtime = other.stat().st_mtime_ns
+
+    (tmp_path / "chapters" / "intro" / "b.md").write_text("## Beta, revised\n\nB2.\n")
+    assert thesis.build(two_chapters)
+    assert pandoc_inputs(stub_tools) == ["## Beta, revised"]
+    assert "\\section{Beta, revised}" in (tmp_path / "build" / "body-intro.tex").read_text()
+    assert other.stat().st_mtime_ns == mtime
+
+
+def test_reordering_sections_is_served_from_the_cache(thesis, tmp_path, stub_tools, two_chapters):
+    thesis.build(two_chapters)
+    stub_tools.take()
+    (tmp_path / "chapters" / "intro" / "config.yaml").write_text("title: Intro\nb\na\n")
+    assert thesis.build(two_chapters)
+    assert pandoc_inputs(stub_tools) == []
+    body = (tmp_path / "build" / "body-intro.tex").read_text()
+    assert body.index("\\section{Beta}") < body.index("\\section{Alpha}")
+
+
+def test_switching_back_to_earlier_content_is_served_from_the_cache(thesis, tmp_path, stub_tools, two_chapters):
+    thesis.build(two_chapters)
+    section = tmp_path / "chapters" / "intro" / "a.md"
+    original = section.read_text()
+    section.write_text("## Alpha, draft two\n")
+    thesis.build(two_chapters)
+    stub_tools.take()
+    section.write_text(original)
+    assert thesis.build(two_chapters)
+    assert pandoc_inputs(stub_tools) == []
+
+
+def test_conversion_cache_evicts_least_recently_used_fragments(tmp_path):
+    cache = ConversionCache(tmp_path / "cache", max_bytes=250)
+    keys = [f"{n:02d}" + "0" * 62 for n in range(4)]
+    for age, key in enumerate(keys):
+        path = cache.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x" * 100)
+        os.utime(path, ns=(age * 10**9, age * 10**9))
+    # A lookup makes the oldest fragment the most recently used one
+    assert cache.get(keys[0]) == "x" * 100
+
+    assert cache.evict(keep={keys[1]}) == (2, 200)
+    assert [key in cache for key in keys] == [True, True, False, False]
+    assert cache.evict(keep=set()) == (0, 0)
+
+
+def test_pdf_rebuild_without_changes_runs_one_pdflatex_pass(thesis, tmp_path, stub_tools, two_chapters):
+    shutil.copy(os.path.join(REPO, "metadata.yaml"), tmp_path)
+    (tmp_path / "main.tex").write_text("\\documentclass{article}\n")
+    assert thesis.pdf(two_chapters)
+    assert (tmp_path / "build" / "thesis.pdf").exists()
+    assert [tool for tool, _ in stub_tools.take() if tool != "pandoc"] == [
+        "pdflatex", "biber", "pdflatex", "pdflatex"]
+
+    assert thesis.pdf(two_chapters)
+    assert [tool for tool, _ in stub_tools.take()] == ["pdflatex"]
+
+
+def test_failed_scaffold_swap_keeps_the_original_chapter(thesis, tmp_path, monkeypatch):
+    write_chapter(tmp_path, "intro", {"a": "## Original\n"})
+    write_chapter(tmp_path, "migration", {"b": "## Kept\n"})
+    real_rename = os.rename
+
+    def rename(src, dst):
+        # Moving the staged migration chapter into place fails after intro was swapped
+        if os.path.basename(src) == "migration" and ".scaffold-" in str(src):
+            raise OSError(28, "No space left on device")
+        real_rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", rename)
+    plan = {"intro": {"config.yaml": "title: New\nnew\n", "new.md": "## New\n"},
+            "migration": {"config.yaml": "title: New\nnew\n", "new.md": "## New\n"}}
+    assert not thesis.write_scaffold(plan)
+
+    chapters = tmp_path / "chapters"
+    assert sorted(p.name for p in chapters.iterdir()) == ["intro", "migration"]
+    assert sorted(p.name for p in (chapters / "intro").iterdir()) == ["a.md", "config.yaml"]
+    assert (chapters / "intro" / "a.md").read_text() == "## Original\n"
+    assert sorted(p.name for p in (chapters / "migration").iterdir()) == ["b.md", "config.yaml"]
+
+
+def test_interrupted_scaffold_swap_keeps_the_original_chapter_and_reraises(thesis, tmp_path, monkeypatch):
+    write_chapter(tmp_path, "intro", {"a": "## Original\n"})
+    real_rename = os.rename
+    calls = []
+
+    def rename(src, dst):
+        calls.append(dst)
+        # Interrupted between moving the original away and moving the new chapter in
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        real_rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", rename)
+    with pytest.raises(KeyboardInterrupt):
+        thesis.write_scaffold({"intro": {"config.yaml": "title: New\nnew\n", "new.md": "## New\n"}})
+    monkeypatch.setattr(os, "rename", real_rename)
+
+    chapters = tmp_path / "chapters"
+    assert [p.name for p in chapters.iterdir()] == ["intro"]
+    assert (chapters / "intro" / "a.md").read_text() == "## Original\n"
+    assert not (chapters / "intro" / "new.md").exists()
+
+
+def test_scaffold_writes_new_chapters_and_keeps_existing_files(thesis, tmp_path):
+    write_chapter(tmp_path, "intro", {"notes": "## Mine\n"})
+    assert thesis.write_scaffold({"intro": {"config.yaml": "title: Intro\nnew\n", "new.md": "## New\n"},
+                                  "extra": {"config.yaml": "title: Extra\n"}})
+    chapters = tmp_path / "chapters"
+    assert sorted(p.name for p in chapters.iterdir()) == ["extra", "intro"]
+    assert sorted(p.name for p in (chapters / "intro").iterdir()) == ["config.yaml", "new.md", "notes.md"]
@@ -0,0 +1,43 @@
+"""Tests for watcher.py."""
+
+import pytest
+
+from watcher import InotifyWatcher, PollingWatcher
+
+
+def make_watcher(kind, directories):
+    if kind == "polling":
+        return PollingWatcher(directories, interval=0.01)
+    try:
+        return InotifyWatcher(directories)
+    except (OSError, AttributeError):
+        pytest.skip("inotify unavailable")
+
+
+def poll_all(watcher, timeout=0.5):
+    changed = set()
+    batch = watcher.poll(timeout)
+    while batch:
+        changed.update(batch)
+        batch = watcher.poll(0.05)
+    return changed
+
+
+@pytest.mark.parametrize("kind", ["inotify", "polling"])
+def test_new_directories_are_watched_after_sync(kind, tmp_path):
+    chapters = tmp_path / "chapters"
+    chapters.mkdir()
+    watcher = make_watcher(kind, [chapters])
+    try:
+        (chapters / "new").mkdir()
+        assert chapters / "new" in poll_all(watcher)
+
+        # Written before the directory is watched: sync() or the next poll reports it
+        (chapters / "new" / "config.yaml").write_text("title: New\n")
+        changed = set(watcher.sync([chapters, chapters / "new"])) | poll_all(watcher)
+        assert chapters / "new" / "config.yaml" in changed
+
+        (chapters / "new" / "a.md").write_text("## A\n")
+        assert chapters / "new" / "a.md" in poll_all(watcher)
+    finally:
+        watcher.close()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+File watchers for `gen_thesis.py watch`.
+
+InotifyWatcher uses Linux inotify through libc (no third-party packages);
+PollingWatcher compares mtimes and sizes at an interval and is the fallback
+elsewhere. Both watch directories non-recursively, report changed paths from
+poll(), and take a new directory list through sync() when chapter
+directories are created or removed while watching.
+"""
+
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+class InotifyWatcher:
+    """Watch directories for file changes with Linux inotify (via libc)"""
+    
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct('iIII')
+    
+    def __init__(self, directories: List[Path]):
+        import ctypes
+        import ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for directory in directories:
+            self.add(directory)
+    
+    def add(self, directory: Path) -> bool:
+        """Start watching a directory (non-recursive)"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+        return wd >= 0
+    
+    def sync(self, directories: List[Path]) -> List[Path]:
+        """Watch directories not watched yet; returns the files already in them
+        
+        Files written before the watch was added raised no event, so they are
+        reported as changed.
+        """
+        watched = set(self.watches.values())
+        changed = []
+        for directory in directories:
+            if directory in watched or not self.add(directory):
+                continue
+            try:
+                changed += [Path(e.path) for e in os.scandir(directory) if e.is_file()]
+            except FileNotFoundError:
+                continue
+        return changed
+    
+    def poll(self, timeout: float) -> List[Path]:
+        """Return paths changed within timeout seconds (empty list on timeout)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 65536)
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & self.IN_IGNORED:
+                # The directory was removed; sync() may watch it again once recreated
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches or not name:
+                continue
+            changed.append(self.watches[wd] / os.fsdecode(name))
+        return changed
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that compares file mtimes and sizes at an interval"""
+    
+    def __init__(self, directories: List[Path], interval: float = 0.5):
+        self.directories = directories
+        self.interval = interval
+        self.state = self.scan()
+    
+    def scan(self) -> Dict[Path, Tuple[int, int]]:
+        """Stat every file directly inside the watched directories
+        
+        Subdirectories are listed too, so creating or removing one counts as
+        a change.
+        """
+        state = {}
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    state[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+                elif entry.is_dir():
+                    state[Path(entry.path)] = (0, 0)
+        return state
+    
+    def poll(self, timeout: float) -> List[Path]:
+        time.sleep(min(timeout, self.interval))
+        state = self.scan()
+        changed = [p for p in state.keys() | self.state.keys()
+                   if state.get(p) != self.state.get(p)]
+        self.state = state
+        return changed
+    
+    def sync(self, directories: List[Path]) -> List[Path]:
+        """Replace the watched directories; their files show up in the next poll"""
+        self.directories = directories
+        return []
+    
+    def close(self):
+        pass